@@ -1,38 +1,163 @@
 import os
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, jsonify
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
-from pymongo import MongoClient
-import certifi
+from flask_jwt_extended import JWTManager, get_jwt, jwt_required
 from dotenv import load_dotenv
+import click
 
 # .env file se saari keys (jaise OPENAI_API_KEY, AGORA_APP_ID) ko load karta hai
 load_dotenv()
 
 # --- BLUEPRINTS ---
 # Saare blueprints ko import karein
-from blueprints.patients import patients_bp
+from blueprints.patients import patients_bp, requeue_stale_transcriptions
 from blueprints.doctor import doctors_bp
 from blueprints.pharma import pharma_bp
 from blueprints.video import video_bp
+from utils.indexes import ensure_indexes, missing_unique_indexes, verify_indexes
+from utils.jobs import create_job_queue
+from utils.helpers import init_translation_cache, translation_cache_stats
+from utils.ai_model import ai_cache_stats
+from utils.metrics import init_metrics
+from utils.mongo_monitor import MongoCommandMonitor, init_mongo_monitoring
+from utils.db import create_mongo_client
+from utils.auth import init_password_hashing
+from utils.identity import init_patient_cache, patient_cache_stats
+from utils.ids import BlockIdAllocator
+from utils.storage import BlobStore, FILE_SERVE_MODES, send_upload
+from utils.storage_backends import create_storage_backend
+from utils.uploads import ResumableUploads
+from utils.room_pool import RoomPool
+from utils.call_sessions import CallSessions
+from utils import hms
 
-def create_app():
-    """App factory to create and configure the Flask app."""
+def create_app(config_overrides=None, mongo_client=None):
+    """
+    App factory to create and configure the Flask app.
+    `config_overrides` is applied on top of config.Config; `mongo_client` replaces the
+    MongoClient built from MONGO_URI (used by benchmarks with a local Mongo stand-in).
+    """
     app = Flask(__name__)
     
     # Configuration
     app.config.from_object('config.Config')
+    if config_overrides:
+        app.config.update(config_overrides)
     CORS(app, resources={r"/*": {"origins": "*"}})
     jwt = JWTManager(app)
 
+    # Request timing middleware + /metrics (Prometheus text format)
+    init_metrics(app)
+
     # Ensure the upload folder exists
     upload_folder = app.config.get('UPLOAD_FOLDER', 'uploads')
     if not os.path.exists(upload_folder):
         os.makedirs(upload_folder)
 
     # Database connection with SSL fix
-    client = MongoClient(app.config['MONGO_URI'], tlsCAFile=certifi.where())
+    # Command monitor: slow-query log, per-request query counts, N+1 warnings
+    app.mongo_monitor = MongoCommandMonitor(slow_query_ms=app.config.get('MONGO_SLOW_QUERY_MS', 100))
+    if mongo_client is not None:
+        client = mongo_client
+    else:
+        client = create_mongo_client(app.config['MONGO_URI'], event_listeners=[app.mongo_monitor])
     app.db = client[app.config['MONGO_DB_NAME']]
+    init_mongo_monitoring(app)
+
+    # Indexes ko idempotently ensure karein (MONGO_ENSURE_INDEXES=0 se band kar sakte hain)
+    if app.config.get('MONGO_ENSURE_INDEXES', True):
+        ensure_indexes(app.db)
+    # Unique indexes ke bina duplicate mobiles / call sessions chupchaap accept ho jaate - startup fail karo
+    missing = missing_unique_indexes(app.db)
+    if missing:
+        raise RuntimeError(f"Required unique indexes are missing: {', '.join(missing)}. "
+                           "Remove the duplicate data reported above, or enable MONGO_ENSURE_INDEXES to create them.")
+
+    # Doctor IDs: counters collection se block allocation (registration = ek insert)
+    app.doctor_id_allocator = BlockIdAllocator(
+        app.db['counters'], 'doctor_id', prefix='D-',
+        block_size=app.config.get('DOCTOR_ID_BLOCK_SIZE', 20)
+    )
+
+    # Uploads: content-addressed blobs (ab/cd/<sha256>) with ref counts in `blobs`,
+    # bytes local disk / GridFS / S3-compatible bucket mein (STORAGE_BACKEND)
+    upload_root = os.path.join(app.root_path, upload_folder)
+    storage_backend = create_storage_backend(
+        app.config.get('STORAGE_BACKEND', 'local'),
+        root=upload_root, db=app.db, bucket_name=app.config.get('GRIDFS_BUCKET', 'uploads'),
+        bucket=app.config.get('S3_BUCKET'), endpoint_url=app.config.get('S3_ENDPOINT_URL'),
+        region=app.config.get('S3_REGION'), access_key_id=app.config.get('S3_ACCESS_KEY_ID'),
+        secret_access_key=app.config.get('S3_SECRET_ACCESS_KEY'), prefix=app.config.get('S3_PREFIX', '')
+    )
+    app.blob_store = BlobStore(upload_root, app.db['blobs'], backend=storage_backend)
+    if app.config.get('FILE_SERVE_MODE', 'direct') not in FILE_SERVE_MODES:
+        raise ValueError(f"Unknown FILE_SERVE_MODE {app.config['FILE_SERVE_MODE']!r}; expected one of {FILE_SERVE_MODES}")
+    if app.config.get('FILE_SERVE_MODE', 'direct') != 'direct' and storage_backend.name != 'local':
+        raise ValueError(f"FILE_SERVE_MODE {app.config['FILE_SERVE_MODE']!r} needs STORAGE_BACKEND 'local'")
+    # Resumable chunked uploads: chunks seedha storage backend mein, sessions `upload_sessions` mein.
+    # Suggested chunk ek request mein fit hona chahiye (MAX_CONTENT_LENGTH)
+    upload_chunk_size = app.config.get('UPLOAD_CHUNK_SIZE', 4 * 1024 * 1024)
+    if app.config.get('MAX_CONTENT_LENGTH'):
+        upload_chunk_size = min(upload_chunk_size, app.config['MAX_CONTENT_LENGTH'])
+    app.resumable_uploads = ResumableUploads(
+        app.blob_store, app.db['upload_sessions'],
+        chunk_size=upload_chunk_size,
+        max_size=app.config.get('UPLOAD_MAX_SIZE', 512 * 1024 * 1024),
+        ttl=app.config.get('UPLOAD_SESSION_TTL', 24 * 3600),
+        assembly_timeout=app.config.get('UPLOAD_ASSEMBLY_TIMEOUT', 15 * 60)
+    )
+
+    # 100ms rooms ka pre-created pool (`video_rooms`); background thread refill/expire karta hai
+    app.room_pool = RoomPool(
+        app.db['video_rooms'],
+        size=app.config.get('VIDEO_ROOM_POOL_SIZE', 5),
+        template_ids=app.config.get('VIDEO_ROOM_POOL_TEMPLATES'),
+        room_ttl=app.config.get('VIDEO_ROOM_TTL', 12 * 3600),
+        call_ttl=app.config.get('VIDEO_CALL_TTL', 3 * 3600),
+        refill_interval=app.config.get('VIDEO_ROOM_POOL_REFILL_INTERVAL', 30)
+    )
+    if app.room_pool.size > 0 and hms.is_configured():
+        app.room_pool.start()
+    # Doctor-patient call sessions: reconnect par wahi room, patient tokens ka room check
+    app.call_sessions = CallSessions(
+        app.db['call_sessions'],
+        reuse_window=app.config.get('VIDEO_SESSION_REUSE_WINDOW', 30 * 60),
+        call_ttl=app.config.get('VIDEO_CALL_TTL', 3 * 3600)
+    )
+
+    # Background worker pool (audio transcription etc.)
+    app.job_queue = create_job_queue(
+        app.config.get('JOB_QUEUE_BACKEND', 'local'),
+        workers=app.config.get('TRANSCRIPTION_WORKERS', 2),
+        name='transcription'
+    )
+    # Queue in-process hai: pichle process ke adhoore transcription jobs yahan dobara queue hote hain
+    resubmitted, failed = requeue_stale_transcriptions(
+        app.db['issues'], app.blob_store, app.job_queue,
+        stale_after=app.config.get('TRANSCRIPTION_STALE_AFTER', 600),
+        max_attempts=app.config.get('TRANSCRIPTION_MAX_ATTEMPTS', 3)
+    )
+    if resubmitted or failed:
+        print(f"Transcription sweep: resubmitted {resubmitted} stale jobs, marked {failed} as failed")
+
+    # Password hashing process pool (login/register ko request thread se hatata hai)
+    init_password_hashing(
+        app.config.get('PASSWORD_HASH_METHOD', 'scrypt'),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 0)
+    )
+
+    # Active patient IDs ka TTL cache (JWT identity checks)
+    init_patient_cache(
+        size=app.config.get('PATIENT_CACHE_SIZE', 10000),
+        ttl=app.config.get('PATIENT_CACHE_TTL', 300)
+    )
+
+    # Translation cache: in-process LRU ke peeche shared Mongo collection
+    init_translation_cache(
+        app.db['translation_cache'] if app.config.get('TRANSLATION_CACHE_SHARED', True) else None,
+        memory_size=app.config.get('TRANSLATION_CACHE_SIZE', 4096),
+        memory_ttl=app.config.get('TRANSLATION_CACHE_TTL', 6 * 3600)
+    )
 
     # --- BLUEPRINTS KO REGISTER KAREIN ---
     app.register_blueprint(patients_bp, url_prefix='/patients')
@@ -43,8 +168,59 @@ def create_app():
     # Central file server for all uploaded content
     @app.route('/uploads/<path:filename>')
     def serve_central_uploads(filename):
-        uploads_dir = os.path.join(app.root_path, upload_folder)
-        return send_from_directory(uploads_dir, filename)
+        return send_upload(app.blob_store, filename)
+
+    # --- CLI COMMANDS ---
+    # Usage: `flask --app app indexes` ya `flask --app app indexes --verify`
+    @app.cli.command('indexes')
+    @click.option('--verify', is_flag=True, help='Report hot queries that still run a COLLSCAN.')
+    def indexes_command(verify):
+        """Create all declared MongoDB indexes."""
+        for collection_name, names in ensure_indexes(app.db).items():
+            click.echo(f"{collection_name}: {', '.join(names)}")
+        if verify:
+            collscans = verify_indexes(app.db)
+            for q in collscans:
+                click.echo(f"COLLSCAN: {q['collection']} filter={q['filter']} sort={q['sort']}")
+            if not collscans:
+                click.echo("All hot queries use an index.")
+
+    # Usage: `flask --app app blobs-gc --grace 3600`
+    @app.cli.command('blobs-gc')
+    @click.option('--grace', default=3600, show_default=True, help='Seconds a blob must be unreferenced before deletion.')
+    def blobs_gc_command(grace):
+        """Delete upload blobs that no report/issue references any more."""
+        click.echo(f"Removed {app.blob_store.gc(grace)} unreferenced blobs.")
+
+    # Usage: `flask --app app uploads-migrate` (STORAGE_BACKEND local se gridfs/s3 karne ke baad ek baar)
+    @app.cli.command('uploads-migrate')
+    def uploads_migrate_command():
+        """Copy content-addressed blobs from local disk into the configured storage backend."""
+        click.echo(f"Copied {app.blob_store.migrate_local_blobs()} blobs to the {app.blob_store.backend.name} backend.")
+
+    # Usage: `flask --app app uploads-gc`
+    @app.cli.command('uploads-gc')
+    def uploads_gc_command():
+        """Delete expired resumable upload sessions and their stored chunks."""
+        click.echo(f"Removed {app.resumable_uploads.gc()} expired upload sessions.")
+
+    # Usage: `flask --app app video-rooms` (cron se bhi chala sakte hain jab background thread band ho)
+    @app.cli.command('video-rooms')
+    def video_rooms_command():
+        """Expire old 100ms rooms and call sessions, and refill the pre-provisioned pool once."""
+        closed = app.call_sessions.close_expired()
+        disabled = app.room_pool.expire()
+        created = app.room_pool.refill()
+        click.echo(f"Closed {closed} call sessions, disabled {disabled} expired rooms, created {created} pool rooms.")
+
+    # Internal cache sizes/hit rates - sirf logged-in doctors ke liye
+    @app.route('/stats/caches')
+    @jwt_required()
+    def cache_stats():
+        if get_jwt().get("role") != "doctor":
+            return jsonify({"error": "Access forbidden: Doctor access required"}), 403
+        return jsonify({'translation': translation_cache_stats(), 'ai_response': ai_cache_stats(),
+                        'active_patients': patient_cache_stats(), 'video_rooms': app.room_pool.stats()})
 
     @app.route('/ping')
     def ping():
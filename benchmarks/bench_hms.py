@@ -0,0 +1,76 @@
+"""
+Room-creation latency against a local fake 100ms server (tests/fake_servers.py).
+
+Usage: python -m benchmarks.bench_hms [--calls 200] [--server-delay-ms 5] [--concurrency 4]
+
+Compares the old path (sign a fresh management token + bare requests.post, new TCP
+connection per call) with utils/hms.py (cached token + pooled keep-alive Session).
+Over real TLS to api.100ms.live the saved handshake is larger than on loopback.
+"""
+import argparse
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+import requests
+
+from benchmarks.load_test import percentile
+from tests.fake_servers import FakeHMSServer
+from utils import hms
+
+SECRET = 'bench-secret-that-is-long-enough-for-hs256'
+
+def legacy_create_room(base_url: str, name: str):
+    """The previous implementation: new token and new connection every call, no timeout."""
+    now = int(time.time())
+    token = jwt.encode({'access_key': 'bench', 'type': 'management', 'version': 2, 'jti': str(uuid.uuid4()),
+                        'iat': now, 'nbf': now, 'exp': now + 24 * 3600}, SECRET, algorithm='HS256')
+    res = requests.post(f"{base_url}/rooms", json={'name': name, 'template_id': 'bench-template'},
+                        headers={'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'})
+    res.raise_for_status()
+    return res.json().get('id')
+
+def measure(func, calls: int, concurrency: int) -> dict:
+    def one(i):
+        start = time.perf_counter()
+        assert func(f"Bench call {i}")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(one, range(calls)))
+    wall = time.perf_counter() - start
+    return {'p50_ms': percentile(latencies, 50) * 1000, 'p95_ms': percentile(latencies, 95) * 1000,
+            'throughput_rps': calls / wall}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--server-delay-ms', type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    server = FakeHMSServer().start()
+    server.delay = args.server_delay_ms / 1000.0
+    os.environ.update({'HMS_ACCESS_KEY': 'bench', 'HMS_SECRET': SECRET, 'HMS_TEMPLATE_ID': 'bench-template',
+                       'HMS_API_BASE_URL': server.api_url})
+    hms.reset_hms_client()
+    try:
+        results = {
+            'legacy (new token + connection)': measure(lambda name: legacy_create_room(server.api_url, name),
+                                                       args.calls, args.concurrency),
+            'pooled session + cached token': measure(hms.create_room, args.calls, args.concurrency),
+        }
+    finally:
+        hms.reset_hms_client()
+        server.stop()
+
+    print(f"{args.calls} room creations, concurrency {args.concurrency}, server delay {args.server_delay_ms} ms")
+    print(f"{'path':<34}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}")
+    for name, r in results.items():
+        print(f"{name:<34}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['throughput_rps']:>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Login throughput vs. password hashing pool size (utils/auth.py).
+
+Usage: python -m benchmarks.bench_password_hashing [--workers 0,1,2,4] [--requests 64] [--concurrency 16]
+                                                   [--method scrypt]
+
+Builds the app against mongomock, seeds a few patients and drives POST /patients/login
+concurrently. workers=0 hashes on the request thread (the old behaviour); with a process
+pool, login throughput should scale with cores until the pool size reaches the core count.
+A run with an outdated hash method also checks that hashes are upgraded on login.
+"""
+import argparse
+import os
+
+from benchmarks.load_test import BENCH_DB_NAME, BENCH_PASSWORD, build_app, run_scenario, seed
+from utils.auth import init_password_hashing, hash_password, needs_rehash
+
+def login_scenario(ids):
+    def login(client, rng):
+        _, mobile = rng.choice(ids['patients'])
+        return client.post('/patients/login', json={'mobile': mobile, 'password': BENCH_PASSWORD})
+    return login
+
+def check_rehash(app, method: str):
+    """Stores a hash made with an old cost, logs in and checks it was upgraded to `method`."""
+    init_password_hashing('pbkdf2:sha256:1000', workers=0)
+    old_hash = hash_password(BENCH_PASSWORD)
+    init_password_hashing(method, workers=0)
+    app.db.patients.update_one({'mobile': '8000000000'}, {'$set': {'password_hash': old_hash}})
+    response = app.test_client().post('/patients/login', json={'mobile': '8000000000', 'password': BENCH_PASSWORD})
+    new_hash = app.db.patients.find_one({'mobile': '8000000000'})['password_hash']
+    return response.status_code == 200 and new_hash != old_hash and not needs_rehash(new_hash)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cores = os.cpu_count() or 1
+    default_workers = sorted({0, 1, cores} | {w for w in (2, 4) if w <= cores})
+    parser.add_argument('--workers', default=','.join(map(str, default_workers)))
+    parser.add_argument('--requests', type=int, default=64)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--method', default='scrypt')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    app = build_app()
+    app.db.client.drop_database(BENCH_DB_NAME)
+    init_password_hashing(args.method, workers=0)
+    ids = seed(app.db, patients=20, issues_per_patient=0, reports_per_patient=0, doctors=1)
+
+    print(f"{cores} CPU cores, method={args.method}, {args.requests} logins at concurrency {args.concurrency}")
+    header = f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'speedup':>10}"
+    print(header)
+    print('-' * len(header))
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(',') if w]:
+        init_password_hashing(args.method, workers=workers)
+        # Pool processes warm-up (spawn) ko measurement se bahar rakhein
+        hash_password('warmup')
+        result = run_scenario(app, login_scenario(ids), args.requests, args.concurrency, args.seed)
+        baseline = baseline or result['throughput_rps']
+        print(f"{workers:>8}{result['throughput_rps']:>10.1f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+              f"{result['throughput_rps'] / baseline:>9.2f}x")
+
+    print(f"Outdated hash upgraded on login: {'yes' if check_rehash(app, args.method) else 'NO'}")
+    init_password_hashing(args.method, workers=0)
+    app.db.client.drop_database(BENCH_DB_NAME)
+
+if __name__ == '__main__':
+    main()
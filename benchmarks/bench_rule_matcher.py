@@ -0,0 +1,63 @@
+"""
+Micro-benchmark for the hybrid chatbot rule matcher (utils/rules.py).
+
+Usage: python -m benchmarks.bench_rule_matcher [--iterations N]
+
+Compares the precompiled multilingual matcher against the old approach of
+scanning every keyword with `in`, and checks that rule hits never need a translator call.
+"""
+import argparse
+import time
+
+from utils.rules import PROMPT_RULES, EMERGENCY_SYMPTOMS, FEATURE_TERMS, FEATURE_RULES, EMERGENCY_RESPONSE
+
+PROMPTS = [
+    "I am having severe chest pain since morning",
+    "mujhe seene mein dard ho raha hai",
+    "ਮੈਨੂੰ ਛਾਤੀ ਵਿੱਚ ਦਰਦ ਹੈ",
+    "मेरे पिताजी बेहोश हो गए हैं",
+    "How do I book an appointment?",
+    "doctor ki appointment book karni hai",
+    "मुझे अपनी रिपोर्ट अपलोड करनी है",
+    "Is this medicine available at a pharmacy nearby?",
+    "What are some remedies for a common cold?",
+    "mujhe do din se halka bukhar hai aur khansi hai",
+]
+
+def legacy_match(text: str):
+    """The old linear scan (all terms checked with `in`), used as the baseline."""
+    text = text.lower()
+    for terms in EMERGENCY_SYMPTOMS.values():
+        if any(term in text for term in terms):
+            return EMERGENCY_RESPONSE
+    for concepts, response in FEATURE_RULES:
+        if all(any(term in text for term in FEATURE_TERMS[c]) for c in concepts):
+            return response
+    return None
+
+def time_per_call(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for prompt in PROMPTS:
+            func(prompt)
+    return (time.perf_counter() - start) / (iterations * len(PROMPTS))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    mismatches = [p for p in PROMPTS if PROMPT_RULES.match(p) != legacy_match(p)]
+    compiled = time_per_call(PROMPT_RULES.match, args.iterations)
+    legacy = time_per_call(legacy_match, args.iterations)
+    hits = sum(1 for p in PROMPTS if PROMPT_RULES.match(p) is not None)
+
+    print(f"prompts: {len(PROMPTS)} ({hits} rule hits answered without a translator call)")
+    print(f"compiled matcher: {compiled * 1e6:8.2f} us/prompt")
+    print(f"linear in-scan:   {legacy * 1e6:8.2f} us/prompt")
+    print(f"speedup:          {legacy / compiled:8.2f}x")
+    if mismatches:
+        print(f"WARNING: results differ for {mismatches}")
+
+if __name__ == '__main__':
+    main()
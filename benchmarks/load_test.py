@@ -0,0 +1,286 @@
+"""
+In-process load test for the hot API endpoints.
+
+Usage:
+    python -m benchmarks.load_test [--patients 200] [--issues-per-patient 20] [--concurrency 8]
+                                   [--requests 400] [--mongo-uri mongodb://localhost:27017]
+                                   [--save baselines/run.json] [--compare baselines/run.json]
+
+The app is built with create_app() against mongomock (default) or a throwaway mongod
+(--mongo-uri; the benchmark database is dropped afterwards), seeded at the requested scale,
+and driven with concurrent Flask test clients. The translator and AI model are stubbed so
+only our own code and Mongo are measured. Prints p50/p95/p99 latency and throughput per
+endpoint, and can save/compare JSON baselines run over run.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask_jwt_extended import create_access_token
+
+BENCH_PASSWORD = 'benchpass'
+BENCH_DB_NAME = 'codecure_bench'
+REGRESSION_THRESHOLD = 0.20   # p95 ya throughput mein 20% se zyada kharabi = regression
+
+# --- Stubs for external services ---
+
+def stub_external_services(delay: float = 0.0):
+    """Replaces the translator and AI model with fast local stand-ins (optional fixed delay)."""
+    import blueprints.patients as patients_module
+
+    def fake_translate(text, target_lang='en'):
+        if delay:
+            time.sleep(delay)
+        return text
+
+    def fake_ai_response(prompt_text, system_instruction):
+        if delay:
+            time.sleep(delay)
+        return {"response": f"Stub answer for: {prompt_text}"}
+
+    patients_module.free_translate = fake_translate
+    patients_module.get_ai_response = fake_ai_response
+
+# --- App + seed data ---
+
+def build_app(mongo_uri: str = None):
+    from app import create_app
+    overrides = {
+        'TESTING': True,
+        'MONGO_DB_NAME': BENCH_DB_NAME,
+        'UPLOAD_FOLDER': tempfile.mkdtemp(prefix='codecure-bench-uploads-'),
+        'METRICS_ENABLED': True,
+    }
+    if mongo_uri:
+        overrides['MONGO_URI'] = mongo_uri
+        return create_app(overrides)
+    import mongomock
+    return create_app(overrides, mongo_client=mongomock.MongoClient())
+
+def seed(db, patients: int, issues_per_patient: int, reports_per_patient: int, doctors: int) -> dict:
+    """Inserts benchmark data with insert_many and returns the ids the scenarios need."""
+    from utils.auth import hash_password
+    # Ek hi hash sab users ke liye - seeding ke time har password hash karna bahut slow hoga
+    password_hash = hash_password(BENCH_PASSWORD)
+    now = datetime.datetime.now(datetime.UTC)
+
+    patient_docs = [{
+        'first_name': f"Bench{i}", 'last_name': 'Patient', 'age': 30 + i % 40, 'dob': '1990-01-01',
+        'sex': random.choice('MF'), 'mobile': f"8{i:09d}", 'password_hash': password_hash,
+        'created_at': now, 'profile': {}, 'unique_id': uuid.uuid4().hex[:16],
+    } for i in range(patients)]
+    db.patients.insert_many(patient_docs, ordered=False)
+
+    issue_docs, report_docs = [], []
+    for p in patient_docs:
+        for j in range(issues_per_patient):
+            issue_docs.append({
+                'user_id': p['unique_id'], 'created_at': now - datetime.timedelta(minutes=j),
+                'status': random.choice(['Pending', 'Seen', 'Resolved']), 'prescription': None,
+                'text': f"Benchmark issue {j}", 'translated': f"Benchmark issue {j}",
+            })
+        for j in range(reports_per_patient):
+            report_docs.append({
+                'user_id': p['unique_id'], 'filename': f"{uuid.uuid4().hex}.pdf",
+                'original_name': 'report.pdf', 'uploaded_at': now - datetime.timedelta(hours=j),
+            })
+    if issue_docs:
+        db.issues.insert_many(issue_docs, ordered=False)
+    if report_docs:
+        db.reports.insert_many(report_docs, ordered=False)
+
+    doctor_docs = [{
+        'doctor_id': f"D-B{i:04d}", 'first_name': 'Bench', 'last_name': f"Doctor{i}",
+        'password_hash': password_hash, 'specialization': 'General Medicine', 'branch': 'Main',
+        'approved_status': True, 'registered_at': now,
+    } for i in range(max(1, doctors))]
+    db.doctors.insert_many(doctor_docs, ordered=False)
+
+    return {
+        'patients': [(p['unique_id'], p['mobile']) for p in patient_docs],
+        'doctors': [d['doctor_id'] for d in doctor_docs],
+    }
+
+# --- Scenarios ---
+
+def build_scenarios(app, ids: dict) -> dict:
+    """Each scenario is a callable(client, rng) -> response."""
+    with app.app_context():
+        patient_tokens = {uid: create_access_token(identity=uid) for uid, _ in ids['patients']}
+        doctor_token = create_access_token(identity=ids['doctors'][0], additional_claims={'role': 'doctor'})
+
+    def patient(rng):
+        uid, mobile = rng.choice(ids['patients'])
+        return uid, mobile, {'Authorization': f"Bearer {patient_tokens[uid]}"}
+
+    doctor_headers = {'Authorization': f"Bearer {doctor_token}"}
+
+    def login(client, rng):
+        _, mobile, _ = patient(rng)
+        return client.post('/patients/login', json={'mobile': mobile, 'password': BENCH_PASSWORD})
+
+    def profile_details(client, rng):
+        return client.get('/patients/profile-details', headers=patient(rng)[2])
+
+    def issue_submit(client, rng):
+        return client.post('/patients/issue', headers=patient(rng)[2], data={'text': 'mujhe bukhar hai'})
+
+    def issue_list(client, rng):
+        return client.get('/patients/issue/list', headers=patient(rng)[2])
+
+    def doctor_all_issues(client, rng):
+        return client.get('/doctors/issues/all?limit=50', headers=doctor_headers)
+
+    def doctor_patient_file(client, rng):
+        uid = patient(rng)[0]
+        return client.get(f'/doctors/patient/{uid}', headers=doctor_headers)
+
+    def prompt(client, rng):
+        return client.post('/patients/prompt', headers=patient(rng)[2],
+                           json={'prompt': 'What are some remedies for a common cold?'})
+
+    return {
+        'login': login,
+        'profile_details': profile_details,
+        'issue_submit': issue_submit,
+        'issue_list': issue_list,
+        'doctor_all_issues': doctor_all_issues,
+        'doctor_patient_file': doctor_patient_file,
+        'prompt': prompt,
+    }
+
+# --- Runner ---
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def run_scenario(app, scenario, total_requests: int, concurrency: int, seed_value: int) -> dict:
+    per_worker = [total_requests // concurrency + (1 if i < total_requests % concurrency else 0)
+                  for i in range(concurrency)]
+
+    def worker(index, count):
+        client = app.test_client()
+        rng = random.Random(seed_value + index)
+        latencies, errors = [], 0
+        for _ in range(count):
+            start = time.perf_counter()
+            response = scenario(client, rng)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(concurrency), per_worker))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(l for lat, _ in results for l in lat)
+    return {
+        'requests': len(latencies),
+        'errors': sum(e for _, e in results),
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+def compare(current: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """Returns human-readable regression lines (p95 up or throughput down by more than threshold)."""
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        if base['p95_ms'] and result['p95_ms'] > base['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {result['p95_ms']}ms")
+        if base['throughput_rps'] and result['throughput_rps'] < base['throughput_rps'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {base['throughput_rps']} -> {result['throughput_rps']} req/s")
+    return regressions
+
+def print_table(report: dict, baseline: dict = None):
+    header = f"{'endpoint':<22}{'reqs':>7}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print('-' * len(header))
+    for name, r in report['results'].items():
+        line = (f"{name:<22}{r['requests']:>7}{r['errors']:>8}{r['throughput_rps']:>10.1f}"
+                f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+        base = (baseline or {}).get('results', {}).get(name)
+        if base and base['p95_ms']:
+            line += f"   (p95 {(r['p95_ms'] / base['p95_ms'] - 1) * 100:+.0f}% vs baseline)"
+        print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--patients', type=int, default=200)
+    parser.add_argument('--issues-per-patient', type=int, default=20)
+    parser.add_argument('--reports-per-patient', type=int, default=5)
+    parser.add_argument('--doctors', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400, help='Requests per endpoint.')
+    parser.add_argument('--scenarios', default='', help='Comma-separated subset of endpoints to run.')
+    parser.add_argument('--stub-delay-ms', type=float, default=0.0, help='Simulated translator/AI latency.')
+    parser.add_argument('--mongo-uri', default=None, help='Use a throwaway mongod instead of mongomock.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', help='Write the results as a JSON baseline to this path.')
+    parser.add_argument('--compare', help='Compare against a previously saved JSON baseline.')
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    stub_external_services(args.stub_delay_ms / 1000.0)
+    app = build_app(args.mongo_uri)
+    app.db.client.drop_database(BENCH_DB_NAME)
+    try:
+        from utils.indexes import ensure_indexes
+        ensure_indexes(app.db)
+        ids = seed(app.db, args.patients, args.issues_per_patient, args.reports_per_patient, args.doctors)
+        scenarios = build_scenarios(app, ids)
+        selected = [s for s in args.scenarios.split(',') if s] or list(scenarios)
+
+        report = {
+            'created_at': datetime.datetime.now(datetime.UTC).isoformat(),
+            'backend': 'mongod' if args.mongo_uri else 'mongomock',
+            'python': platform.python_version(),
+            'params': {k: v for k, v in vars(args).items() if k not in ('save', 'compare', 'mongo_uri')},
+            'results': {},
+        }
+        for name in selected:
+            if name not in scenarios:
+                parser.error(f"Unknown scenario: {name}")
+            report['results'][name] = run_scenario(app, scenarios[name], args.requests, args.concurrency, args.seed)
+    finally:
+        app.db.client.drop_database(BENCH_DB_NAME)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(report, baseline)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(report, baseline)
+        for line in regressions:
+            print(f"REGRESSION: {line}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
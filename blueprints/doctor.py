@@ -1,11 +1,14 @@
 from flask import Blueprint, request, current_app, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
-from utils.auth import hash_password, verify_password
-from utils.helpers import save_file_and_get_name
+from utils.auth import hash_password, verify_password, needs_rehash
+from utils.identity import is_active_patient
+from utils.ids import IdSpaceExhausted
+from utils.pagination import paginate, sort_spec
+from utils.streaming import StreamedArray, parse_batch_size, streaming_json_response
 import datetime
-import random
-import string
 from bson.objectid import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 doctors_bp = Blueprint('doctors', __name__)
 
@@ -22,13 +25,47 @@ def issues_collection():
 def reports_collection():
     return current_app.db['reports']
 
+ISSUE_STATUSES = ['Seen', 'Resolved']
+BULK_MAX_ITEMS = 500
+DOCTOR_ID_ATTEMPTS = 5
+
 def generate_unique_doctor_id():
-    """Generates a unique 6-digit alphanumeric ID for doctors."""
-    while True:
-        random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
-        doctor_id = f"D-{random_part}"
-        if not doctors_collection().find_one({"doctor_id": doctor_id}):
-            return doctor_id
+    """Next D-XXXXX id from the block allocator (utils/ids.py) - no probe queries."""
+    return current_app.doctor_id_allocator.next_id()
+
+def _patient_names_for(user_ids):
+    """
+    Resolves patient display names for many user_ids with a single $in query.
+    Returns a dict of unique_id -> "First Last".
+    """
+    unique_ids = list({uid for uid in user_ids if uid})
+    if not unique_ids:
+        return {}
+    cursor = patients_collection().find(
+        {'unique_id': {'$in': unique_ids}},
+        {'_id': 0, 'unique_id': 1, 'first_name': 1, 'last_name': 1}
+    )
+    return {p['unique_id']: f"{p.get('first_name')} {p.get('last_name')}" for p in cursor}
+
+def _enrich_issues(issues):
+    """Adds patient_name and a string _id to a batch of issues (one patients query per batch)."""
+    patient_names = _patient_names_for(issue.get('user_id') for issue in issues)
+    for issue in issues:
+        issue['patient_name'] = patient_names.get(issue.get('user_id'), "Unknown Patient")
+        issue['_id'] = str(issue['_id'])
+    return issues
+
+def _drop_ids(docs):
+    for doc in docs:
+        doc.pop('_id', None)
+    return docs
+
+def _remove_upload(filename):
+    """Drops the reference of a file saved for a write that did not go through (e.g. unknown issue)."""
+    current_app.blob_store.release(filename)
+
+def _wants_stream():
+    return request.args.get('stream') in ('1', 'true')
 
 # ---------------------------
 # DOCTOR REGISTRATION
@@ -44,9 +81,7 @@ def doctor_register():
     if data['password'] != data['confirm_password']:
         return jsonify({'error': 'Passwords do not match'}), 400
 
-    doctor_id = generate_unique_doctor_id()
     doctor_document = {
-        "doctor_id": doctor_id,
         "first_name": data['first_name'],
         "last_name": data['last_name'],
         "password_hash": hash_password(data['password']),
@@ -55,11 +90,23 @@ def doctor_register():
         "approved_status": False,
         "registered_at": datetime.datetime.now(datetime.UTC)
     }
-    
-    doctors_collection().insert_one(doctor_document)
+
+    # Allocator IDs unique hain; duplicate sirf purane random IDs se takra sakta hai -> agla ID lo
+    for _ in range(DOCTOR_ID_ATTEMPTS):
+        doctor_document.pop("_id", None)
+        try:
+            doctor_document["doctor_id"] = generate_unique_doctor_id()
+            doctors_collection().insert_one(doctor_document)
+            break
+        except DuplicateKeyError:
+            continue
+        except IdSpaceExhausted:
+            return jsonify({'error': 'No doctor IDs left to allocate'}), 503
+    else:
+        return jsonify({'error': 'Could not allocate a doctor ID, please retry'}), 503
     return jsonify({
         "message": "Registration successful. Please wait for admin approval.",
-        "doctor_id": doctor_id
+        "doctor_id": doctor_document["doctor_id"]
     }), 201
 
 # ---------------------------
@@ -74,13 +121,16 @@ def doctor_login():
     doctor = doctors_collection().find_one({"doctor_id": data['doctor_id']})
     if not doctor or not verify_password(doctor.get('password_hash', ''), data['password']):
         return jsonify({"error": "Invalid credentials"}), 401
+    # Purane method/cost wala hash ho to naye parameters se dobara hash karein
+    if needs_rehash(doctor['password_hash']):
+        doctors_collection().update_one({'_id': doctor['_id']}, {'$set': {'password_hash': hash_password(data['password'])}})
 
     if not doctor.get('approved_status', False):
         return jsonify({"error": "Your account is pending admin approval."}), 403
 
     access_token = create_access_token(
         identity=doctor['doctor_id'], 
-        additional_claims={'role': 'doctor'}
+        additional_claims={'role': 'doctor', 'name': f"{doctor.get('first_name', '')} {doctor.get('last_name', '')}".strip()}
     )
     return jsonify(access_token=access_token), 200
 
@@ -94,14 +144,26 @@ def get_all_patient_issues():
     if jwt_data.get("role") != "doctor":
         return jsonify({"error": "Access forbidden: Doctor access required"}), 403
 
-    all_issues = list(issues_collection().find({}))
-    enriched_issues = []
-    for issue in all_issues:
-        patient = patients_collection().find_one({'unique_id': issue.get('user_id')})
-        issue['patient_name'] = f"{patient.get('first_name')} {patient.get('last_name')}" if patient else "Unknown Patient"
-        issue['_id'] = str(issue['_id'])
-        enriched_issues.append(issue)
-    return jsonify(enriched_issues), 200
+    # ?stream=1 -> poori list, cursor se batch-by-batch stream hoti hai
+    paginated = 'limit' in request.args or 'after' in request.args
+    if _wants_stream() or not paginated:
+        try:
+            batch_size = parse_batch_size(request.args.get('batch_size'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        cursor = issues_collection().find({}).sort(sort_spec('created_at'))
+        issues = StreamedArray(cursor, batch_size, transform=_enrich_issues)
+        if not _wants_stream():
+            # Purane clients (bina limit/after) ko pehle jaisi bare list milti hai - bas ab streamed
+            return streaming_json_response(issues)
+        return streaming_json_response({"issues": issues, "next_cursor": None})
+
+    try:
+        all_issues, next_cursor = paginate(issues_collection(), {}, 'created_at',
+                                           limit=request.args.get('limit'), after=request.args.get('after'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"issues": _enrich_issues(all_issues), "next_cursor": next_cursor}), 200
 
 # ---------------------------
 # VIEW A SPECIFIC PATIENT'S FILE
@@ -117,9 +179,33 @@ def get_patient_file(patient_unique_id):
     if not patient_profile:
         return jsonify({"error": "Patient not found"}), 404
 
-    patient_reports = list(reports_collection().find({'user_id': patient_unique_id}, {'_id': 0}))
-    patient_issues = list(issues_collection().find({'user_id': patient_unique_id}, {'_id': 0}))
-    patient_file = {"profile": patient_profile, "reports": patient_reports, "issues": patient_issues}
+    # ?stream=1 -> poori patient file (export), bina pagination ke stream hoti hai
+    if _wants_stream():
+        try:
+            batch_size = parse_batch_size(request.args.get('batch_size'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        reports_cursor = reports_collection().find({'user_id': patient_unique_id}, {'_id': 0}).sort(sort_spec('uploaded_at'))
+        issues_cursor = issues_collection().find({'user_id': patient_unique_id}, {'_id': 0}).sort(sort_spec('created_at'))
+        return streaming_json_response({
+            "profile": patient_profile,
+            "reports": StreamedArray(reports_cursor, batch_size),
+            "issues": StreamedArray(issues_cursor, batch_size)
+        })
+
+    # Reports aur issues alag-alag cursors se paginate hote hain
+    limit = request.args.get('limit')
+    try:
+        patient_reports, reports_next = paginate(reports_collection(), {'user_id': patient_unique_id}, 'uploaded_at',
+                                                 limit=limit, after=request.args.get('reports_after'))
+        patient_issues, issues_next = paginate(issues_collection(), {'user_id': patient_unique_id}, 'created_at',
+                                               limit=limit, after=request.args.get('issues_after'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    patient_file = {
+        "profile": patient_profile, "reports": _drop_ids(patient_reports), "issues": _drop_ids(patient_issues),
+        "reports_next_cursor": reports_next, "issues_next_cursor": issues_next
+    }
     return jsonify(patient_file), 200
 
 # ---------------------------
@@ -141,8 +227,7 @@ def prescribe_for_issue(issue_id):
         return jsonify({"error": "At least one field is required"}), 400
 
     try:
-        if not issues_collection().find_one({'_id': ObjectId(issue_id)}):
-            return jsonify({"error": "Issue not found"}), 404
+        issue_oid = ObjectId(issue_id)
     except Exception:
         return jsonify({"error": "Invalid issue ID format"}), 400
 
@@ -154,18 +239,25 @@ def prescribe_for_issue(issue_id):
         "image_filename": None
     }
     if prescription_image:
-        image_filename = save_file_and_get_name(current_app.config['UPLOAD_FOLDER'], prescription_image)
+        image_filename = current_app.blob_store.save(prescription_image)
         prescription_data["image_filename"] = image_filename
 
-    result = issues_collection().update_one(
-        {'_id': ObjectId(issue_id)},
-        {'$set': {'prescription': prescription_data, 'status': 'Resolved'}}
+    # Ek hi round trip: BEFORE document se purani prescription image ka reference chhod sakte hain
+    previous = issues_collection().find_one_and_update(
+        {'_id': issue_oid},
+        {'$set': {'prescription': prescription_data, 'status': 'Resolved'}},
+        projection={'prescription.image_filename': 1}, return_document=ReturnDocument.BEFORE
     )
 
-    if result.modified_count == 1:
-        return jsonify({"message": "Prescription added successfully"}), 200
-    else:
-        return jsonify({"error": "Failed to add prescription"}), 500
+    if previous is None:
+        if prescription_data["image_filename"]:
+            _remove_upload(prescription_data["image_filename"])
+        return jsonify({"error": "Issue not found"}), 404
+    # Purani prescription ab kisi doc mein nahi hai; same file dobara aayi ho to save ne naya ref liya tha
+    old_image = (previous.get('prescription') or {}).get('image_filename')
+    if old_image:
+        _remove_upload(old_image)
+    return jsonify({"message": "Prescription added successfully"}), 200
 
 # ---------------------------
 # UPLOAD REPORT FOR A PATIENT
@@ -178,14 +270,14 @@ def upload_report_for_patient(patient_unique_id):
         return jsonify({"error": "Access forbidden: Doctor access required"}), 403
 
     current_doctor_id = get_jwt_identity()
-    if not patients_collection().find_one({'unique_id': patient_unique_id}):
+    if not is_active_patient(patients_collection(), patient_unique_id):
         return jsonify({"error": "Patient not found"}), 404
 
     if 'file' not in request.files or request.files['file'].filename == '':
         return jsonify({'error': 'No file selected'}), 400
     
     file = request.files['file']
-    filename = save_file_and_get_name(current_app.config['UPLOAD_FOLDER'], file)
+    filename = current_app.blob_store.save(file)
     report_document = {
         'user_id': patient_unique_id,
         'filename': filename,
@@ -212,7 +304,7 @@ def update_issue_status(issue_id):
     data = request.get_json()
     new_status = data.get('status')
 
-    allowed_statuses = ['Seen', 'Resolved']
+    allowed_statuses = ISSUE_STATUSES
     if not new_status or new_status not in allowed_statuses:
         return jsonify({"error": f"Invalid status. Must be one of: {allowed_statuses}"}), 400
 
@@ -232,3 +324,134 @@ def update_issue_status(issue_id):
     else:
         return jsonify({"message": f"Issue status was already '{new_status}'"}), 200
 
+
+# ---------------------------
+# BULK PRESCRIBE / STATUS UPDATE
+# ---------------------------
+def _bulk_items():
+    """Reads {"items": [...]} from the JSON body; returns (items, error_response)."""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return None, (jsonify({"error": "JSON body must be an object with an items list"}), 400)
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({"error": "items must be a non-empty list"}), 400)
+    if len(items) > BULK_MAX_ITEMS:
+        return None, (jsonify({"error": f"At most {BULK_MAX_ITEMS} items per request"}), 400)
+    return items, None
+
+def _apply_bulk(items, build_update):
+    """
+    Validates every item with `build_update(item) -> (update, error)`, applies the valid
+    ones with one unordered bulk_write and returns per-item results in request order.
+    `update` is an update document, or a list of (extra_filter, update) variants with
+    mutually exclusive filters (at most one of them matches an issue).
+    Only when some updates matched nothing is a single $in query made to tell which issues
+    don't exist (BulkWriteResult has no per-operation counts).
+    """
+    results = [None] * len(items)
+    operations, op_owner, op_items = [], [], []
+    for index, item in enumerate(items):
+        issue_id = item.get('issue_id') if isinstance(item, dict) else None
+        try:
+            issue_oid = ObjectId(issue_id)
+        except Exception:
+            results[index] = {'issue_id': issue_id, 'status': 'error', 'error': 'Invalid issue ID format'}
+            continue
+        update, error = build_update(item)
+        if error:
+            results[index] = {'issue_id': issue_id, 'status': 'error', 'error': error}
+            continue
+        variants = update if isinstance(update, list) else [({}, update)]
+        for extra_filter, variant in variants:
+            operations.append(UpdateOne({'_id': issue_oid, **extra_filter}, variant))
+            op_owner.append(len(op_items))
+        op_items.append((index, issue_id, issue_oid))
+
+    failed = {}
+    matched = modified = 0
+    if operations:
+        try:
+            result = issues_collection().bulk_write(operations, ordered=False)
+            matched, modified = result.matched_count, result.modified_count
+        except BulkWriteError as e:
+            details = e.details
+            matched, modified = details.get('nMatched', 0), details.get('nModified', 0)
+            failed = {op_owner[err['index']]: err.get('errmsg', 'Write failed') for err in details.get('writeErrors', [])}
+
+    existing = None
+    if matched < len(op_items) - len(failed):
+        existing = {doc['_id'] for doc in issues_collection().find(
+            {'_id': {'$in': [oid for _, _, oid in op_items]}}, {'_id': 1})}
+    for item_index, (index, issue_id, issue_oid) in enumerate(op_items):
+        if item_index in failed:
+            results[index] = {'issue_id': issue_id, 'status': 'error', 'error': failed[item_index]}
+        elif existing is not None and issue_oid not in existing:
+            results[index] = {'issue_id': issue_id, 'status': 'not_found', 'error': 'Issue not found'}
+        else:
+            results[index] = {'issue_id': issue_id, 'status': 'ok'}
+
+    summary = {'total': len(items), 'matched': matched, 'modified': modified,
+               'errors': sum(1 for r in results if r['status'] != 'ok')}
+    return jsonify({'results': results, 'summary': summary}), 200
+
+@doctors_bp.route('/issues/bulk-prescribe', methods=['POST'])
+@jwt_required()
+def bulk_prescribe():
+    """
+    Body: {"items": [{"issue_id": ..., "prescription_text": ..., "doctor_notes": ...}, ...]}
+    Image attachments are not supported here; use /issue/<id>/prescribe for those. An image
+    already attached to an issue's prescription is kept.
+    """
+    jwt_data = get_jwt()
+    if jwt_data.get("role") != "doctor":
+        return jsonify({"error": "Access forbidden: Doctor access required"}), 403
+
+    items, error_response = _bulk_items()
+    if error_response:
+        return error_response
+
+    current_doctor_id = get_jwt_identity()
+    prescribed_at = datetime.datetime.now(datetime.UTC)
+
+    def build_update(item):
+        prescription_text = item.get('prescription_text')
+        doctor_notes = item.get('doctor_notes')
+        if not prescription_text and not doctor_notes:
+            return None, "At least one field is required"
+        prescription_data = {
+            "doctor_id": current_doctor_id,
+            "prescribed_at": prescribed_at,
+            "text": prescription_text,
+            "notes": doctor_notes,
+        }
+        # Pehle se prescription ho to uski image (aur uska blob reference) rehne do - sirf
+        # baaki fields dotted $set se; warna (prescription null) poora naya document
+        return [
+            ({'prescription': {'$type': 'object'}},
+             {'$set': {**{f'prescription.{k}': v for k, v in prescription_data.items()}, 'status': 'Resolved'}}),
+            ({'prescription': {'$not': {'$type': 'object'}}},
+             {'$set': {'prescription': {**prescription_data, 'image_filename': None}, 'status': 'Resolved'}}),
+        ], None
+
+    return _apply_bulk(items, build_update)
+
+@doctors_bp.route('/issues/bulk-status', methods=['POST'])
+@jwt_required()
+def bulk_update_status():
+    """Body: {"items": [{"issue_id": ..., "status": "Seen" | "Resolved"}, ...]}"""
+    jwt_data = get_jwt()
+    if jwt_data.get("role") != "doctor":
+        return jsonify({"error": "Access forbidden: Doctor access required"}), 403
+
+    items, error_response = _bulk_items()
+    if error_response:
+        return error_response
+
+    def build_update(item):
+        new_status = item.get('status')
+        if not new_status or new_status not in ISSUE_STATUSES:
+            return None, f"Invalid status. Must be one of: {ISSUE_STATUSES}"
+        return {'$set': {'status': new_status}}, None
+
+    return _apply_bulk(items, build_update)
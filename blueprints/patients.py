@@ -1,9 +1,17 @@
-from flask import Blueprint, request, current_app, jsonify, send_from_directory
+from flask import Blueprint, request, current_app, jsonify
 from werkzeug.utils import secure_filename
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from utils.auth import hash_password, verify_password
-from utils.helpers import free_translate, free_audio_to_text, save_file_and_get_name
-from utils.ai_model import get_ai_response
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from utils.auth import hash_password, verify_password, needs_rehash
+from utils.helpers import free_translate, free_audio_to_text, TRANSCRIPTION_FAILURES
+from utils.ai_model import get_ai_response, stream_ai_response, AIResponseError
+from utils.pagination import paginate
+from utils.rules import PROMPT_RULES
+from utils.streaming import sse_event, sse_response
+from utils.storage import send_upload, stored_filenames
+from utils.identity import patient_claims, remember_patient, forget_patient, is_active_patient
+from utils.uploads import UploadError
 import datetime
 import os
 from bson.objectid import ObjectId
@@ -23,20 +31,9 @@ def reports_collection():
 def issues_collection():
     return current_app.db['issues']
 
-# --- Rule-Based Logic for Hybrid AI ---
-EMERGENCY_SYMPTOMS = [
-    "chest pain", "difficulty breathing", "shortness of breath",
-    "unconscious", "bleeding", "seizure", "heart attack",
-    "stroke", "severe headache", "vision loss", "suicide"
-]
-FEATURE_KEYWORDS = {
-    ("book", "appointment"): "📅 I can help you book a doctor’s appointment. Please share your preferred date and specialty.",
-    ("upload", "report"): "📑 You can upload your medical report. I will securely attach it to your health record.",
-    ("pharmacy", "medicine"): "💊 I can check nearby pharmacies for medicine availability.",
-    ("emergency",): "🚑 For any medical emergency, please contact your nearest hospital immediately.",
-    ("blockchain", "security"): "🔐 Your medical records are secured with advanced technology for privacy and transparency.",
-    ("opd",): "🏥 I can help manage OPD bookings and doctor schedules."
-}
+def _is_active_patient(user_id):
+    # JWT claims + TTL cache; common case mein Mongo tak nahi jaata
+    return is_active_patient(patients_collection(), user_id, get_jwt())
 
 # ---------------------------
 # REGISTRATION
@@ -55,9 +52,6 @@ def register():
     if data.get('otp') != '4444':
         return jsonify({'error':'Invalid OTP'}), 400
 
-    if patients_collection().find_one({'mobile': data['mobile']}):
-        return jsonify({'error':'Mobile already registered'}), 400
-
     patient = {
         'first_name': data['first_name'], 'last_name': data['last_name'],
         'age': int(data['age']), 'dob': data['dob'], 'sex': data['sex'],
@@ -65,7 +59,11 @@ def register():
         'created_at': datetime.datetime.now(datetime.UTC), 'profile': {},
         'unique_id': os.urandom(8).hex()
     }
-    patients_collection().insert_one(patient)
+    # Unique index on mobile (utils/indexes.py) duplicate ko atomically rokta hai - pehle find_one nahi
+    try:
+        patients_collection().insert_one(patient)
+    except DuplicateKeyError:
+        return jsonify({'error':'Mobile already registered'}), 400
     return jsonify({'message':'Registered successfully','unique_id': patient['unique_id']}), 201
 
 # ---------------------------
@@ -76,10 +74,16 @@ def login():
     data = request.get_json() or {}
     if 'mobile' not in data or 'password' not in data:
         return jsonify({'error':'mobile and password required'}), 400
-    user = patients_collection().find_one({'mobile': data['mobile']})
+    user = patients_collection().find_one(
+        {'mobile': data['mobile']}, {'unique_id': 1, 'password_hash': 1, 'first_name': 1, 'last_name': 1}
+    )
     if not user or not verify_password(user.get('password_hash',''), data['password']):
         return jsonify({'error':'Invalid credentials'}), 401
-    access = create_access_token(identity=user['unique_id'])
+    # Purane method/cost wala hash ho to naye parameters se dobara hash karein
+    if needs_rehash(user['password_hash']):
+        patients_collection().update_one({'_id': user['_id']}, {'$set': {'password_hash': hash_password(data['password'])}})
+    access = create_access_token(identity=user['unique_id'], additional_claims=patient_claims(user))
+    remember_patient(user['unique_id'])
     return jsonify({'access_token': access}), 200
 
 # ---------------------------
@@ -99,23 +103,37 @@ def profile_details():
 @jwt_required()
 def profile_update():
     current_user_id = get_jwt_identity()
-    user = patients_collection().find_one({'unique_id': current_user_id})
-    if not user:
+    if not _is_active_patient(current_user_id):
         return jsonify({'error':'User not found'}), 404
 
     data = request.form.to_dict() or {}
-    profile = user.get('profile', {})
-
-    for k in ['blood_group','email','category','father','mother','address']:
-        if k in data:
-            profile[k] = data[k]
+    # Sirf badle hue fields ko dotted $set se likhte hain - pehle poora document fetch nahi karna padta
+    updates = {f'profile.{k}': data[k] for k in ['blood_group','email','category','father','mother','address'] if k in data}
 
     if 'profile_image' in request.files:
         file = request.files['profile_image']
-        filename = save_file_and_get_name(current_app.config['UPLOAD_FOLDER'], file)
-        profile['profile_image'] = filename
+        filename = current_app.blob_store.save(file)
+        updates['profile.profile_image'] = filename
+
+    if updates:
+        # BEFORE document lete hain taaki purani profile image ka reference chhod sakein
+        user = patients_collection().find_one_and_update(
+            {'unique_id': current_user_id}, {'$set': updates},
+            projection={'profile': 1, '_id': 0}, return_document=ReturnDocument.BEFORE
+        )
+    else:
+        user = patients_collection().find_one({'unique_id': current_user_id}, {'profile': 1, '_id': 0})
+    forget_patient(current_user_id)
+    new_image = updates.get('profile.profile_image')
+    if not user:
+        if new_image:
+            current_app.blob_store.release(new_image)
+        return jsonify({'error':'User not found'}), 404
 
-    patients_collection().update_one({'unique_id': current_user_id}, {'$set': {'profile': profile}})
+    profile = user.get('profile') or {}
+    if new_image and profile.get('profile_image'):
+        current_app.blob_store.release(profile['profile_image'])
+    profile.update({key.split('.', 1)[1]: value for key, value in updates.items()})
     return jsonify({'message':'Profile updated', 'profile': profile}), 200
 
 # ---------------------------
@@ -123,10 +141,14 @@ def profile_update():
 # ---------------------------
 @patients_bp.route('/events', methods=['GET'])
 def events():
-    evs = list(events_collection().find({}))
+    try:
+        evs, next_cursor = paginate(events_collection(), {}, limit=request.args.get('limit'),
+                                    after=request.args.get('after'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     for e in evs:
         e['_id'] = str(e.get('_id'))
-    return jsonify({'events': evs}), 200
+    return jsonify({'events': evs, 'next_cursor': next_cursor}), 200
 
 # ---------------------------
 # REPORTS & FILE SERVING
@@ -135,57 +157,222 @@ def events():
 @jwt_required()
 def report_upload():
     current_user_id = get_jwt_identity()
-    if not patients_collection().find_one({'unique_id': current_user_id}):
+    if not _is_active_patient(current_user_id):
         return jsonify({'error':'User not found'}), 404
 
-    if 'file' not in request.files:
+    # Resumable upload (utils/uploads.py) ho to `upload_id`, warna normal multipart file
+    upload_id = request.form.get('upload_id') or (request.get_json(silent=True) or {}).get('upload_id')
+    if upload_id:
+        try:
+            upload = current_app.resumable_uploads.take(upload_id, current_user_id)
+        except UploadError as e:
+            return jsonify({'error': str(e), **e.details}), e.status
+        filename, original_name = upload['filename'], upload['original_name']
+    elif 'file' in request.files:
+        upload = None
+        file = request.files['file']
+        filename, original_name = current_app.blob_store.save(file), file.filename
+    else:
         return jsonify({'error':'No file uploaded'}), 400
-    file = request.files['file']
-    filename = save_file_and_get_name(current_app.config['UPLOAD_FOLDER'], file)
-    reports_collection().insert_one({
-        'user_id': current_user_id,
-        'filename': filename,
-        'original_name': file.filename,
-        'uploaded_at': datetime.datetime.now(datetime.UTC)
-    })
+    try:
+        reports_collection().insert_one({
+            'user_id': current_user_id,
+            'filename': filename,
+            'original_name': original_name,
+            'uploaded_at': datetime.datetime.now(datetime.UTC)
+        })
+    except BaseException:
+        # Report save nahi hua - session wapas rakho taaki client usi upload_id se retry kar sake;
+        # seedha upload hua file ho to uska blob ref chhod do
+        if upload:
+            current_app.resumable_uploads.give_back(upload)
+        else:
+            current_app.blob_store.release(filename)
+        raise
     return jsonify({'message':'Uploaded','filename': filename}), 201
 
 @patients_bp.route('/report/list', methods=['GET'])
 @jwt_required()
 def report_list():
     current_user_id = get_jwt_identity()
-    files = list(reports_collection().find({'user_id': current_user_id}))
+    try:
+        files, next_cursor = paginate(reports_collection(), {'user_id': current_user_id}, 'uploaded_at',
+                                      limit=request.args.get('limit'), after=request.args.get('after'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     for f in files:
         f['_id'] = str(f['_id'])
-    return jsonify({'reports': files}), 200
+    return jsonify({'reports': files, 'next_cursor': next_cursor}), 200
 
 @patients_bp.route('/report/download/<filename>')
 def report_download(filename):
-    uploads_dir = os.path.join(current_app.root_path, current_app.config.get('UPLOAD_FOLDER', 'uploads'))
-    return send_from_directory(uploads_dir, filename, as_attachment=True)
+    return send_upload(current_app.blob_store, filename, as_attachment=True)
 
 @patients_bp.route('/uploads/<path:filename>')
 def serve_uploaded_file(filename):
-    uploads_dir = os.path.join(current_app.root_path, current_app.config.get('UPLOAD_FOLDER', 'uploads'))
-    return send_from_directory(uploads_dir, filename)
+    return send_upload(current_app.blob_store, filename)
+
+# ---------------------------
+# RESUMABLE UPLOADS (utils/uploads.py)
+# ---------------------------
+def _upload_status(session):
+    return {'upload_id': session['_id'], 'size': session['size'], 'received': session['received'],
+            'status': session['status'], 'filename': session.get('filename'),
+            'chunk_size': current_app.resumable_uploads.chunk_size}
+
+@patients_bp.route('/upload-sessions', methods=['POST'])
+@jwt_required()
+def upload_create():
+    current_user_id = get_jwt_identity()
+    if not _is_active_patient(current_user_id):
+        return jsonify({'error': 'User not found'}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        session = current_app.resumable_uploads.create(current_user_id, data.get('filename'), data.get('size'))
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
+    return jsonify(_upload_status(session)), 201
+
+@patients_bp.route('/upload-sessions/<string:upload_id>', methods=['GET'])
+@jwt_required()
+def upload_status(upload_id):
+    try:
+        session = current_app.resumable_uploads.get(upload_id, get_jwt_identity())
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
+    return jsonify(_upload_status(session)), 200
+
+@patients_bp.route('/upload-sessions/<string:upload_id>', methods=['PUT'])
+@jwt_required()
+def upload_chunk(upload_id):
+    # Raw body (form parser nahi) seedha storage mein stream hota hai
+    try:
+        received = current_app.resumable_uploads.append(
+            upload_id, get_jwt_identity(), request.headers.get('Content-Range'), request.stream,
+            sha256=request.headers.get('X-Content-SHA256')
+        )
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
+    return jsonify({'upload_id': upload_id, 'received': received}), 200
+
+@patients_bp.route('/upload-sessions/<string:upload_id>/complete', methods=['POST'])
+@jwt_required()
+def upload_complete(upload_id):
+    try:
+        filename = current_app.resumable_uploads.complete(upload_id, get_jwt_identity())
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
+    return jsonify({'upload_id': upload_id, 'filename': filename}), 200
+
+@patients_bp.route('/upload-sessions/<string:upload_id>', methods=['DELETE'])
+@jwt_required()
+def upload_abort(upload_id):
+    try:
+        current_app.resumable_uploads.abort(upload_id, get_jwt_identity())
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
+    return jsonify({'message': 'Upload aborted'}), 200
 
 # ---------------------------
 # ISSUES
 # ---------------------------
+def _transcribe_issue_audio(issues, store, issue_id, audio_filename, language_code):
+    """
+    Background job: transcribes an issue's audio and updates the issue in place.
+    Runs on a worker thread, so it gets the collection and blob store instead of using current_app.
+    Remote storage backends are downloaded to a temporary file first.
+    """
+    try:
+        with store.local_copy(audio_filename) as audio_path:
+            transcript = free_audio_to_text(audio_path, language_code)
+    except Exception as e:
+        transcript = None
+        error = str(e)
+    else:
+        # free_audio_to_text errors ko sentinel strings ke roop mein lautata hai
+        error = transcript if transcript in TRANSCRIPTION_FAILURES else None
+    if error:
+        print(f"Transcription failed for issue {issue_id}: {error}")
+        issues.update_one({'_id': issue_id}, {'$set': {'transcript_status': 'failed', 'transcript_error': error}})
+        return
+    issues.update_one(
+        {'_id': issue_id},
+        {'$set': {'audio_transcript': transcript, 'transcript_status': 'done'}}
+    )
+
+def requeue_stale_transcriptions(issues, store, job_queue, stale_after: float = 600, max_attempts: int = 3):
+    """
+    Startup sweep: the local job queue is in-process, so transcriptions still 'pending' after
+    a restart are lost. Issues pending (queued) for longer than `stale_after` seconds are
+    resubmitted; ones already queued `max_attempts` times are marked failed.
+    Returns (resubmitted, failed).
+    """
+    now = datetime.datetime.now(datetime.UTC)
+    cutoff = now - datetime.timedelta(seconds=stale_after)
+    stale = {'transcript_status': 'pending', '$or': [
+        {'transcript_queued_at': {'$lte': cutoff}},
+        {'transcript_queued_at': {'$exists': False}, 'created_at': {'$lte': cutoff}},
+    ]}
+    failed = issues.update_many(
+        {**stale, 'transcript_attempts': {'$gte': max_attempts}},
+        {'$set': {'transcript_status': 'failed', 'transcript_error': 'Transcription did not finish'}}
+    ).modified_count
+
+    resubmitted = 0
+    for issue in issues.find(stale, {'_id': 1}):
+        # Conditional claim: kai workers ek saath start hon to bhi ek issue ek hi baar queue hota hai
+        claimed = issues.find_one_and_update(
+            {**stale, '_id': issue['_id']},
+            {'$set': {'transcript_queued_at': now}, '$inc': {'transcript_attempts': 1}},
+            projection={'audio_filename': 1, 'language_code': 1}
+        )
+        if claimed is None or not claimed.get('audio_filename'):
+            continue
+        job_queue.submit(_transcribe_issue_audio, issues, store, claimed['_id'],
+                         claimed['audio_filename'], claimed.get('language_code') or 'en-US')
+        resubmitted += 1
+    return resubmitted, failed
+
+def _take_uploads(user_id, **upload_ids):
+    """
+    Claims completed resumable uploads ({field: upload_id}) for one request and returns
+    {field: upload session}. If any of them fails, the ones already taken are given back.
+    """
+    taken = {}
+    try:
+        for field, upload_id in upload_ids.items():
+            if upload_id:
+                taken[field] = current_app.resumable_uploads.take(upload_id, user_id)
+    except UploadError:
+        _give_back_uploads(taken)
+        raise
+    return taken
+
+def _give_back_uploads(taken):
+    """Returns sessions from `_take_uploads` when the request fails before the issue is saved."""
+    for session in taken.values():
+        current_app.resumable_uploads.give_back(session)
+
 @patients_bp.route('/issue', methods=['POST'])
 @jwt_required()
 def issue_submit():
     current_user_id = get_jwt_identity()
-    if not patients_collection().find_one({'unique_id': current_user_id}):
+    if not _is_active_patient(current_user_id):
         return jsonify({'error': 'User not found'}), 404
 
-    data = request.form.to_dict() or {}
+    data = request.form.to_dict() or request.get_json(silent=True) or {}
     note = data.get('text')
     language_code = data.get('language_code', 'en-US')
     audio_file = request.files.get('audio')
     video_file = request.files.get('video')
 
-    if not note and not audio_file and not video_file:
+    # Badi audio/video resumable upload se aati hai: `audio_upload_id` / `video_upload_id`
+    try:
+        uploads = _take_uploads(current_user_id, audio=data.get('audio_upload_id'), video=data.get('video_upload_id'))
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
+
+    if not note and not audio_file and not video_file and not uploads:
         return jsonify({'error': 'No issue data provided. Please submit text, audio, or video.'}), 400
 
     stored = {
@@ -194,62 +381,145 @@ def issue_submit():
         'status': 'Pending',
         'prescription': None
     }
-    
-    if note:
-        stored['text'] = note
-        stored['translated'] = free_translate(note, target_lang='en')
-        
-    if audio_file:
-        filename = save_file_and_get_name(current_app.config['UPLOAD_FOLDER'], audio_file)
-        stored['audio_filename'] = filename
-        full_audio_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        stored['audio_transcript'] = free_audio_to_text(full_audio_path, language_code)
-        
-    if video_file:
-        filename = save_file_and_get_name(current_app.config['UPLOAD_FOLDER'], video_file)
-        stored['video_filename'] = filename
-        
-    issues_collection().insert_one(stored)
-    return jsonify({'message':'Issue submitted successfully'}), 201
+    # Translate/insert fail ho to uploads wapas do - blob refs leak na hon aur client same upload_id se retry kare.
+    # Seedha multipart se save hue blobs ka koi session nahi hota, unka ref yahin chhodna padta hai.
+    saved = []
+    try:
+        if note:
+            stored['text'] = note
+            stored['translated'] = free_translate(note, target_lang='en')
+
+        if audio_file or 'audio' in uploads:
+            if 'audio' in uploads:
+                filename = uploads['audio']['filename']
+            else:
+                filename = current_app.blob_store.save(audio_file)
+                saved.append(filename)
+            stored['audio_filename'] = filename
+            stored['audio_transcript'] = None
+            stored['transcript_status'] = 'pending'
+            # Restart ke baad sweep (requeue_stale_transcriptions) inhi fields se job dobara banata hai
+            stored['language_code'] = language_code
+            stored['transcript_queued_at'] = stored['created_at']
+            stored['transcript_attempts'] = 1
+
+        if video_file or 'video' in uploads:
+            if 'video' in uploads:
+                filename = uploads['video']['filename']
+            else:
+                filename = current_app.blob_store.save(video_file)
+                saved.append(filename)
+            stored['video_filename'] = filename
+
+        issue_id = issues_collection().insert_one(stored).inserted_id
+    except BaseException:
+        _give_back_uploads(uploads)
+        for filename in saved:
+            current_app.blob_store.release(filename)
+        raise
+
+    # Transcription background worker mein hoti hai; issue turant save ho jaata hai
+    if 'audio_filename' in stored:
+        current_app.job_queue.submit(
+            _transcribe_issue_audio, issues_collection(), current_app.blob_store, issue_id,
+            stored['audio_filename'], language_code
+        )
+    return jsonify({'message':'Issue submitted successfully', 'issue_id': str(issue_id)}), 201
 
 @patients_bp.route('/issue/list', methods=['GET'])
 @jwt_required()
 def issue_list():
     current_user_id = get_jwt_identity()
-    user_issues = list(issues_collection().find({'user_id': current_user_id}))
+    try:
+        user_issues, next_cursor = paginate(issues_collection(), {'user_id': current_user_id}, 'created_at',
+                                            limit=request.args.get('limit'), after=request.args.get('after'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     for issue in user_issues:
         issue['_id'] = str(issue['_id'])
-    return jsonify({'issues': user_issues}), 200
+    return jsonify({'issues': user_issues, 'next_cursor': next_cursor}), 200
 
-@patients_bp.route('/issue/<string:issue_id>', methods=['DELETE'])
+@patients_bp.route('/issue/<string:issue_id>/transcript', methods=['GET'])
 @jwt_required()
-def delete_issue(issue_id):
+def issue_transcript_status(issue_id):
     current_user_id = get_jwt_identity()
     try:
-        issue_to_delete = issues_collection().find_one({'_id': ObjectId(issue_id)})
+        issue = issues_collection().find_one(
+            {'_id': ObjectId(issue_id), 'user_id': current_user_id},
+            {'transcript_status': 1, 'audio_transcript': 1}
+        )
     except Exception:
         return jsonify({"error": "Invalid issue ID format"}), 400
 
-    if not issue_to_delete:
+    if not issue:
         return jsonify({"error": "Issue not found"}), 404
+    if 'transcript_status' not in issue:
+        return jsonify({"error": "Issue has no audio to transcribe"}), 404
 
-    if issue_to_delete.get('user_id') != current_user_id:
-        return jsonify({"error": "Forbidden: You can only delete your own issues."}), 403
+    return jsonify({
+        'issue_id': issue_id,
+        'transcript_status': issue['transcript_status'],
+        'audio_transcript': issue.get('audio_transcript')
+    }), 200
 
-    result = issues_collection().delete_one({'_id': ObjectId(issue_id)})
-    if result.deleted_count == 1:
+@patients_bp.route('/issue/<string:issue_id>', methods=['DELETE'])
+@jwt_required()
+def delete_issue(issue_id):
+    current_user_id = get_jwt_identity()
+    try:
+        issue_oid = ObjectId(issue_id)
+    except Exception:
+        return jsonify({"error": "Invalid issue ID format"}), 400
+
+    # Owner filter ke saath ek hi delete; sirf fail hone par 404/403 ka fark dekhte hain
+    deleted = issues_collection().find_one_and_delete(
+        {'_id': issue_oid, 'user_id': current_user_id},
+        projection={'audio_filename': 1, 'video_filename': 1, 'prescription.image_filename': 1}
+    )
+    if deleted is not None:
+        for filename in stored_filenames(deleted):
+            current_app.blob_store.release(filename)
         return jsonify({"message": "Issue deleted successfully"}), 200
-    else:
-        return jsonify({"error": "Failed to delete issue"}), 500
+
+    if issues_collection().find_one({'_id': issue_oid}, {'_id': 1}):
+        return jsonify({"error": "Forbidden: You can only delete your own issues."}), 403
+    return jsonify({"error": "Issue not found"}), 404
 
 # ---------------------------
 # HYBRID AI CHATBOT
 # ---------------------------
+SYSTEM_PROMPT = (
+    "You are a helpful and empathetic AI medical assistant for a rural healthcare app. "
+    "Your primary goal is to understand the user's health issue and provide safe, preliminary guidance. "
+    "The user might be writing in Hindi, Punjabi, English, or a mix (Hinglish).\n\n"
+    "Provide a response in the SAME language as the user's prompt.\n"
+    "If symptoms sound serious, strongly advise them to see a doctor immediately.\n"
+    "At the end of EVERY response, you MUST include a disclaimer, translated into the user's language."
+)
+
+def _wants_event_stream():
+    """?stream=1 ya `Accept: text/event-stream` -> Server-Sent Events response."""
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', 'text/event-stream']) == 'text/event-stream'
+
+def _ai_prompt_events(user_prompt):
+    """Forwards model tokens as SSE `data` events, then one `done` event with the full answer."""
+    parts = []
+    try:
+        for delta in stream_ai_response(user_prompt, system_instruction=SYSTEM_PROMPT):
+            parts.append(delta)
+            yield sse_event({"delta": delta})
+    except AIResponseError as e:
+        yield sse_event({"error": str(e)}, event='error')
+        return
+    yield sse_event({"response": ''.join(parts)}, event='done')
+
 @patients_bp.route('/prompt', methods=['POST'])
 @jwt_required()
 def handle_ai_prompt():
     current_user_id = get_jwt_identity()
-    if not patients_collection().find_one({'unique_id': current_user_id}):
+    if not _is_active_patient(current_user_id):
         return jsonify({'error': 'User not found'}), 404
 
     data = request.get_json()
@@ -258,28 +528,26 @@ def handle_ai_prompt():
     
     user_prompt = data['prompt']
 
-    try:
-        translated_input = free_translate(user_prompt, target_lang='en').lower()
-    except Exception:
-        translated_input = user_prompt.lower()
-
-    if any(symptom in translated_input for symptom in EMERGENCY_SYMPTOMS):
-        return jsonify({"response": "⚠ These symptoms may be serious. Please consult a doctor immediately or seek emergency care."}), 200
-
-    for keywords, response in FEATURE_KEYWORDS.items():
-        if all(keyword in translated_input for keyword in keywords):
-            return jsonify({"response": response}), 200
-
-    system_prompt = (
-        "You are a helpful and empathetic AI medical assistant for a rural healthcare app. "
-        "Your primary goal is to understand the user's health issue and provide safe, preliminary guidance. "
-        "The user might be writing in Hindi, Punjabi, English, or a mix (Hinglish).\n\n"
-        "Provide a response in the SAME language as the user's prompt.\n"
-        "If symptoms sound serious, strongly advise them to see a doctor immediately.\n"
-        "At the end of EVERY response, you MUST include a disclaimer, translated into the user's language."
-    )
-    
-    ai_result = get_ai_response(user_prompt, system_instruction=system_prompt)
+    # Pehle raw prompt par multilingual rules chalate hain - hit hone par translator call nahi hota
+    rule_response = PROMPT_RULES.match(user_prompt)
+    if rule_response is None:
+        try:
+            translated_input = free_translate(user_prompt, target_lang='en')
+        except Exception:
+            translated_input = user_prompt
+        rule_response = PROMPT_RULES.match(translated_input)
+
+    stream = _wants_event_stream()
+    if rule_response is not None:
+        if stream:
+            # Rule-based jawab ek hi event mein
+            return sse_response([sse_event({"response": rule_response}, event='done')])
+        return jsonify({"response": rule_response}), 200
+
+    if stream:
+        return sse_response(_ai_prompt_events(user_prompt))
+
+    ai_result = get_ai_response(user_prompt, system_instruction=SYSTEM_PROMPT)
 
     if "error" in ai_result:
         return jsonify(ai_result), 500
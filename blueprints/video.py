@@ -1,18 +1,11 @@
-import os
-import requests
-import jwt
 import time
-import uuid
 from flask import Blueprint, request, current_app, jsonify
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from utils.hms import create_room, get_auth_token
 
 video_bp = Blueprint('video', __name__)
 
-# --- CONFIGURATION ---
-HMS_ACCESS_KEY = os.getenv('HMS_ACCESS_KEY')
-HMS_SECRET = os.getenv('HMS_SECRET')
-HMS_TEMPLATE_ID = os.getenv('HMS_TEMPLATE_ID')
-HMS_API_BASE_URL = "https://api.100ms.live/v2"
+# 100ms configuration (HMS_ACCESS_KEY, HMS_SECRET, HMS_TEMPLATE_ID, timeouts/retries) utils/hms.py mein hai
 
 # --- Database Collection Helpers ---
 def patients_collection():
@@ -22,73 +15,17 @@ def doctors_collection():
 
 # --- Helper functions for 100ms API ---
 
-def _get_management_token():
-    """Generates a short-lived JWT to talk to the 100ms Management API."""
-    if not HMS_ACCESS_KEY or not HMS_SECRET:
-        print("DEBUG: HMS_ACCESS_KEY or HMS_SECRET is missing in .env file.")
-        return None
-    
-    payload = {
-        'access_key': HMS_ACCESS_KEY, 'type': 'management', 'version': 2,
-        'jti': str(uuid.uuid4()), 'iat': int(time.time()),
-        'nbf': int(time.time()), 'exp': int(time.time()) + (24 * 3600)
-    }
-    return jwt.encode(payload, HMS_SECRET, algorithm='HS256')
-
 def _create_100ms_room(patient_name):
-    """Creates a new, temporary room on the 100ms server."""
-    management_token = _get_management_token()
-    if not management_token: return None
-        
-    if not HMS_TEMPLATE_ID:
-        print("DEBUG: HMS_TEMPLATE_ID is missing in .env file.")
-        return None
+    """Creates a new, temporary room on the 100ms server (shared pooled session, cached management token)."""
+    return create_room(f"Call with {patient_name} - {time.strftime('%Y-%m-%d %H:%M')}")
 
-    headers = {'Authorization': f'Bearer {management_token}', 'Content-Type': 'application/json'}
-    payload = {
-        'name': f"Call with {patient_name} - {time.strftime('%Y-%m-%d %H:%M')}",
-        'description': 'One-on-one telemedicine call',
-        'template_id': HMS_TEMPLATE_ID
-    }
-    
-    try:
-        res = requests.post(f"{HMS_API_BASE_URL}/rooms", json=payload, headers=headers)
-        if res.status_code != 200:
-            print(f"--- 100ms ERROR (Room Creation) ---\nSTATUS: {res.status_code}\nBODY: {res.text}\n-------------------")
-        res.raise_for_status()
-        return res.json().get('id')
-    except requests.exceptions.RequestException as e:
-        print(f"Error creating 100ms room: {e}")
-        return None
-
-def _get_100ms_auth_token(user_id, room_id, role):
-    """
-    Generates a short-lived Auth Token JWT for a user to join a room directly.
-    This does NOT make an API call, it creates the token locally as per 100ms docs.
-    """
-    if not HMS_ACCESS_KEY or not HMS_SECRET:
-        print("DEBUG: HMS_ACCESS_KEY or HMS_SECRET is missing in .env file.")
-        return None
-
-    payload = {
-        'access_key': HMS_ACCESS_KEY,
-        'room_id': room_id,
-        'user_id': user_id,
-        'role': role,
-        'type': 'app',
-        'version': 2,
-        'jti': str(uuid.uuid4()),
-        'iat': int(time.time()),
-        'nbf': int(time.time()),
-        'exp': int(time.time()) + (24 * 3600)  # 24 hours validity
-    }
-    
-    try:
-        token = jwt.encode(payload, HMS_SECRET, algorithm='HS256')
-        return token
-    except Exception as e:
-        print(f"Error generating 100ms auth token: {e}")
-        return None
+def _claim_room(doctor_id, patient_id, patient_name):
+    """Pre-provisioned room from the pool (one local find_one_and_update); creates one on 100ms only if the pool is empty."""
+    pool = current_app.room_pool
+    if pool.size <= 0:
+        return _create_100ms_room(patient_name)
+    return pool.claim_or_create(f"Call with {patient_name} - {time.strftime('%Y-%m-%d %H:%M')}",
+                                doctor_id=doctor_id, patient_id=patient_id)
 
 # --- Super Easy Endpoints ---
 @video_bp.route('/create-room', methods=['POST'])
@@ -102,16 +39,18 @@ def create_room_and_get_token():
     if not patient_id:
         return jsonify({"error": "patient_id is required"}), 400
 
-    patient = patients_collection().find_one({'unique_id': patient_id})
+    patient = patients_collection().find_one({'unique_id': patient_id}, {'first_name': 1, 'last_name': 1})
     if not patient:
         return jsonify({"error": "Patient not found"}), 404
     patient_name = f"{patient.get('first_name')} {patient.get('last_name')}"
 
-    new_room_id = _create_100ms_room(patient_name)
+    # Same pair ka recent active session ho to wahi room (reconnect par naya room nahi)
+    new_room_id, _ = current_app.call_sessions.start(
+        doctor_id, patient_id, lambda: _claim_room(doctor_id, patient_id, patient_name))
     if not new_room_id:
         return jsonify({"error": "Failed to create video call room. Check server logs."}), 503
 
-    doctor_token = _get_100ms_auth_token(user_id=doctor_id, room_id=new_room_id, role='doctor')
+    doctor_token = get_auth_token(user_id=doctor_id, room_id=new_room_id, role='doctor')
     if not doctor_token:
         return jsonify({"error": "Failed to generate doctor token. Check server logs."}), 503
     
@@ -124,8 +63,11 @@ def get_patient_auth_token():
     room_id = request.get_json().get('room_id')
     if not room_id:
         return jsonify({"error": "room_id is required"}), 400
+    # Sirf wahi room jo kisi doctor ne is patient ke liye start kiya hai (ek indexed lookup)
+    if not current_app.call_sessions.touch_for_patient(room_id, patient_id):
+        return jsonify({"error": "No active call for this room"}), 404
 
-    token = _get_100ms_auth_token(user_id=patient_id, room_id=room_id, role='patient')
+    token = get_auth_token(user_id=patient_id, room_id=room_id, role='patient')
     if not token:
         return jsonify({"error": "100ms service is not configured or failed to generate token."}), 503
         
@@ -11,5 +11,68 @@ class Config:
     )
     # Set a default DB name to use (change 'sih_db' to your preferred DB name)
     MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME', 'sih_db')
+    # Create declared indexes on startup (utils/indexes.py)
+    MONGO_ENSURE_INDEXES = os.environ.get('MONGO_ENSURE_INDEXES', '1') == '1'
+    # Mongo command monitoring (utils/mongo_monitor.py)
+    MONGO_SLOW_QUERY_MS = float(os.environ.get('MONGO_SLOW_QUERY_MS', '100'))
+    MONGO_N_PLUS_ONE_THRESHOLD = int(os.environ.get('MONGO_N_PLUS_ONE_THRESHOLD', '5'))
+    # Unset -> X-Mongo-Query-Count header sirf debug mode mein
+    MONGO_QUERY_COUNT_HEADER = {'1': True, '0': False}.get(os.environ.get('MONGO_QUERY_COUNT_HEADER', ''))
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB (ek request; badi files resumable uploads se)
+    # Request/stage latency metrics at /metrics (utils/metrics.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    # Background jobs (utils/jobs.py) - audio transcription yahan chalti hai
+    JOB_QUEUE_BACKEND = os.environ.get('JOB_QUEUE_BACKEND', 'local')
+    TRANSCRIPTION_WORKERS = int(os.environ.get('TRANSCRIPTION_WORKERS', '2'))
+    # Startup par itne seconds se 'pending' transcriptions dobara queue hoti hain (max attempts ke baad 'failed')
+    TRANSCRIPTION_STALE_AFTER = int(os.environ.get('TRANSCRIPTION_STALE_AFTER', '600'))
+    TRANSCRIPTION_MAX_ATTEMPTS = int(os.environ.get('TRANSCRIPTION_MAX_ATTEMPTS', '3'))
+    # Translation cache (utils/helpers.free_translate)
+    TRANSLATION_CACHE_SIZE = int(os.environ.get('TRANSLATION_CACHE_SIZE', '4096'))
+    TRANSLATION_CACHE_TTL = int(os.environ.get('TRANSLATION_CACHE_TTL', str(6 * 3600)))
+    TRANSLATION_CACHE_SHARED = os.environ.get('TRANSLATION_CACHE_SHARED', '1') == '1'
+    # Password hashing (utils/auth.py): werkzeug method string, e.g. 'scrypt:32768:8:1' ya 'pbkdf2:sha256:600000'.
+    # Purane parameters wale hashes successful login par re-hash ho jaate hain.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    # Hashing process pool ka size (0 = request thread par inline)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 1)))
+    # Active patient ID cache (utils/identity.py) - authenticated routes ka existence check
+    PATIENT_CACHE_SIZE = int(os.environ.get('PATIENT_CACHE_SIZE', '10000'))
+    PATIENT_CACHE_TTL = int(os.environ.get('PATIENT_CACHE_TTL', '300'))
+    # Doctor ID allocation (utils/ids.py) - har process itne IDs ek saath reserve karta hai
+    DOCTOR_ID_BLOCK_SIZE = int(os.environ.get('DOCTOR_ID_BLOCK_SIZE', '20'))
+    # Upload serving (utils/storage.send_upload): 'direct', 'x-accel-redirect' (nginx) ya 'x-sendfile' (Apache/lighttpd)
+    FILE_SERVE_MODE = os.environ.get('FILE_SERVE_MODE', 'direct')
+    # nginx `internal` location jo UPLOAD_FOLDER ko point karti hai (x-accel-redirect mode)
+    FILE_ACCEL_PREFIX = os.environ.get('FILE_ACCEL_PREFIX', '/_protected_uploads/')
+    FILE_CACHE_MAX_AGE = int(os.environ.get('FILE_CACHE_MAX_AGE', str(365 * 24 * 3600)))
+    # Upload storage backend (utils/storage_backends.py): 'local', 'gridfs' ya 's3' (S3-compatible, boto3 chahiye).
+    # gridfs/s3 ke saath UPLOAD_FOLDER sirf upload spool ke liye use hota hai - app nodes stateless rehte hain.
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+    GRIDFS_BUCKET = os.environ.get('GRIDFS_BUCKET', 'uploads')
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')   # MinIO etc.; AWS ke liye khaali
+    S3_REGION = os.environ.get('S3_REGION')
+    S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID')
+    S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY')
+    S3_PREFIX = os.environ.get('S3_PREFIX', '')
+    # Pre-signed download URLs (s3 backend) kitne seconds valid rahein
+    FILE_PRESIGN_TTL = int(os.environ.get('FILE_PRESIGN_TTL', '300'))
+    # Pre-provisioned 100ms rooms (utils/room_pool.py): har template ke liye itne rooms ready (0 = pool band)
+    VIDEO_ROOM_POOL_SIZE = int(os.environ.get('VIDEO_ROOM_POOL_SIZE', '5'))
+    # Comma-separated template IDs; khaali ho to HMS_TEMPLATE_ID
+    VIDEO_ROOM_POOL_TEMPLATES = [t.strip() for t in os.environ.get('VIDEO_ROOM_POOL_TEMPLATES', '').split(',') if t.strip()]
+    # Unclaimed room kitni der pool mein rahe, aur claimed room (ek call) kitni der valid rahe - uske baad disable
+    VIDEO_ROOM_TTL = int(os.environ.get('VIDEO_ROOM_TTL', str(12 * 3600)))
+    VIDEO_CALL_TTL = int(os.environ.get('VIDEO_CALL_TTL', str(3 * 3600)))
+    VIDEO_ROOM_POOL_REFILL_INTERVAL = float(os.environ.get('VIDEO_ROOM_POOL_REFILL_INTERVAL', '30'))
+    # Call sessions (utils/call_sessions.py): same doctor-patient pair ko itne seconds ke andar wahi room dobara milta hai
+    VIDEO_SESSION_REUSE_WINDOW = int(os.environ.get('VIDEO_SESSION_REUSE_WINDOW', str(30 * 60)))
+    # Resumable chunked uploads (utils/uploads.py): client ko suggest kiya gaya chunk size (MAX_CONTENT_LENGTH se chhota),
+    # ek upload ki max size aur adhoore upload session kitni der (last chunk ke baad) zinda rahe
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', str(4 * 1024 * 1024)))
+    UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', str(512 * 1024 * 1024)))
+    UPLOAD_SESSION_TTL = int(os.environ.get('UPLOAD_SESSION_TTL', str(24 * 3600)))
+    # Complete ke beech process mar jaaye to itne seconds baad retry assembly take over kar leta hai
+    UPLOAD_ASSEMBLY_TIMEOUT = int(os.environ.get('UPLOAD_ASSEMBLY_TIMEOUT', str(15 * 60)))
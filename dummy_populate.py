@@ -1,148 +1,311 @@
-from pymongo import MongoClient
-from config import Config
+"""
+Synthetic data generator for the CodeCure database.
+
+Usage:
+    python dummy_populate.py                      # small demo dataset (same scale as before)
+    python dummy_populate.py --patients 1000000 --issues-per-patient 3 --reports-per-patient 1 \
+        --doctors 2000 --events 500 --workers 8 --seed 7
+
+Documents are generated deterministically from --seed and written with batched,
+unordered insert_many calls from a process pool (one MongoClient per worker).
+Indexes are created after the bulk load, which is much faster than indexing while inserting.
+Every generated patient and doctor can log in with --password (default: pass123).
+"""
+import argparse
 import datetime
+import hashlib
 import os
-import uuid
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# This is a placeholder for your actual password hashing function.
-# In a real scenario, you would import this from your utils.auth file.
-def hash_password_placeholder(password):
-    return f"hashed_{password}"
-
-client = MongoClient(Config.MONGO_URI)
-db = client[Config.MONGO_DB_NAME]
-
-print("Clearing old dummy data...")
-# Clear all relevant collections for a clean slate
-db.patients.delete_many({})
-db.events.delete_many({})
-db.reports.delete_many({})
-db.issues.delete_many({})
+from config import Config
+from utils.auth import hash_password
+from utils.db import create_mongo_client
+from utils.ids import BlockIdAllocator
+from utils.indexes import ensure_indexes
 
 # --- Data for Punjabi Names and Addresses ---
-punjabi_male_names = ["Jaspreet", "Gurpreet", "Manpreet", "Harpreet", "Sukhdeep", "Navdeep"]
-punjabi_female_names = ["Jasleen", "Kirandeep", "Simran", "Navjot", "Gurleen", "Priya"]
+punjabi_male_names = ["Jaspreet", "Gurpreet", "Manpreet", "Harpreet", "Sukhdeep", "Navdeep", "Amandeep",
+                      "Harjit", "Kuldeep", "Ravinder", "Baljit", "Gurinder"]
+punjabi_female_names = ["Jasleen", "Kirandeep", "Simran", "Navjot", "Gurleen", "Priya", "Harleen",
+                        "Manjit", "Rupinder", "Sukhpreet", "Amrit", "Parminder"]
+punjabi_surnames = {"M": ["Singh", "Sandhu", "Gill", "Dhillon", "Sidhu", "Brar"],
+                    "F": ["Kaur", "Sandhu", "Gill", "Dhillon", "Sidhu", "Brar"]}
 punjabi_addresses = [
     {"city": "Amritsar", "address": "25, Lawrence Road, Amritsar, Punjab - 143001"},
     {"city": "Ludhiana", "address": "112, Sarabha Nagar, Ludhiana, Punjab - 141001"},
     {"city": "Jalandhar", "address": "45, Model Town, Jalandhar, Punjab - 144003"},
     {"city": "Patiala", "address": "7, Leela Bhawan, Patiala, Punjab - 147001"},
-    {"city": "Mohali", "address": "House No. 345, Phase 7, Mohali, Punjab - 160061"}
+    {"city": "Mohali", "address": "House No. 345, Phase 7, Mohali, Punjab - 160061"},
+    {"city": "Bathinda", "address": "18, Ajit Road, Bathinda, Punjab - 151001"},
+    {"city": "Nabha", "address": "Ward No. 4, Hira Mahal, Nabha, Punjab - 147201"},
 ]
+blood_groups = ["O+", "O-", "A+", "A-", "B+", "B-", "AB+", "AB-"]
+categories = ["General", "OBC", "SC", "ST"]
+specializations = ["General Medicine", "Pediatrics", "Gynecology", "Orthopedics", "Dermatology", "ENT",
+                   "Ophthalmology", "Cardiology"]
+branches = ["Main", "Nabha Civil Hospital", "Rural Camp", "Tele-OPD"]
 
-# ---------------------------
-# 1. CREATE DUMMY PATIENTS
-# ---------------------------
-# We create two patients for better data diversity.
-# Patient 1: Male
-male_name = random.choice(punjabi_male_names)
-male_address = random.choice(punjabi_addresses)
-patient_1_id = os.urandom(8).hex()
-patient_1_mobile = "9876543210"
-
-db.patients.insert_one({
-    'first_name': male_name,
-    'last_name': 'Singh',
-    'age': 35,
-    'dob': '1990-07-15',
-    'sex': 'M',
-    'mobile': patient_1_mobile,
-    'password_hash': hash_password_placeholder('pass123'),
-    'created_at': datetime.datetime.utcnow(),
-    'profile': {
-        'blood_group': 'O+',
-        'email': f'{male_name.lower()}.singh@example.com',
-        'category': 'General',
-        'father': 'Balwinder Singh',
-        'mother': 'Harjeet Kaur',
-        'address': male_address['address']
-    },
-    'unique_id': patient_1_id
-})
-print(f"Created dummy patient: {male_name} Singh with user_id: {patient_1_id}")
-
-# Patient 2: Female
-female_name = random.choice(punjabi_female_names)
-female_address = random.choice(punjabi_addresses)
-patient_2_id = os.urandom(8).hex()
-patient_2_mobile = "9876543211"
-
-db.patients.insert_one({
-    'first_name': female_name,
-    'last_name': 'Kaur',
-    'age': 28,
-    'dob': '1997-02-20',
-    'sex': 'F',
-    'mobile': patient_2_mobile,
-    'password_hash': hash_password_placeholder('pass456'),
-    'created_at': datetime.datetime.utcnow(),
-    'profile': {
-        'blood_group': 'B+',
-        'email': f'{female_name.lower()}.kaur@example.com',
-        'category': 'OBC',
-        'father': 'Sukhdev Singh',
-        'mother': 'Manjit Kaur',
-        'address': female_address['address']
-    },
-    'unique_id': patient_2_id
-})
-print(f"Created dummy patient: {female_name} Kaur with user_id: {patient_2_id}")
+# --- Multilingual issue text: (original text, English translation) ---
+issue_texts = [
+    ("ਮੈਨੂੰ ਖੰਘ ਅਤੇ ਛਾਤੀ ਵਿੱਚ ਦਰਦ ਹੈ।", "I have a cough and chest pain."),
+    ("ਮੈਨੂੰ ਦੋ ਦਿਨਾਂ ਤੋਂ ਬੁਖਾਰ ਹੈ।", "I have had a fever for two days."),
+    ("ਮੇਰੇ ਬੱਚੇ ਦੇ ਪੇਟ ਵਿੱਚ ਦਰਦ ਹੈ।", "My child has a stomach ache."),
+    ("ਮੇਰੀਆਂ ਅੱਖਾਂ ਵਿੱਚ ਜਲਨ ਹੁੰਦੀ ਹੈ।", "My eyes are burning."),
+    ("मुझे तीन दिन से तेज बुखार है।", "I have had a high fever for three days."),
+    ("मेरे घुटनों में बहुत दर्द रहता है।", "My knees hurt a lot."),
+    ("मुझे चक्कर आ रहे हैं और कमजोरी है।", "I feel dizzy and weak."),
+    ("बच्चे को दस्त और उल्टी हो रही है।", "The child has diarrhoea and vomiting."),
+    ("mujhe kal se sir dard aur zukaam hai", "I have had a headache and a cold since yesterday."),
+    ("pet mein jalan ho rahi hai khana khane ke baad", "My stomach burns after eating."),
+    ("meri maa ka BP bahut high rehta hai", "My mother's blood pressure stays very high."),
+    ("skin pe kharish aur laal daane ho gaye hain", "I have itching and red rashes on my skin."),
+    ("I have a sore throat and mild fever.", "I have a sore throat and mild fever."),
+    ("My back has been hurting for a week.", "My back has been hurting for a week."),
+    ("I need a refill for my diabetes medicine.", "I need a refill for my diabetes medicine."),
+    ("Persistent cough at night, no fever.", "Persistent cough at night, no fever."),
+]
+audio_transcripts = [
+    "For two days, I have had a high fever and body aches.",
+    "Mujhe saans lene mein thodi takleef ho rahi hai.",
+    "ਮੇਰੇ ਸਿਰ ਵਿੱਚ ਬਹੁਤ ਦਰਦ ਹੈ।",
+    "मेरे पैर में सूजन है।",
+]
+prescriptions = [
+    ("Take Paracetamol 500mg twice a day.", "Follow up in 3 days."),
+    ("ORS after every loose stool, Zinc 20mg for 14 days.", "Come back if vomiting continues."),
+    ("Cetirizine 10mg at night for 5 days.", "Avoid dust exposure."),
+    ("Pantoprazole 40mg before breakfast.", "Avoid spicy food."),
+]
+report_names = ["blood_test_report.pdf", "chest_xray.png", "cbc_report.pdf", "lipid_profile.pdf",
+                "ultrasound_abdomen.jpg", "ecg.pdf", "urine_routine.pdf"]
+event_titles = [
+    ("Free Health Camp", "Complete health checkup by certified doctors."),
+    ("Eye Checkup Drive", "Free eye examinations and spectacle distribution."),
+    ("Blood Donation Camp", "Donate blood and save a life. Refreshments will be provided."),
+    ("Polio Vaccination Drive", "Oral polio drops for all children under five."),
+    ("Diabetes Screening", "Free blood sugar testing and diet counselling."),
+    ("Women's Health Camp", "Consultations with gynecologists and free anaemia screening."),
+]
 
+# Status distribution of issues (Pending ~50%, Seen ~30%, Resolved ~20%)
+ISSUE_STATUSES = ["Pending", "Seen", "Resolved"]
+ISSUE_STATUS_WEIGHTS = [50, 30, 20]
+HISTORY_DAYS = 365
 
 # ---------------------------
-# 2. DUMMY EVENTS
+# DOCUMENT BUILDERS
 # ---------------------------
-events = [
-    {"title": "Free Health Camp", "date": "2025-09-22", "location": random.choice(punjabi_addresses)['city'], "description": "Complete health checkup by certified doctors."},
-    {"title": "Eye Checkup Drive", "date": "2025-10-05", "location": random.choice(punjabi_addresses)['city'], "description": "Free eye examinations and spectacle distribution."},
-    {"title": "Blood Donation Camp", "date": "2025-10-18", "location": random.choice(punjabi_addresses)['city'], "description": "Donate blood and save a life. Refreshments will be provided."},
-]
-db.events.insert_many(events)
+def _unique_id(seed: int, index: int) -> str:
+    """Deterministic 16-hex-char patient unique_id (same format as os.urandom(8).hex())."""
+    return hashlib.blake2b(f"{seed}:{index}".encode(), digest_size=8).hexdigest()
+
+def _mobile(index: int) -> str:
+    return f"9{index:09d}"
+
+def _random_time(rng: random.Random, now: datetime.datetime) -> datetime.datetime:
+    return now - datetime.timedelta(seconds=rng.randint(0, HISTORY_DAYS * 24 * 3600))
+
+def build_patient(rng, seed, index, password_hash, now):
+    sex = rng.choice("MF")
+    first_name = rng.choice(punjabi_male_names if sex == "M" else punjabi_female_names)
+    last_name = rng.choice(punjabi_surnames[sex])
+    age = rng.randint(1, 90)
+    return {
+        'first_name': first_name,
+        'last_name': last_name,
+        'age': age,
+        'dob': f"{now.year - age}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        'sex': sex,
+        'mobile': _mobile(index),
+        'password_hash': password_hash,
+        'created_at': _random_time(rng, now),
+        'profile': {
+            'blood_group': rng.choice(blood_groups),
+            'email': f"{first_name.lower()}.{last_name.lower()}{index}@example.com",
+            'category': rng.choice(categories),
+            'father': f"{rng.choice(punjabi_male_names)} Singh",
+            'mother': f"{rng.choice(punjabi_female_names)} Kaur",
+            'address': rng.choice(punjabi_addresses)['address'],
+        },
+        'unique_id': _unique_id(seed, index),
+    }
+
+def build_issue(rng, patient, doctor_ids, now):
+    status = rng.choices(ISSUE_STATUSES, weights=ISSUE_STATUS_WEIGHTS)[0]
+    created_at = max(patient['created_at'], _random_time(rng, now))
+    issue = {
+        'user_id': patient['unique_id'],
+        'created_at': created_at,
+        'status': status,
+        'prescription': None,
+    }
+    kind = rng.random()
+    if kind < 0.75:
+        issue['text'], issue['translated'] = rng.choice(issue_texts)
+    else:
+        issue['audio_filename'] = f"{rng.getrandbits(128):032x}.webm"
+        issue['audio_transcript'] = rng.choice(audio_transcripts)
+        issue['transcript_status'] = 'done'
+    if rng.random() < 0.05:
+        issue['video_filename'] = f"{rng.getrandbits(128):032x}.mp4"
+    if status == 'Resolved' and doctor_ids:
+        text, notes = rng.choice(prescriptions)
+        issue['prescription'] = {
+            'doctor_id': rng.choice(doctor_ids),
+            'prescribed_at': created_at + datetime.timedelta(hours=rng.randint(1, 72)),
+            'text': text, 'notes': notes, 'image_filename': None,
+        }
+    return issue
+
+def build_report(rng, patient, doctor_ids, now):
+    name = rng.choice(report_names)
+    report = {
+        'user_id': patient['unique_id'],
+        'filename': f"{rng.getrandbits(128):032x}{os.path.splitext(name)[1]}",
+        'original_name': name,
+        'uploaded_at': max(patient['created_at'], _random_time(rng, now)),
+    }
+    if doctor_ids and rng.random() < 0.3:
+        report['uploaded_by'] = {'type': 'doctor', 'doctor_id': rng.choice(doctor_ids)}
+    return report
+
+def build_doctor(rng, doctor_id, password_hash, now):
+    return {
+        "doctor_id": doctor_id,
+        "first_name": rng.choice(punjabi_male_names + punjabi_female_names),
+        "last_name": rng.choice(punjabi_surnames["M"]),
+        "password_hash": password_hash,
+        "specialization": rng.choice(specializations),
+        "branch": rng.choice(branches),
+        "approved_status": rng.random() < 0.9,
+        "registered_at": _random_time(rng, now),
+    }
+
+def build_event(rng, now):
+    title, description = rng.choice(event_titles)
+    date = now + datetime.timedelta(days=rng.randint(-60, 120))
+    return {"title": title, "date": date.strftime("%Y-%m-%d"),
+            "location": rng.choice(punjabi_addresses)['city'], "description": description}
 
 # ---------------------------
-# 3. DUMMY REPORTS
+# WORKER (runs in a child process)
 # ---------------------------
-reports = [
-    {
-        'user_id': patient_1_id,
-        'mobile': patient_1_mobile,
-        'filename': f'{uuid.uuid4().hex}.pdf',
-        'original_name': 'blood_test_report.pdf',
-        'uploaded_at': datetime.datetime.utcnow()
-    },
-    {
-        'user_id': patient_2_id,
-        'mobile': patient_2_mobile,
-        'filename': f'{uuid.uuid4().hex}.png',
-        'original_name': 'chest_xray.png',
-        'uploaded_at': datetime.datetime.utcnow()
-    },
-]
-db.reports.insert_many(reports)
+def _flush(collection, buffer, counts, name):
+    if buffer:
+        collection.insert_many(buffer, ordered=False)
+        counts[name] += len(buffer)
+        buffer.clear()
+
+def populate_patient_range(uri, db_name, seed, start, stop, issues_per_patient, reports_per_patient,
+                           doctor_ids, password_hash, batch_size, now):
+    """Generates and inserts patients [start, stop) with their issues and reports."""
+    client = create_mongo_client(uri)
+    db = client[db_name]
+    rng = random.Random(f"{seed}:{start}")
+    counts = {'patients': 0, 'issues': 0, 'reports': 0}
+    patients, issues, reports = [], [], []
+    try:
+        for index in range(start, stop):
+            patient = build_patient(rng, seed, index, password_hash, now)
+            patients.append(patient)
+            for _ in range(issues_per_patient):
+                issues.append(build_issue(rng, patient, doctor_ids, now))
+            for _ in range(reports_per_patient):
+                reports.append(build_report(rng, patient, doctor_ids, now))
+            if len(patients) >= batch_size:
+                _flush(db.patients, patients, counts, 'patients')
+            if len(issues) >= batch_size:
+                _flush(db.issues, issues, counts, 'issues')
+            if len(reports) >= batch_size:
+                _flush(db.reports, reports, counts, 'reports')
+        _flush(db.patients, patients, counts, 'patients')
+        _flush(db.issues, issues, counts, 'issues')
+        _flush(db.reports, reports, counts, 'reports')
+    finally:
+        client.close()
+    return counts
 
 # ---------------------------
-# 4. DUMMY ISSUES
+# MAIN
 # ---------------------------
-issues = [
-    # A text-based issue in Punjabi from Patient 2
-    {
-        'user_id': patient_2_id,
-        'mobile': patient_2_mobile,
-        'created_at': datetime.datetime.utcnow(),
-        'text': "ਮੈਨੂੰ ਖੰਘ ਅਤੇ ਛਾਤੀ ਵਿੱਚ ਦਰਦ ਹੈ।", # "I have a cough and chest pain."
-        'translated': "[translated to en] I have a cough and chest pain."
-    },
-    # An audio-based issue from Patient 1
-    {
-        'user_id': patient_1_id,
-        'mobile': patient_1_mobile,
-        'created_at': datetime.datetime.utcnow(),
-        'audio_filename': 'dummy_fever_audio.wav',
-        'audio_transcript': "[transcribed audio text] For two days, I have had a high fever and body aches."
-    },
-]
-db.issues.insert_many(issues)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--patients', type=int, default=2)
+    parser.add_argument('--doctors', type=int, default=2)
+    parser.add_argument('--issues-per-patient', type=int, default=1)
+    parser.add_argument('--reports-per-patient', type=int, default=1)
+    parser.add_argument('--events', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=5000, help='Documents per insert_many call.')
+    parser.add_argument('--chunk-size', type=int, default=20000, help='Patients per worker task.')
+    parser.add_argument('--password', default='pass123', help='Login password for all generated users.')
+    parser.add_argument('--mongo-uri', default=Config.MONGO_URI)
+    parser.add_argument('--db', default=Config.MONGO_DB_NAME)
+    parser.add_argument('--keep-existing', action='store_true', help='Do not clear the collections first.')
+    parser.add_argument('--skip-indexes', action='store_true', help='Do not create indexes after loading.')
+    args = parser.parse_args(argv)
+
+    client = create_mongo_client(args.mongo_uri)
+    db = client[args.db]
+    rng = random.Random(args.seed)
+    now = datetime.datetime.now(datetime.UTC)
+    started = time.perf_counter()
+
+    if not args.keep_existing:
+        print("Clearing old dummy data...")
+        # Clear all relevant collections for a clean slate
+        for name in ('patients', 'doctors', 'events', 'reports', 'issues', 'counters'):
+            db[name].drop()
+
+    # Ek hi hash sab users ke liye - har document ke liye hash karna bahut slow hoga
+    password_hash = hash_password(args.password)
+
+    # Doctors aur events chhote hain - main process mein hi ban jaate hain
+    # Doctor IDs app wale allocator se hi (counters collection), taaki baad ki registrations collide na karein
+    id_allocator = BlockIdAllocator(db.counters, 'doctor_id', prefix='D-', block_size=max(1, args.doctors))
+    doctors = [build_doctor(rng, id_allocator.next_id(), password_hash, now) for _ in range(args.doctors)]
+    for i in range(0, len(doctors), args.batch_size):
+        db.doctors.insert_many(doctors[i:i + args.batch_size], ordered=False)
+    doctor_ids = [d['doctor_id'] for d in doctors]
+    events = [build_event(rng, now) for _ in range(args.events)]
+    if events:
+        db.events.insert_many(events, ordered=False)
+
+    totals = {'patients': 0, 'issues': 0, 'reports': 0}
+    chunks = [(start, min(start + args.chunk_size, args.patients))
+              for start in range(0, args.patients, args.chunk_size)]
+    task_args = (args.mongo_uri, args.db, args.seed)
+    task_tail = (args.issues_per_patient, args.reports_per_patient, doctor_ids, password_hash, args.batch_size, now)
+    if args.workers <= 1 or len(chunks) <= 1:
+        for start, stop in chunks:
+            for k, v in populate_patient_range(*task_args, start, stop, *task_tail).items():
+                totals[k] += v
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(populate_patient_range, *task_args, start, stop, *task_tail)
+                       for start, stop in chunks]
+            for done, future in enumerate(as_completed(futures), 1):
+                for k, v in future.result().items():
+                    totals[k] += v
+                print(f"  {done}/{len(futures)} chunks, {totals['patients']} patients, "
+                      f"{totals['issues']} issues, {totals['reports']} reports")
+
+    loaded = time.perf_counter()
+    if not args.skip_indexes:
+        print("Creating indexes...")
+        ensure_indexes(db)
 
-print("✅ Dummy patient data with Punjabi names/addresses inserted into", Config.MONGO_DB_NAME)
+    elapsed = time.perf_counter() - started
+    total_docs = sum(totals.values()) + len(doctors) + len(events)
+    print(f"✅ Inserted {totals['patients']} patients, {len(doctors)} doctors, {totals['issues']} issues, "
+          f"{totals['reports']} reports and {len(events)} events into {args.db} "
+          f"({total_docs / max(loaded - started, 1e-9):,.0f} docs/s load, {elapsed:.1f}s total)")
+    if doctors:
+        print(f"Sample logins: patient mobile {_mobile(0)}, doctor {doctor_ids[0]}, password '{args.password}'")
+    client.close()
 
+if __name__ == '__main__':
+    main()
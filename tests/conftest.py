@@ -1,7 +1,9 @@
 import sys
 import os
+import threading
 import pytest
 from dotenv import load_dotenv
+from pymongo import monitoring
 
 # --- YEH LINE ADD KI GAYI HAI (THIS IS THE FIX) ---
 # .env file se saari keys ko load karta hai, taaki tests unhein istemaal kar sakein
@@ -14,3 +16,70 @@ def add_project_root_to_path():
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
 
+# --- In-process app fixtures ---
+
+class CommandCounter(monitoring.CommandListener):
+    """Records every Mongo command started by clients created after registration."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands = []
+
+    def started(self, event):
+        with self._lock:
+            collection = event.command.get(event.command_name)
+            self.commands.append((event.command_name, collection if isinstance(collection, str) else None))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self):
+        with self._lock:
+            self.commands = []
+
+    def count(self, command_name, collection=None):
+        with self._lock:
+            return sum(1 for name, coll in self.commands
+                       if name == command_name and (collection is None or coll == collection))
+
+@pytest.fixture(scope="session")
+def command_listener():
+    """A global command listener; must be registered before the app's MongoClient is created."""
+    counter = CommandCounter()
+    monitoring.register(counter)
+    return counter
+
+def uses_real_mongo() -> bool:
+    return bool(os.environ.get('TEST_MONGO_URI'))
+
+@pytest.fixture(scope="session")
+def app(command_listener, tmp_path_factory):
+    """
+    Builds the Flask app in-process via the app factory. Uploads go to a temp folder.
+    Mongo: TEST_MONGO_URI + TEST_MONGO_DB_NAME (default 'codecure_test') if set, warna in-memory
+    mongomock - config.py ka MONGO_URI (production) kabhi use nahi hota.
+    """
+    from app import create_app
+    overrides = {'TESTING': True, 'UPLOAD_FOLDER': str(tmp_path_factory.mktemp('uploads')),
+                 'PASSWORD_HASH_WORKERS': 0}
+    if uses_real_mongo():
+        overrides.update({'MONGO_URI': os.environ['TEST_MONGO_URI'],
+                          'MONGO_DB_NAME': os.environ.get('TEST_MONGO_DB_NAME', 'codecure_test')})
+        flask_app = create_app(overrides)
+    else:
+        import mongomock
+        flask_app = create_app(overrides, mongo_client=mongomock.MongoClient())
+    return flask_app
+
+@pytest.fixture
+def command_counter(app, command_listener):
+    """Mongo command counts; mongomock emits no command events, so these tests need TEST_MONGO_URI."""
+    if not uses_real_mongo():
+        pytest.skip('Mongo command counting needs a real mongod (set TEST_MONGO_URI)')
+    return command_listener
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
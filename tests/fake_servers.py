@@ -0,0 +1,296 @@
+"""
+Local stand-ins for external HTTP APIs, so tests and benchmarks run without network access.
+Each server runs on 127.0.0.1 on a free port in a background thread.
+"""
+import hashlib
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _FakeServer:
+    handler_class = None
+
+    def __init__(self):
+        self.requests = []          # (method, path, body) for every request
+        self.client_ports = []      # source port per request (same port = reused connection)
+        self.delay = 0.0            # seconds to sleep before answering
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self.handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def record(self, method, path, body, client_address):
+        with self._lock:
+            self.requests.append((method, path, body))
+            self.client_ports.append(client_address[1])
+
+    def reset(self):
+        with self._lock:
+            self.requests = []
+            self.client_ports = []
+        self.delay = 0.0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive, so connection reuse is observable
+    # Headers aur body alag writes mein jaate hain; Nagle + delayed ACK keep-alive par ~40ms jodta hai
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        return json.loads(raw) if raw else {}
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _OpenAIHandler(_JSONHandler):
+    def do_POST(self):
+        fake = self.server.fake
+        body = self._read_json()
+        fake.record('POST', self.path, body, self.client_address)
+        if fake.delay:
+            time.sleep(fake.delay)
+        if not self.path.endswith('/chat/completions'):
+            return self._send_json(404, {'error': {'message': 'not found'}})
+
+        prompt = body['messages'][-1]['content']
+        answer = f"Fake answer to: {prompt}"
+        if body.get('stream'):
+            return self._send_stream(body, answer.split(' '))
+        self._send_json(200, {
+            'id': f"chatcmpl-{len(fake.requests)}", 'object': 'chat.completion', 'created': int(time.time()),
+            'model': body.get('model'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': answer}}],
+            'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+        })
+
+
+    def _send_stream(self, body, words):
+        """Sends the answer word by word as chat.completion.chunk SSE events."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        for i, word in enumerate(words):
+            chunk = {
+                'id': 'chatcmpl-stream', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                'model': body.get('model'),
+                'choices': [{'index': 0, 'finish_reason': None,
+                             'delta': {'content': word if i == 0 else ' ' + word}}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            if self.server.fake.chunk_delay:
+                time.sleep(self.server.fake.chunk_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+class FakeOpenAIServer(_FakeServer):
+    """
+    Answers POST /v1/chat/completions with "Fake answer to: <last user message>".
+    With "stream": true the answer is sent word by word, `chunk_delay` seconds apart.
+    """
+    def __init__(self):
+        super().__init__()
+        self.chunk_delay = 0.0
+
+    def reset(self):
+        super().reset()
+        self.chunk_delay = 0.0
+    handler_class = _OpenAIHandler
+
+
+class _HMSHandler(_JSONHandler):
+    def do_POST(self):
+        fake = self.server.fake
+        body = self._read_json()
+        fake.record('POST', self.path, body, self.client_address)
+        with fake._lock:
+            fake.auth_headers.append(self.headers.get('Authorization'))
+            failing = fake.fail_next > 0
+            if failing:
+                fake.fail_next -= 1
+        if fake.delay:
+            time.sleep(fake.delay)
+        if failing:
+            return self._send_json(503, {'message': 'temporarily unavailable'})
+        if self.path.startswith('/v2/rooms/'):
+            room_id = self.path.rsplit('/', 1)[1]
+            with fake._lock:
+                fake.room_updates.append((room_id, body))
+            return self._send_json(200, {'id': room_id, 'enabled': body.get('enabled', True)})
+        if self.path != '/v2/rooms':
+            return self._send_json(404, {'message': 'not found'})
+        with fake._lock:
+            fake.rooms_created += 1
+            room_id = f"room-{fake.rooms_created:04d}"
+        self._send_json(200, {'id': room_id, 'name': body.get('name'), 'template_id': body.get('template_id'),
+                              'enabled': True})
+
+
+class FakeHMSServer(_FakeServer):
+    """
+    Minimal 100ms Management API: POST /v2/rooms returns {"id": "room-NNNN", ...};
+    POST /v2/rooms/<id> (enable/disable) is recorded in `room_updates`.
+    `delay` simulates network latency, `fail_next` makes the next N requests answer 503.
+    """
+    handler_class = _HMSHandler
+
+    def __init__(self):
+        super().__init__()
+        self.auth_headers = []
+        self.room_updates = []
+        self.fail_next = 0
+        self.rooms_created = 0
+
+    def reset(self):
+        super().reset()
+        with self._lock:
+            self.auth_headers = []
+            self.room_updates = []
+            self.fail_next = 0
+
+    @property
+    def api_url(self):
+        return f"{self.url}/v2"
+
+
+class _S3Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _target(self):
+        path, _, query = self.path.partition('?')
+        bucket, _, key = path.lstrip('/').partition('/')
+        params = dict(part.partition('=')[::2] for part in query.split('&') if part)
+        return bucket, urllib.parse.unquote(key), params
+
+    def _read_body(self) -> bytes:
+        raw = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if 'aws-chunked' not in (self.headers.get('Content-Encoding') or ''):
+            return raw
+        # aws-chunked: "<hex size>[;chunk-signature=...]\r\n<data>\r\n" ... "0\r\n<trailers>"
+        body, pos = b'', 0
+        while True:
+            line_end = raw.index(b'\r\n', pos)
+            size = int(raw[pos:line_end].split(b';')[0], 16)
+            if size == 0:
+                return body
+            body += raw[line_end + 2:line_end + 2 + size]
+            pos = line_end + 2 + size + 2
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _not_found(self):
+        self._send(404, b'<?xml version="1.0" encoding="UTF-8"?><Error><Code>NoSuchKey</Code></Error>',
+                   {'Content-Type': 'application/xml'})
+
+    def do_PUT(self):
+        fake = self.server.fake
+        bucket, key, params = self._target()
+        body = self._read_body()
+        fake.record('PUT', self.path, len(body), self.client_address)
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        with fake._lock:
+            if 'uploadId' in params:
+                fake.multipart[params['uploadId']][int(params['partNumber'])] = body
+            else:
+                fake.objects[(bucket, key)] = body
+        self._send(200, headers={'ETag': etag})
+
+    def do_POST(self):
+        fake = self.server.fake
+        bucket, key, params = self._target()
+        self._read_body()
+        fake.record('POST', self.path, None, self.client_address)
+        with fake._lock:
+            if 'uploads' in params:
+                upload_id = f"upload-{len(fake.multipart) + 1}"
+                fake.multipart[upload_id] = {}
+                xml = (f'<InitiateMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key>'
+                       f'<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>')
+            else:
+                parts = fake.multipart.pop(params['uploadId'])
+                fake.objects[(bucket, key)] = b''.join(parts[n] for n in sorted(parts))
+                xml = (f'<CompleteMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key>'
+                       f'<ETag>"multipart"</ETag></CompleteMultipartUploadResult>')
+        self._send(200, ('<?xml version="1.0" encoding="UTF-8"?>' + xml).encode(), {'Content-Type': 'application/xml'})
+
+    def do_GET(self):
+        fake = self.server.fake
+        bucket, key, params = self._target()
+        fake.record(self.command, self.path, None, self.client_address)
+        body = fake.objects.get((bucket, key))
+        if body is None:
+            return self._not_found()
+        content_type = urllib.parse.unquote(params.get('response-content-type', 'binary/octet-stream'))
+        self._send(200, body, {'Content-Type': content_type, 'ETag': f'"{hashlib.md5(body).hexdigest()}"'})
+
+    do_HEAD = do_GET
+
+    def do_DELETE(self):
+        fake = self.server.fake
+        bucket, key, _ = self._target()
+        fake.record('DELETE', self.path, None, self.client_address)
+        with fake._lock:
+            fake.objects.pop((bucket, key), None)
+        self._send(204)
+
+
+class FakeS3Server(_FakeServer):
+    """
+    MinIO-style S3 stand-in (path-style URLs, signatures not checked): PUT/GET/HEAD/DELETE
+    objects and multipart uploads. Objects live in `objects[(bucket, key)]`.
+    """
+    handler_class = _S3Handler
+
+    def __init__(self):
+        super().__init__()
+        self.objects = {}
+        self.multipart = {}
+
+    def reset(self):
+        super().reset()
+        with self._lock:
+            self.objects = {}
+            self.multipart = {}
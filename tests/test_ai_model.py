@@ -0,0 +1,105 @@
+import time
+import pytest
+from utils import ai_model
+from tests.fake_servers import FakeOpenAIServer
+
+SYSTEM = "You are a test assistant."
+
+@pytest.fixture(scope="module")
+def fake_openai():
+    server = FakeOpenAIServer().start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def ai_env(fake_openai, monkeypatch):
+    """Points the shared OpenAI client at the local fake server."""
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    monkeypatch.setenv('OPENAI_BASE_URL', f"{fake_openai.url}/v1")
+    monkeypatch.setenv('OPENAI_MAX_RETRIES', '0')
+    monkeypatch.setenv('OPENAI_READ_TIMEOUT', '2')
+    fake_openai.reset()
+    ai_model.reset_ai_client()
+    yield fake_openai
+    ai_model.reset_ai_client()
+
+def test_client_is_reused_across_calls(ai_env):
+    """Every call goes through one pooled client and one keep-alive connection."""
+    first = ai_model.get_ai_response("first question", SYSTEM)
+    second = ai_model.get_ai_response("second question", SYSTEM)
+    assert first == {"response": "Fake answer to: first question"}
+    assert second == {"response": "Fake answer to: second question"}
+    assert ai_model.get_ai_client() is ai_model.get_ai_client()
+    assert len(ai_env.requests) == 2
+    assert len(set(ai_env.client_ports)) == 1
+
+def test_identical_prompts_are_cached(ai_env):
+    """Same system instruction + normalized prompt costs one model call."""
+    ai_model.get_ai_response("What helps a  common cold?", SYSTEM)
+    cached = ai_model.get_ai_response("what helps a common cold?", SYSTEM)
+    assert cached == {"response": "Fake answer to: What helps a  common cold?"}
+    assert len(ai_env.requests) == 1
+
+    ai_model.get_ai_response("What helps a common cold?", "A different system prompt.")
+    assert len(ai_env.requests) == 2
+
+def test_concurrent_first_use_shares_one_cache(ai_env, monkeypatch):
+    """Threads racing on the first call all get the same cache, so no entries are lost."""
+    import threading
+    class SlowCache(ai_model.TTLCache):
+        def __init__(self, *args, **kwargs):
+            time.sleep(0.05)
+            super().__init__(*args, **kwargs)
+    monkeypatch.setattr(ai_model, 'TTLCache', SlowCache)
+    start, caches = threading.Barrier(8), []
+    def first_use():
+        start.wait()
+        caches.append(ai_model.get_response_cache())
+    threads = [threading.Thread(target=first_use) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(c) for c in caches}) == 1
+
+def test_cache_can_be_disabled(ai_env, monkeypatch):
+    monkeypatch.setenv('AI_RESPONSE_CACHE_SIZE', '0')
+    ai_model.reset_ai_client()
+    ai_model.get_ai_response("repeat me", SYSTEM)
+    ai_model.get_ai_response("repeat me", SYSTEM)
+    assert len(ai_env.requests) == 2
+
+def test_slow_upstream_times_out(ai_env, monkeypatch):
+    """A hung upstream returns an error after the read timeout instead of pinning the worker."""
+    monkeypatch.setenv('OPENAI_READ_TIMEOUT', '0.3')
+    ai_model.reset_ai_client()
+    ai_env.delay = 1.5
+    start = time.monotonic()
+    result = ai_model.get_ai_response("slow question", SYSTEM)
+    assert 'error' in result
+    assert time.monotonic() - start < 1.2
+
+def test_stream_yields_tokens_as_they_arrive(ai_env):
+    """The first delta arrives long before the full completion finishes."""
+    ai_env.chunk_delay = 0.2
+    start = time.monotonic()
+    stream = ai_model.stream_ai_response("tell me something long", SYSTEM)
+    first = next(stream)
+    first_token_latency = time.monotonic() - start
+    rest = list(stream)
+    total_latency = time.monotonic() - start
+
+    assert first == "Fake"
+    assert first + ''.join(rest) == "Fake answer to: tell me something long"
+    assert first_token_latency < total_latency / 2
+
+    # The completed stream is cached, so a repeat is one delta and no model call
+    calls = len(ai_env.requests)
+    assert list(ai_model.stream_ai_response("tell me something long", SYSTEM)) == ["Fake answer to: tell me something long"]
+    assert len(ai_env.requests) == calls
+
+def test_stream_without_api_key_raises(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    ai_model.reset_ai_client()
+    with pytest.raises(ai_model.AIResponseError):
+        list(ai_model.stream_ai_response("hello", SYSTEM))
@@ -0,0 +1,31 @@
+import pytest
+from utils.auth import init_password_hashing, hash_password, verify_password, needs_rehash
+
+@pytest.fixture(autouse=True)
+def cheap_hashing():
+    init_password_hashing('pbkdf2:sha256:1000', workers=0)
+    yield
+    init_password_hashing('scrypt', workers=0)
+
+def test_hash_and_verify_inline():
+    stored = hash_password('secret')
+    assert stored.startswith('pbkdf2:sha256:1000$')
+    assert verify_password(stored, 'secret')
+    assert not verify_password(stored, 'wrong')
+    assert not verify_password('', 'secret')
+
+def test_hash_and_verify_in_process_pool():
+    init_password_hashing('pbkdf2:sha256:1000', workers=2)
+    stored = hash_password('secret')
+    assert verify_password(stored, 'secret')
+    assert not verify_password(stored, 'wrong')
+
+def test_needs_rehash_when_cost_changes():
+    stored = hash_password('secret')
+    assert not needs_rehash(stored)
+    init_password_hashing('pbkdf2:sha256:2000', workers=0)
+    assert needs_rehash(stored)
+    # Short method names are expanded to werkzeug's default parameters
+    init_password_hashing('scrypt', workers=0)
+    assert not needs_rehash(hash_password('secret'))
+    assert needs_rehash(stored)
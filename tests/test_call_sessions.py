@@ -0,0 +1,61 @@
+import datetime
+import mongomock
+import pytest
+from utils.call_sessions import CallSessions
+from utils.indexes import ensure_indexes
+
+@pytest.fixture
+def sessions():
+    db = mongomock.MongoClient()['test_db']
+    ensure_indexes(db)
+    return CallSessions(db['call_sessions'], reuse_window=60, call_ttl=3600)
+
+class RoomFactory:
+    def __init__(self):
+        self.created = 0
+
+    def __call__(self):
+        self.created += 1
+        return f"room-{self.created}"
+
+def test_same_pair_reuses_active_room(sessions):
+    rooms = RoomFactory()
+    assert sessions.start('D-1', 'P-1', rooms) == ('room-1', False)
+    assert sessions.start('D-1', 'P-1', rooms) == ('room-1', True)
+    assert sessions.start('D-2', 'P-1', rooms) == ('room-2', False)
+    assert rooms.created == 2
+
+def test_stale_session_gets_a_new_room(sessions):
+    rooms = RoomFactory()
+    sessions.start('D-1', 'P-1', rooms)
+    old = datetime.datetime.now(datetime.UTC) - datetime.timedelta(seconds=120)
+    sessions.collection.update_many({}, {'$set': {'last_used_at': old}})
+
+    assert sessions.start('D-1', 'P-1', rooms) == ('room-2', False)
+    active = list(sessions.collection.find({'doctor_id': 'D-1', 'patient_id': 'P-1', 'active': True}))
+    assert [s['room_id'] for s in active] == ['room-2']
+
+def test_concurrent_start_returns_the_winning_room(sessions):
+    """If another request inserted the pair's session first, its room is returned."""
+    def racing_room():
+        sessions.collection.insert_one({
+            'doctor_id': 'D-1', 'patient_id': 'P-1', 'room_id': 'room-winner', 'active': True,
+            'last_used_at': datetime.datetime.now(datetime.UTC),
+            'ends_at': datetime.datetime.now(datetime.UTC) + datetime.timedelta(seconds=3600)})
+        return 'room-loser'
+    assert sessions.start('D-1', 'P-1', racing_room) == ('room-winner', True)
+
+def test_patient_token_only_for_own_active_room(sessions):
+    sessions.start('D-1', 'P-1', RoomFactory())
+    assert sessions.touch_for_patient('room-1', 'P-1')
+    assert not sessions.touch_for_patient('room-1', 'P-2')
+    assert not sessions.touch_for_patient('room-9', 'P-1')
+
+    past = datetime.datetime.now(datetime.UTC) - datetime.timedelta(seconds=1)
+    sessions.collection.update_many({}, {'$set': {'ends_at': past}})
+    assert not sessions.touch_for_patient('room-1', 'P-1')
+    assert sessions.close_expired() == 1
+
+def test_failed_room_creation_records_nothing(sessions):
+    assert sessions.start('D-1', 'P-1', lambda: None) == (None, False)
+    assert sessions.collection.count_documents({}) == 0
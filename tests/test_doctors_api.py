@@ -147,3 +147,297 @@ def test_doctor_uploads_report_for_patient(approved_doctor_token, registered_pat
     assert "Report uploaded successfully" in response_data['message']
     assert 'filename' in response_data
 
+
+def test_all_issues_patient_lookup_is_batched(app, client, command_counter):
+    """
+    Guards against the N+1 pattern: /doctors/issues/all must resolve patient names
+    with one patients query no matter how many issues exist.
+    """
+    import datetime
+    from flask_jwt_extended import create_access_token
+
+    db = app.db
+    patient_ids = [f"nplus1-{i}" for i in range(5)]
+    try:
+        db.patients.insert_many([
+            {'unique_id': pid, 'mobile': f"8{random.randint(100000000, 999999999)}",
+             'first_name': 'NPlusOne', 'last_name': str(i)}
+            for i, pid in enumerate(patient_ids)
+        ])
+        db.issues.insert_many([
+            {'user_id': pid, 'text': 'N+1 guard issue', 'status': 'Pending',
+             'created_at': datetime.datetime.now(datetime.UTC)}
+            for pid in patient_ids for _ in range(3)
+        ])
+        with app.app_context():
+            token = create_access_token(identity='D-NPLUS', additional_claims={'role': 'doctor'})
+
+        command_counter.reset()
+        r = client.get('/doctors/issues/all?limit=100', headers={'Authorization': f'Bearer {token}'})
+        assert r.status_code == 200
+        guarded = [i for i in r.json['issues'] if i.get('text') == 'N+1 guard issue']
+        assert len(guarded) == 15
+        assert all(i['patient_name'].startswith('NPlusOne ') for i in guarded)
+
+        assert command_counter.count('find', 'patients') <= 1
+        assert command_counter.count('find', 'issues') == 1
+    finally:
+        db.issues.delete_many({'text': 'N+1 guard issue'})
+        db.patients.delete_many({'unique_id': {'$in': patient_ids}})
+
+def test_get_all_patient_issues_streamed(approved_doctor_token):
+    """Tests that ?stream=1 returns the full issue list as one valid JSON document."""
+    headers = {'Authorization': f'Bearer {approved_doctor_token}'}
+    r = requests.get(f'{BASE}/doctors/issues/all', headers=headers, params={'stream': 1, 'batch_size': 10}, stream=True)
+    assert r.status_code == 200
+    assert r.headers['Content-Type'].startswith('application/json')
+    body = r.json()
+    assert isinstance(body['issues'], list)
+    assert body['next_cursor'] is None
+    assert all('patient_name' in issue for issue in body['issues'])
+
+def test_prescribe_and_delete_status_codes(app, client):
+    """Prescribe/delete keep their status codes: 404 unknown issue, 403 someone else's issue, 400 bad id."""
+    from bson import ObjectId
+    from flask_jwt_extended import create_access_token
+
+    owner = f"status-{random.randint(1000, 9999)}"
+    issue_id = str(app.db.issues.insert_one({'user_id': owner, 'status': 'Pending', 'text': 'Status code test'}).inserted_id)
+    try:
+        with app.app_context():
+            doctor = {'Authorization': f"Bearer {create_access_token(identity='D-STAT1', additional_claims={'role': 'doctor'})}"}
+            owner_headers = {'Authorization': f'Bearer {create_access_token(identity=owner)}'}
+            other = {'Authorization': f"Bearer {create_access_token(identity=f'{owner}-other')}"}
+
+        r = client.post(f'/doctors/issue/{issue_id}/prescribe', headers=doctor, data={'prescription_text': 'Rest and fluids'})
+        assert r.status_code == 200
+        issue = app.db.issues.find_one({'_id': ObjectId(issue_id)})
+        assert issue['status'] == 'Resolved'
+        assert issue['prescription']['text'] == 'Rest and fluids' and issue['prescription']['doctor_id'] == 'D-STAT1'
+
+        assert client.post(f'/doctors/issue/{"0" * 24}/prescribe', headers=doctor,
+                           data={'prescription_text': 'Rest and fluids'}).status_code == 404
+        assert client.post('/doctors/issue/not-an-id/prescribe', headers=doctor,
+                           data={'prescription_text': 'Rest and fluids'}).status_code == 400
+        assert client.post(f'/doctors/issue/{issue_id}/prescribe', headers=doctor, data={}).status_code == 400
+
+        r = client.delete(f'/patients/issue/{issue_id}', headers=other)
+        assert r.status_code == 403
+        assert app.db.issues.count_documents({'_id': ObjectId(issue_id)}) == 1
+        assert client.delete(f'/patients/issue/{"0" * 24}', headers=owner_headers).status_code == 404
+        assert client.delete('/patients/issue/not-an-id', headers=owner_headers).status_code == 400
+
+        assert client.delete(f'/patients/issue/{issue_id}', headers=owner_headers).status_code == 200
+        assert app.db.issues.count_documents({'_id': ObjectId(issue_id)}) == 0
+        assert client.delete(f'/patients/issue/{issue_id}', headers=owner_headers).status_code == 404
+    finally:
+        app.db.issues.delete_many({'user_id': owner})
+
+def test_prescribe_and_delete_are_single_round_trip(app, client, command_counter):
+    """Prescribing and deleting an issue must be one conditional write each (status codes: see above)."""
+    from flask_jwt_extended import create_access_token
+
+    owner = f"atomic-{random.randint(1000, 9999)}"
+    issue_id = str(app.db.issues.insert_one({'user_id': owner, 'status': 'Pending', 'text': 'Atomic write test'}).inserted_id)
+    try:
+        with app.app_context():
+            doctor_token = create_access_token(identity='D-ATOM1', additional_claims={'role': 'doctor'})
+            owner_token = create_access_token(identity=owner)
+
+        command_counter.reset()
+        r = client.post(f'/doctors/issue/{issue_id}/prescribe', headers={'Authorization': f'Bearer {doctor_token}'},
+                        data={'prescription_text': 'Rest and fluids'})
+        assert r.status_code == 200
+        assert command_counter.count('find', 'issues') == 0
+        # find_one_and_update (purani prescription image release karne ke liye) = ek findAndModify
+        assert command_counter.count('findAndModify', 'issues') == 1
+        assert command_counter.count('update', 'issues') == 0
+
+        command_counter.reset()
+        r = client.delete(f'/patients/issue/{issue_id}', headers={'Authorization': f'Bearer {owner_token}'})
+        assert r.status_code == 200
+        assert command_counter.count('find', 'issues') == 0
+        # find_one_and_delete (blob refs release karne ke liye doc chahiye) = ek findAndModify
+        assert command_counter.count('findAndModify', 'issues') == 1
+        assert command_counter.count('delete', 'issues') == 0
+    finally:
+        app.db.issues.delete_many({'user_id': owner})
+
+def test_bulk_status_and_prescribe(app, client):
+    """Bulk endpoints report per-item results in request order (ok / not_found / invalid id / missing fields)."""
+    from flask_jwt_extended import create_access_token
+
+    owner = f"bulk-{random.randint(1000, 9999)}"
+    ids = [str(i) for i in app.db.issues.insert_many(
+        [{'user_id': owner, 'status': 'Pending', 'text': f'Bulk issue {n}'} for n in range(3)]).inserted_ids]
+    try:
+        with app.app_context():
+            token = create_access_token(identity='D-BULK1', additional_claims={'role': 'doctor'})
+        headers = {'Authorization': f'Bearer {token}'}
+
+        r = client.post('/doctors/issues/bulk-status', headers=headers,
+                        json={'items': [{'issue_id': i, 'status': 'Seen'} for i in ids]})
+        assert r.status_code == 200
+        assert [res['status'] for res in r.json['results']] == ['ok', 'ok', 'ok']
+        assert r.json['summary']['modified'] == 3
+        assert app.db.issues.count_documents({'user_id': owner, 'status': 'Seen'}) == 3
+
+        r = client.post('/doctors/issues/bulk-prescribe', headers=headers, json={'items': [
+            {'issue_id': ids[0], 'prescription_text': 'ORS'},
+            {'issue_id': 'not-an-id', 'prescription_text': 'ORS'},
+            {'issue_id': '0' * 24, 'prescription_text': 'ORS'},
+            {'issue_id': ids[1]},
+        ]})
+        assert r.status_code == 200
+        assert [res['status'] for res in r.json['results']] == ['ok', 'error', 'not_found', 'error']
+        assert r.json['summary'] == {'total': 4, 'matched': 1, 'modified': 1, 'errors': 3}
+        issue = app.db.issues.find_one({'text': 'Bulk issue 0'})
+        assert issue['status'] == 'Resolved'
+        assert issue['prescription']['doctor_id'] == 'D-BULK1'
+        assert app.db.issues.find_one({'text': 'Bulk issue 1'})['status'] == 'Seen'
+
+        r = client.post('/doctors/issues/bulk-status', headers=headers, json={'items': []})
+        assert r.status_code == 400
+    finally:
+        app.db.issues.delete_many({'user_id': owner})
+
+def test_bulk_status_is_one_write(app, client, command_counter):
+    """A bulk update is one bulk_write (one update command) and no reads when every issue exists."""
+    from flask_jwt_extended import create_access_token
+
+    owner = f"bulkrt-{random.randint(1000, 9999)}"
+    ids = [str(i) for i in app.db.issues.insert_many(
+        [{'user_id': owner, 'status': 'Pending', 'text': f'Bulk rt {n}'} for n in range(3)]).inserted_ids]
+    try:
+        with app.app_context():
+            token = create_access_token(identity='D-BULK1', additional_claims={'role': 'doctor'})
+        headers = {'Authorization': f'Bearer {token}'}
+
+        command_counter.reset()
+        r = client.post('/doctors/issues/bulk-status', headers=headers,
+                        json={'items': [{'issue_id': i, 'status': 'Seen'} for i in ids]})
+        assert r.status_code == 200
+        assert command_counter.count('update', 'issues') == 1
+        assert command_counter.count('find', 'issues') == 0
+
+        command_counter.reset()
+        r = client.post('/doctors/issues/bulk-prescribe', headers=headers,
+                        json={'items': [{'issue_id': i, 'prescription_text': 'ORS'} for i in ids]})
+        assert r.status_code == 200
+        assert command_counter.count('update', 'issues') == 1
+        assert command_counter.count('find', 'issues') == 0
+    finally:
+        app.db.issues.delete_many({'user_id': owner})
+
+def test_bulk_endpoints_reject_non_object_bodies(app, client):
+    """A JSON list or scalar body is a 400, not a 500."""
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity='D-BULK2', additional_claims={'role': 'doctor'})
+    headers = {'Authorization': f'Bearer {token}'}
+    for body in ([{'issue_id': '0' * 24, 'status': 'Seen'}], 'Seen', 42):
+        for path in ('/doctors/issues/bulk-status', '/doctors/issues/bulk-prescribe'):
+            r = client.post(path, headers=headers, json=body)
+            assert r.status_code == 400
+            assert 'error' in r.json
+
+def test_all_issues_keeps_bare_list_without_pagination_params(app, client):
+    """Older clients (no limit/after) still get a bare list; paginated callers get issues + next_cursor."""
+    from flask_jwt_extended import create_access_token
+
+    owner = f"legacy-{random.randint(1000, 9999)}"
+    app.db.issues.insert_many([{'user_id': owner, 'status': 'Pending', 'text': f'Legacy list {n}'} for n in range(3)])
+    try:
+        with app.app_context():
+            token = create_access_token(identity='D-LEGACY', additional_claims={'role': 'doctor'})
+        headers = {'Authorization': f'Bearer {token}'}
+
+        r = client.get('/doctors/issues/all', headers=headers)
+        assert r.status_code == 200
+        assert isinstance(r.json, list)
+        assert sum(1 for i in r.json if i.get('user_id') == owner) == 3
+        assert all(i['patient_name'] == 'Unknown Patient' for i in r.json if i.get('user_id') == owner)
+
+        r = client.get('/doctors/issues/all?limit=2', headers=headers)
+        assert r.status_code == 200
+        assert len(r.json['issues']) == 2 and r.json['next_cursor']
+    finally:
+        app.db.issues.delete_many({'user_id': owner})
+
+def test_cache_stats_require_doctor_token(app, client):
+    """/stats/caches exposes internal cache sizes and hit rates, so only doctors may read it."""
+    from flask_jwt_extended import create_access_token
+
+    assert client.get('/stats/caches').status_code == 401
+    with app.app_context():
+        patient_token = create_access_token(identity='stats-patient')
+        doctor_token = create_access_token(identity='D-STATS', additional_claims={'role': 'doctor'})
+    assert client.get('/stats/caches', headers={'Authorization': f'Bearer {patient_token}'}).status_code == 403
+    r = client.get('/stats/caches', headers={'Authorization': f'Bearer {doctor_token}'})
+    assert r.status_code == 200
+    assert {'translation', 'ai_response', 'active_patients', 'video_rooms'} <= set(r.json)
+
+def test_represcribing_releases_the_old_prescription_image(app, client):
+    """A replaced prescription's image loses its blob reference, so blob GC can collect it."""
+    from bson import ObjectId
+    from flask_jwt_extended import create_access_token
+
+    owner = f"represcribe-{random.randint(1000, 9999)}"
+    issue_id = str(app.db.issues.insert_one({'user_id': owner, 'status': 'Pending', 'text': 'Rash'}).inserted_id)
+    first_bytes, second_bytes = os.urandom(64), os.urandom(64)
+    try:
+        with app.app_context():
+            token = create_access_token(identity='D-REPRES', additional_claims={'role': 'doctor'})
+        headers = {'Authorization': f'Bearer {token}'}
+
+        def prescribe(image=None):
+            data = {'prescription_text': 'Calamine lotion'}
+            if image is not None:
+                data['prescription_image'] = (BytesIO(image), 'rx.png')
+            r = client.post(f'/doctors/issue/{issue_id}/prescribe', headers=headers, data=data,
+                            content_type='multipart/form-data')
+            assert r.status_code == 200
+            return app.db.issues.find_one({'_id': ObjectId(issue_id)})['prescription']['image_filename']
+
+        def refs(filename):
+            return app.db.blobs.find_one({'_id': filename[:64]})['refs']
+
+        first = prescribe(first_bytes)
+        assert refs(first) == 1
+        assert prescribe(first_bytes) == first and refs(first) == 1   # same image dobara: ek hi reference
+        second = prescribe(second_bytes)
+        assert refs(first) == 0 and refs(second) == 1
+        assert prescribe() is None
+        assert refs(second) == 0
+    finally:
+        app.db.issues.delete_many({'user_id': owner})
+
+def test_bulk_prescribe_keeps_existing_prescription_image(app, client):
+    """Bulk prescribe updates text/notes but leaves an attached image (and its blob reference) alone."""
+    from flask_jwt_extended import create_access_token
+
+    owner = f"bulkimg-{random.randint(1000, 9999)}"
+    with_image, without = app.db.issues.insert_many([
+        {'user_id': owner, 'status': 'Pending', 'prescription': {'doctor_id': 'D-OLD', 'text': 'Old',
+                                                                 'notes': 'x', 'image_filename': 'rx.png'}},
+        {'user_id': owner, 'status': 'Pending', 'prescription': None},
+    ]).inserted_ids
+    try:
+        with app.app_context():
+            token = create_access_token(identity='D-BULKIMG', additional_claims={'role': 'doctor'})
+        r = client.post('/doctors/issues/bulk-prescribe', headers={'Authorization': f'Bearer {token}'}, json={'items': [
+            {'issue_id': str(with_image), 'prescription_text': 'ORS'},
+            {'issue_id': str(without), 'prescription_text': 'Rest'},
+        ]})
+        assert r.status_code == 200
+        assert [res['status'] for res in r.json['results']] == ['ok', 'ok']
+        assert r.json['summary']['matched'] == 2
+
+        kept = app.db.issues.find_one({'_id': with_image})['prescription']
+        assert (kept['text'], kept['notes'], kept['doctor_id'], kept['image_filename']) == ('ORS', None, 'D-BULKIMG', 'rx.png')
+        fresh = app.db.issues.find_one({'_id': without})
+        assert fresh['status'] == 'Resolved'
+        assert fresh['prescription']['text'] == 'Rest' and fresh['prescription']['image_filename'] is None
+    finally:
+        app.db.issues.delete_many({'user_id': owner})
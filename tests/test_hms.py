@@ -0,0 +1,68 @@
+import time
+import jwt
+import pytest
+from utils import hms
+from tests.fake_servers import FakeHMSServer
+
+@pytest.fixture(scope="module")
+def fake_hms():
+    server = FakeHMSServer().start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def hms_env(fake_hms, monkeypatch):
+    """Points the shared 100ms client at the local fake server."""
+    monkeypatch.setenv('HMS_ACCESS_KEY', 'test-access-key')
+    monkeypatch.setenv('HMS_SECRET', 'test-secret-that-is-long-enough-for-hs256')
+    monkeypatch.setenv('HMS_TEMPLATE_ID', 'template-1')
+    monkeypatch.setenv('HMS_API_BASE_URL', fake_hms.api_url)
+    monkeypatch.setenv('HMS_RETRY_BACKOFF', '0')
+    monkeypatch.setenv('HMS_READ_TIMEOUT', '2')
+    fake_hms.reset()
+    hms.reset_hms_client()
+    yield fake_hms
+    hms.reset_hms_client()
+
+def test_session_and_management_token_are_reused(hms_env):
+    """Room creation reuses one keep-alive connection and one signed management token."""
+    rooms = [hms.create_room(f"Call {i}") for i in range(3)]
+    assert all(room and room.startswith('room-') for room in rooms)
+    assert len(hms_env.requests) == 3
+    assert len(set(hms_env.client_ports)) == 1
+    assert len(set(hms_env.auth_headers)) == 1
+    assert hms.get_hms_session() is hms.get_hms_session()
+
+def test_management_token_refreshed_before_expiry(hms_env, monkeypatch):
+    monkeypatch.setenv('HMS_MANAGEMENT_TOKEN_TTL', '100')
+    monkeypatch.setenv('HMS_MANAGEMENT_TOKEN_REFRESH', '30')
+    first = hms.get_management_token()
+    assert hms.get_management_token() == first
+    claims = jwt.decode(first, options={'verify_signature': False})
+    assert claims['type'] == 'management'
+    assert claims['exp'] - claims['iat'] == 100
+
+    # 75s baad sirf 25s bache hain (< 30s margin) -> naya token
+    real_time = time.time
+    monkeypatch.setattr(hms.time, 'time', lambda: real_time() + 75)
+    assert hms.get_management_token() != first
+
+def test_transient_errors_are_retried(hms_env):
+    hms_env.fail_next = 2
+    assert hms.create_room("Retry call") is not None
+    assert len(hms_env.requests) == 3
+
+def test_hung_upstream_times_out(hms_env, monkeypatch):
+    monkeypatch.setenv('HMS_READ_TIMEOUT', '0.3')
+    monkeypatch.setenv('HMS_MAX_RETRIES', '0')
+    hms.reset_hms_client()
+    hms_env.delay = 1.5
+    start = time.monotonic()
+    assert hms.create_room("Slow call") is None
+    assert time.monotonic() - start < 1.2
+
+def test_auth_token_is_signed_locally(hms_env):
+    token = hms.get_auth_token('patient-1', 'room-0001', 'patient')
+    claims = jwt.decode(token, 'test-secret-that-is-long-enough-for-hs256', algorithms=['HS256'])
+    assert (claims['user_id'], claims['room_id'], claims['role'], claims['type']) == ('patient-1', 'room-0001', 'patient', 'app')
+    assert hms_env.requests == []
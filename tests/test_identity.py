@@ -0,0 +1,26 @@
+import mongomock
+from utils.identity import init_patient_cache, is_active_patient, forget_patient, patient_cache_stats
+
+def test_active_patient_cache_avoids_repeat_lookups():
+    init_patient_cache(size=10, ttl=60)
+    patients = mongomock.MongoClient().db.patients
+    patients.insert_one({'unique_id': 'p1', 'password_hash': 'x'})
+
+    assert is_active_patient(patients, 'p1')
+    assert is_active_patient(patients, 'p1', {'role': 'patient'})
+    assert patient_cache_stats()['db_lookups'] == 1
+
+    forget_patient('p1')
+    assert is_active_patient(patients, 'p1')
+    assert patient_cache_stats()['db_lookups'] == 2
+
+    assert not is_active_patient(patients, 'missing')
+    assert not is_active_patient(patients, 'missing')
+    assert patient_cache_stats()['db_lookups'] == 4
+
+def test_other_roles_rejected_from_claims():
+    init_patient_cache(size=10, ttl=60)
+    patients = mongomock.MongoClient().db.patients
+    patients.insert_one({'unique_id': 'D-00001'})
+    assert not is_active_patient(patients, 'D-00001', {'role': 'doctor'})
+    assert patient_cache_stats()['db_lookups'] == 0
@@ -0,0 +1,59 @@
+import mongomock
+import pytest
+from utils.ids import BlockIdAllocator, IdSpaceExhausted
+
+def test_format_is_a_bijection_over_the_id_space():
+    allocator = BlockIdAllocator(mongomock.MongoClient().db.counters, 'test', prefix='X-', length=2)
+    ids = {allocator.format(i) for i in range(allocator.space)}
+    assert len(ids) == allocator.space == 36 ** 2
+    assert all(i.startswith('X-') and len(i) == 4 for i in ids)
+
+def test_filling_most_of_the_space_costs_one_insert_per_id():
+    """Fills 95% of a small ID space: no probes, no duplicates, one counter write per block."""
+    db = mongomock.MongoClient().db
+    db.doctors.create_index('doctor_id', unique=True)
+    allocator = BlockIdAllocator(db.counters, 'doctor_id', prefix='D-', length=2, block_size=50)
+    target = int(allocator.space * 0.95)
+
+    counter_writes = 0
+    original_reserve = allocator._reserve_block
+    def counting_reserve():
+        nonlocal counter_writes
+        counter_writes += 1
+        original_reserve()
+    allocator._reserve_block = counting_reserve
+
+    for _ in range(target):
+        db.doctors.insert_one({'doctor_id': allocator.next_id()})
+
+    assert db.doctors.count_documents({}) == target
+    assert counter_writes == -(-target // 50)
+
+def test_two_processes_never_collide_and_space_exhaustion_is_reported():
+    counters = mongomock.MongoClient().db.counters
+    a = BlockIdAllocator(counters, 'doctor_id', length=1, block_size=4)
+    b = BlockIdAllocator(counters, 'doctor_id', length=1, block_size=4)
+    ids = []
+    for _ in range(16):
+        ids.append(a.next_id())
+        ids.append(b.next_id())
+    assert len(set(ids)) == 32
+    with pytest.raises(IdSpaceExhausted):
+        for _ in range(10):
+            ids.append(a.next_id())
+    assert len(set(ids)) == len(ids) == 36
+
+def test_register_allocates_distinct_ids(tmp_path):
+    from app import create_app
+    app = create_app({'TESTING': True, 'UPLOAD_FOLDER': str(tmp_path), 'PASSWORD_HASH_WORKERS': 0, 'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000'},
+                     mongo_client=mongomock.MongoClient())
+    client = app.test_client()
+    body = {'first_name': 'Id', 'last_name': 'Test', 'password': 'pw', 'confirm_password': 'pw',
+            'specialization': 'ENT', 'branch': 'Main'}
+    seen = set()
+    for _ in range(30):
+        r = client.post('/doctors/register', json=body)
+        assert r.status_code == 201
+        seen.add(r.json['doctor_id'])
+    assert len(seen) == 30
+    assert app.db.doctors.count_documents({}) == 30
@@ -0,0 +1,37 @@
+import mongomock
+import pytest
+from utils.indexes import INDEXES, ensure_indexes
+
+def test_ensure_indexes_creates_every_declared_index():
+    db = mongomock.MongoClient()['test_db']
+    report = ensure_indexes(db)
+    for collection_name, specs in INDEXES.items():
+        assert report[collection_name] == [spec['name'] for spec in specs]
+        info = db[collection_name].index_information()
+        for spec in specs:
+            assert info[spec['name']]['key'] == spec['keys']
+            assert info[spec['name']].get('unique', False) == spec.get('unique', False)
+
+def test_second_ensure_indexes_run_is_a_no_op():
+    db = mongomock.MongoClient()['test_db']
+    ensure_indexes(db)
+    before = {name: db[name].index_information() for name in INDEXES}
+    report = ensure_indexes(db)
+    assert not any(str(name).startswith('error') for names in report.values() for name in names)
+    assert {name: db[name].index_information() for name in INDEXES} == before
+
+def test_patients_without_mobile_do_not_collide():
+    db = mongomock.MongoClient()['test_db']
+    ensure_indexes(db)
+    db.patients.insert_many([{'unique_id': 'P-1'}, {'unique_id': 'P-2'}])
+    assert db.patients.count_documents({}) == 2
+
+def test_app_refuses_to_start_without_unique_indexes(tmp_path):
+    from app import create_app
+    client = mongomock.MongoClient()
+    overrides = {'TESTING': True, 'UPLOAD_FOLDER': str(tmp_path), 'PASSWORD_HASH_WORKERS': 0,
+                 'MONGO_DB_NAME': 'test_db', 'MONGO_ENSURE_INDEXES': False}
+    with pytest.raises(RuntimeError, match='patients.mobile_1'):
+        create_app(overrides, mongo_client=client)
+    ensure_indexes(client['test_db'])
+    assert create_app(overrides, mongo_client=client).db.name == 'test_db'
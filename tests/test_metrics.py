@@ -0,0 +1,38 @@
+import pytest
+from utils import metrics
+
+def test_histogram_renders_cumulative_buckets():
+    h = metrics.Histogram('test_latency_seconds', 'Test histogram.', ('stage',), buckets=(0.1, 1.0))
+    h.observe(0.05, 'a')
+    h.observe(0.5, 'a')
+    h.observe(5.0, 'a')
+    lines = list(h.render())
+    assert 'test_latency_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{stage="a"} 3' in lines
+
+def test_timed_records_stage_and_errors():
+    @metrics.timed('test_stage_ok')
+    def ok():
+        return 42
+
+    @metrics.timed('test_stage_fail')
+    def fail():
+        raise RuntimeError("boom")
+
+    assert ok() == 42
+    with pytest.raises(RuntimeError):
+        fail()
+    assert metrics.STAGE_DURATION.count('test_stage_ok') == 1
+    assert metrics.STAGE_ERRORS.value('test_stage_fail') == 1
+
+def test_disabled_metrics_record_nothing():
+    metrics.set_enabled(False)
+    try:
+        with metrics.stage('test_stage_disabled'):
+            pass
+        metrics.timed('test_stage_disabled')(lambda: None)()
+    finally:
+        metrics.set_enabled(True)
+    assert metrics.STAGE_DURATION.count('test_stage_disabled') == 0
@@ -0,0 +1,91 @@
+import os
+from types import SimpleNamespace
+import mongomock
+import pytest
+from flask import jsonify
+from app import create_app
+from tests.conftest import uses_real_mongo
+from utils.mongo_monitor import MONGO_N_PLUS_ONE, query_shape, command_filter, RequestMongoStats
+
+def test_query_shape_strips_values_keeps_operators():
+    shape = query_shape({'unique_id': 'abc', 'age': {'$gt': 3}, '_id': {'$in': [1, 2, 3]}})
+    assert shape == {'_id': {'$in': ['?']}, 'age': {'$gt': '?'}, 'unique_id': '?'}
+    assert query_shape({'unique_id': 'x'}) == query_shape({'unique_id': 'y'})
+
+def test_command_filter_for_common_commands():
+    assert command_filter('find', {'find': 'patients', 'filter': {'mobile': '1'}}) == {'mobile': '1'}
+    assert command_filter('update', {'update': 'issues', 'updates': [{'q': {'_id': 1}, 'u': {}}]}) == {'_id': 1}
+    assert command_filter('aggregate', {'aggregate': 'issues', 'pipeline': [{'$match': {'status': 'x'}}]}) == {'status': 'x'}
+    assert command_filter('insert', {'insert': 'issues', 'documents': []}) is None
+
+def test_repeated_single_document_shapes_flag_n_plus_one():
+    stats = RequestMongoStats()
+    stats.record('find', 'issues', query_shape({}), False, 2.0)
+    for uid in range(6):
+        stats.record('find', 'patients', query_shape({'unique_id': uid}), True, 1.0)
+    assert stats.count == 7
+    assert stats.total_ms == 8.0
+    repeated = stats.repeated_shapes(threshold=5)
+    assert len(repeated) == 1
+    command_name, collection, shape, times = repeated[0]
+    assert (command_name, collection, times) == ('find', 'patients', 6)
+    assert stats.repeated_shapes(threshold=10) == []
+
+@pytest.fixture
+def monitored_app(tmp_path):
+    """A debug-mode app whose routes below run their Mongo commands through app.mongo_monitor."""
+    overrides = {'TESTING': True, 'DEBUG': True, 'UPLOAD_FOLDER': str(tmp_path), 'PASSWORD_HASH_WORKERS': 0,
+                 'MONGO_N_PLUS_ONE_THRESHOLD': 3}
+    if uses_real_mongo():
+        overrides.update({'MONGO_URI': os.environ['TEST_MONGO_URI'],
+                          'MONGO_DB_NAME': os.environ.get('TEST_MONGO_DB_NAME', 'codecure_test')})
+        return create_app(overrides)
+    return create_app(overrides, mongo_client=mongomock.MongoClient())
+
+def _emit(monitor, command_name, command, request_id, duration_micros=1500):
+    """Feeds the listener the started/succeeded pair pymongo would send for one command."""
+    monitor.started(SimpleNamespace(command_name=command_name, command=command, connection_id=('db', 27017),
+                                    request_id=request_id))
+    monitor.succeeded(SimpleNamespace(command_name=command_name, connection_id=('db', 27017),
+                                      request_id=request_id, duration_micros=duration_micros))
+
+def test_request_gets_query_count_header_and_n_plus_one_warning(monitored_app, capsys):
+    @monitored_app.route('/_test/patient-names')
+    def patient_names():
+        # Issue list ke baad har patient ka alag find_one - classic N+1
+        _emit(monitored_app.mongo_monitor, 'find', {'find': 'issues', 'filter': {}}, 1)
+        for n in range(4):
+            _emit(monitored_app.mongo_monitor, 'find',
+                  {'find': 'patients', 'filter': {'unique_id': f'P-{n}'}, 'limit': 1}, 2 + n)
+        return jsonify([])
+
+    before = MONGO_N_PLUS_ONE.value('patient_names')
+    r = monitored_app.test_client().get('/_test/patient-names')
+    assert r.status_code == 200
+    assert r.headers['X-Mongo-Query-Count'] == '5'
+    assert r.headers['X-Mongo-Time-Ms'] == '7.5'
+    assert MONGO_N_PLUS_ONE.value('patient_names') == before + 1
+    out = capsys.readouterr().out
+    assert "possible N+1 in patient_names: find on patients with shape {'unique_id': '?'} ran 4 times" in out
+
+def test_header_only_in_debug_mode(monitored_app):
+    @monitored_app.route('/_test/one-query')
+    def one_query():
+        _emit(monitored_app.mongo_monitor, 'find', {'find': 'patients', 'filter': {'unique_id': 'P-1'}, 'limit': 1}, 1)
+        return jsonify([])
+
+    monitored_app.debug = False
+    r = monitored_app.test_client().get('/_test/one-query')
+    assert r.status_code == 200 and 'X-Mongo-Query-Count' not in r.headers
+
+@pytest.mark.skipif(not uses_real_mongo(), reason="mongomock emits no command-monitoring events; set TEST_MONGO_URI")
+def test_real_find_one_loop_is_counted_and_flagged(monitored_app, capsys):
+    @monitored_app.route('/_test/real-lookups')
+    def real_lookups():
+        for n in range(4):
+            monitored_app.db.patients.find_one({'unique_id': f'monitor-{n}'})
+        return jsonify([])
+
+    r = monitored_app.test_client().get('/_test/real-lookups')
+    assert int(r.headers['X-Mongo-Query-Count']) == 4
+    assert 'possible N+1 in real_lookups' in capsys.readouterr().out
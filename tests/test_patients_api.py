@@ -1,3 +1,4 @@
+import hashlib
 import os
 import random
 import pytest
@@ -164,3 +165,408 @@ def test_ai_prompt_endpoint(patient_token_and_mobile):
     assert 'response' in response_data
     assert isinstance(response_data['response'], str)
     assert len(response_data['response']) > 10
+
+
+def test_issue_list_pagination(patient_token_and_mobile):
+    """
+    Tests keyset pagination on the issue list: pages follow next_cursor,
+    never repeat an issue, and the last page has no cursor.
+    """
+    token, _ = patient_token_and_mobile
+    headers = {'Authorization': f'Bearer {token}'}
+    for i in range(3):
+        r = requests.post(f'{BASE}/patients/issue', headers=headers, data={'text': f'Paginated issue {i}'})
+        assert r.status_code == 201
+
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 2}
+        if cursor:
+            params['after'] = cursor
+        r = requests.get(f'{BASE}/patients/issue/list', headers=headers, params=params)
+        assert r.status_code == 200
+        page = r.json()
+        assert len(page['issues']) <= 2
+        seen.extend(issue['_id'] for issue in page['issues'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen))
+    assert len(seen) >= 3
+
+    r_bad = requests.get(f'{BASE}/patients/issue/list', headers=headers, params={'after': 'not-a-cursor'})
+    assert r_bad.status_code == 400
+
+
+def test_transcription_errors_mark_issue_failed(app, client, monkeypatch):
+    """free_audio_to_text's error sentinels are stored as a failed transcription, not as the transcript."""
+    import blueprints.patients as patients_module
+    from flask_jwt_extended import create_access_token
+    from utils.helpers import TRANSCRIPTION_SERVICE_ERROR
+
+    monkeypatch.setattr(patients_module, 'free_audio_to_text', lambda path, language_code: TRANSCRIPTION_SERVICE_ERROR)
+    user_id = f"transcribe-fail-{random.randint(1000, 9999)}"
+    app.db.patients.insert_one({'unique_id': user_id, 'mobile': get_unique_mobile(),
+                                'first_name': 'Failed', 'last_name': 'Audio'})
+    try:
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+        r = client.post('/patients/issue', headers=headers,
+                        data={'audio': (BytesIO(b'noise'), 'note.webm'), 'language_code': 'pa-IN'})
+        assert r.status_code == 201
+        app.job_queue.join()
+        r = client.get(f"/patients/issue/{r.json['issue_id']}/transcript", headers=headers)
+        assert r.json['transcript_status'] == 'failed'
+        assert r.json['audio_transcript'] is None
+        issue = app.db.issues.find_one({'user_id': user_id})
+        assert issue['transcript_error'] == TRANSCRIPTION_SERVICE_ERROR and issue['language_code'] == 'pa-IN'
+    finally:
+        for issue in app.db.issues.find({'user_id': user_id}):
+            app.blob_store.release(issue.get('audio_filename'))
+        app.db.issues.delete_many({'user_id': user_id})
+        app.db.patients.delete_one({'unique_id': user_id})
+
+
+def test_startup_sweep_requeues_stale_pending_transcriptions(app):
+    """Pending jobs lost with the in-process queue are resubmitted once; exhausted ones are failed."""
+    import datetime
+    from blueprints.patients import requeue_stale_transcriptions, _transcribe_issue_audio
+
+    class RecordingQueue:
+        def __init__(self):
+            self.jobs = []
+        def submit(self, func, *args):
+            self.jobs.append((func, args))
+
+    owner = f"sweep-{random.randint(1000, 9999)}"
+    now = datetime.datetime.now(datetime.UTC)
+    old = now - datetime.timedelta(hours=1)
+    stale, exhausted, fresh, legacy = app.db.issues.insert_many([
+        {'user_id': owner, 'audio_filename': 'a.webm', 'language_code': 'hi-IN', 'transcript_status': 'pending',
+         'created_at': old, 'transcript_queued_at': old, 'transcript_attempts': 1},
+        {'user_id': owner, 'audio_filename': 'b.webm', 'transcript_status': 'pending',
+         'created_at': old, 'transcript_queued_at': old, 'transcript_attempts': 3},
+        {'user_id': owner, 'audio_filename': 'c.webm', 'transcript_status': 'pending',
+         'created_at': now, 'transcript_queued_at': now, 'transcript_attempts': 1},
+        # Sweep se pehle bani issue: na queued_at, na language_code
+        {'user_id': owner, 'audio_filename': 'd.webm', 'transcript_status': 'pending', 'created_at': old},
+    ]).inserted_ids
+    try:
+        queue = RecordingQueue()
+        assert requeue_stale_transcriptions(app.db.issues, app.blob_store, queue, stale_after=600, max_attempts=3) == (2, 1)
+        assert sorted((args[2], args[3], args[4]) for _, args in queue.jobs) == sorted(
+            [(stale, 'a.webm', 'hi-IN'), (legacy, 'd.webm', 'en-US')])
+        assert all(func is _transcribe_issue_audio for func, _ in queue.jobs)
+        assert app.db.issues.find_one({'_id': exhausted})['transcript_status'] == 'failed'
+        assert app.db.issues.find_one({'_id': fresh})['transcript_status'] == 'pending'
+        assert app.db.issues.find_one({'_id': stale})['transcript_attempts'] == 2
+
+        # Dusra worker turant start ho: abhi claim hue jobs dobara queue nahi hote
+        assert requeue_stale_transcriptions(app.db.issues, app.blob_store, RecordingQueue(), stale_after=600) == (0, 0)
+    finally:
+        app.db.issues.delete_many({'user_id': owner})
+
+def test_audio_issue_transcribed_in_background(app, client, monkeypatch):
+    """
+    Tests the async transcription pipeline with the local job queue: the issue is stored
+    immediately as pending and updated in place once the worker finishes.
+    """
+    import threading
+    import blueprints.patients as patients_module
+    from flask_jwt_extended import create_access_token
+
+    release = threading.Event()
+    def fake_transcribe(audio_path, language_code):
+        release.wait(5)
+        return f"transcribed ({language_code})"
+    monkeypatch.setattr(patients_module, 'free_audio_to_text', fake_transcribe)
+
+    user_id = f"async-transcribe-{random.randint(1000, 9999)}"
+    app.db.patients.insert_one({'unique_id': user_id, 'mobile': get_unique_mobile(),
+                                'first_name': 'Async', 'last_name': 'Audio'})
+    try:
+        with app.app_context():
+            token = create_access_token(identity=user_id)
+        headers = {'Authorization': f'Bearer {token}'}
+
+        r = client.post('/patients/issue', headers=headers,
+                        data={'audio': (BytesIO(b'fake-audio'), 'note.webm'), 'language_code': 'hi-IN'})
+        assert r.status_code == 201
+        issue_id = r.json['issue_id']
+
+        r_pending = client.get(f'/patients/issue/{issue_id}/transcript', headers=headers)
+        assert r_pending.json['transcript_status'] == 'pending'
+
+        release.set()
+        app.job_queue.join()
+        r_done = client.get(f'/patients/issue/{issue_id}/transcript', headers=headers)
+        assert r_done.json['transcript_status'] == 'done'
+        assert r_done.json['audio_transcript'] == 'transcribed (hi-IN)'
+    finally:
+        app.db.issues.delete_many({'user_id': user_id})
+        app.db.patients.delete_one({'unique_id': user_id})
+
+
+def test_prompt_rules_match_raw_multilingual_prompt(app, client, monkeypatch):
+    """Emergency and feature rules must answer from the raw prompt, without any translator call."""
+    import blueprints.patients as patients_module
+    from flask_jwt_extended import create_access_token
+
+    def fail_translate(*args, **kwargs):
+        raise AssertionError("translator must not be called for rule hits")
+    monkeypatch.setattr(patients_module, 'free_translate', fail_translate)
+
+    user_id = f"rules-{random.randint(1000, 9999)}"
+    app.db.patients.insert_one({'unique_id': user_id, 'mobile': get_unique_mobile(),
+                                'first_name': 'Rules', 'last_name': 'Test'})
+    try:
+        with app.app_context():
+            token = create_access_token(identity=user_id)
+        headers = {'Authorization': f'Bearer {token}'}
+
+        for prompt in ['मुझे सीने में दर्द हो रहा है', 'ਮੈਨੂੰ ਛਾਤੀ ਵਿੱਚ ਦਰਦ ਹੈ', 'papa behosh ho gaye']:
+            r = client.post('/patients/prompt', headers=headers, json={'prompt': prompt})
+            assert r.status_code == 200
+            assert "consult a doctor immediately" in r.json['response']
+
+        r = client.post('/patients/prompt', headers=headers, json={'prompt': 'doctor ki appointment book karni hai'})
+        assert "preferred date and specialty" in r.json['response']
+    finally:
+        app.db.patients.delete_one({'unique_id': user_id})
+
+
+def test_prompt_server_sent_events(app, client, monkeypatch):
+    """?stream=1 forwards model deltas as SSE; rule hits come back as a single done event."""
+    import json
+    import blueprints.patients as patients_module
+    from flask_jwt_extended import create_access_token
+
+    monkeypatch.setattr(patients_module, 'free_translate', lambda text, target_lang='en': text)
+    monkeypatch.setattr(patients_module, 'stream_ai_response',
+                        lambda prompt, system_instruction: iter(["Drink ", "warm ", "water."]))
+
+    user_id = f"sse-{random.randint(1000, 9999)}"
+    app.db.patients.insert_one({'unique_id': user_id, 'mobile': get_unique_mobile(),
+                                'first_name': 'SSE', 'last_name': 'Test'})
+    try:
+        with app.app_context():
+            token = create_access_token(identity=user_id)
+        headers = {'Authorization': f'Bearer {token}'}
+
+        def events(response):
+            assert response.mimetype == 'text/event-stream'
+            parsed = []
+            for block in response.get_data(as_text=True).strip().split('\n\n'):
+                fields = dict(line.split(': ', 1) for line in block.split('\n'))
+                parsed.append((fields.get('event', 'message'), json.loads(fields['data'])))
+            return parsed
+
+        r_rule = client.post('/patients/prompt?stream=1', headers=headers, json={'prompt': 'I have chest pain'})
+        rule_events = events(r_rule)
+        assert len(rule_events) == 1
+        assert rule_events[0][0] == 'done'
+        assert "consult a doctor immediately" in rule_events[0][1]['response']
+
+        r_ai = client.post('/patients/prompt', headers={**headers, 'Accept': 'text/event-stream'},
+                           json={'prompt': 'What helps a cold?'})
+        ai_events = events(r_ai)
+        assert [data['delta'] for kind, data in ai_events[:-1]] == ["Drink ", "warm ", "water."]
+        assert ai_events[-1] == ('done', {'response': 'Drink warm water.'})
+    finally:
+        app.db.patients.delete_one({'unique_id': user_id})
+
+
+def test_login_claims_skip_patient_lookup(app, client, command_counter, monkeypatch):
+    """
+    Login issues role/name claims and warms the active-patient cache, so authenticated
+    routes don't fetch the patient document just to confirm it exists.
+    """
+    import blueprints.patients as patients_module
+    from flask_jwt_extended import decode_token
+    from utils.auth import hash_password
+
+    mobile = f"7{random.randint(100000000, 999999999)}"
+    user_id = f"claims-{random.randint(1000, 9999)}"
+    app.db.patients.insert_one({'unique_id': user_id, 'mobile': mobile, 'first_name': 'Claims',
+                                'last_name': 'Test', 'password_hash': hash_password('pw123'), 'profile': {}})
+    try:
+        r = client.post('/patients/login', json={'mobile': mobile, 'password': 'pw123'})
+        assert r.status_code == 200
+        token = r.json['access_token']
+        with app.app_context():
+            claims = decode_token(token)
+        assert claims['role'] == 'patient'
+        assert claims['name'] == 'Claims Test'
+        headers = {'Authorization': f'Bearer {token}'}
+
+        monkeypatch.setattr(patients_module, 'free_translate', lambda text, target_lang='en': text)
+        command_counter.reset()
+        r = client.post('/patients/prompt', headers=headers, json={'prompt': 'I have chest pain'})
+        assert r.status_code == 200
+        assert command_counter.count('find', 'patients') == 0
+
+        r = client.put('/patients/profile-details-update', headers=headers, data={'blood_group': 'B+'})
+        assert r.status_code == 200
+        assert r.json['profile'] == {'blood_group': 'B+'}
+        assert app.db.patients.find_one({'unique_id': user_id})['profile'] == {'blood_group': 'B+'}
+    finally:
+        app.db.patients.delete_one({'unique_id': user_id})
+
+
+def test_login_claims_and_active_patient_cache(app, client, monkeypatch):
+    """
+    Login token carries identity + role/name claims; the active-patient cache answers
+    until its TTL runs out, after which a deleted patient is rejected. Doctor tokens never pass.
+    """
+    from types import SimpleNamespace
+    from flask_jwt_extended import create_access_token, decode_token
+    import utils.cache
+    from utils.auth import hash_password
+    from utils.identity import patient_cache_stats
+
+    mobile = get_unique_mobile()
+    user_id = f"claimsmm-{random.randint(1000, 9999)}"
+    app.db.patients.insert_one({'unique_id': user_id, 'mobile': mobile, 'first_name': 'Cache',
+                                'last_name': 'Expiry', 'password_hash': hash_password('pw123'), 'profile': {}})
+    clock = [1000.0]
+    monkeypatch.setattr(utils.cache, 'time', SimpleNamespace(monotonic=lambda: clock[0]))
+    try:
+        r = client.post('/patients/login', json={'mobile': mobile, 'password': 'pw123'})
+        assert r.status_code == 200
+        with app.app_context():
+            claims = decode_token(r.json['access_token'])
+            doctor_token = create_access_token(identity=user_id, additional_claims={'role': 'doctor'})
+        assert (claims['sub'], claims['role'], claims['name']) == (user_id, 'patient', 'Cache Expiry')
+        headers = {'Authorization': f"Bearer {r.json['access_token']}"}
+        prompt = {'prompt': 'I have chest pain'}   # emergency rule: koi AI/translate call nahi
+
+        lookups = patient_cache_stats()['db_lookups']
+        assert client.post('/patients/prompt', headers=headers, json=prompt).status_code == 200
+        assert patient_cache_stats()['db_lookups'] == lookups   # login ne cache warm kiya
+        assert client.post('/patients/prompt', headers={'Authorization': f'Bearer {doctor_token}'},
+                           json=prompt).status_code == 404
+
+        # Patient deactivate (delete) hua: TTL tak cache purana jawab deta hai, uske baad 404
+        app.db.patients.delete_one({'unique_id': user_id})
+        assert client.post('/patients/prompt', headers=headers, json=prompt).status_code == 200
+        clock[0] += app.config.get('PATIENT_CACHE_TTL', 300) + 1
+        assert client.post('/patients/prompt', headers=headers, json=prompt).status_code == 404
+        assert patient_cache_stats()['db_lookups'] == lookups + 1
+    finally:
+        app.db.patients.delete_one({'unique_id': user_id})
+
+
+def test_resumable_upload_attached_to_issue(app, client):
+    """
+    A large video sent as byte-range chunks: a resent chunk gets the current offset back
+    (409), the completed upload is attached to an issue by id and served like any upload.
+    """
+    import hashlib
+    from flask_jwt_extended import create_access_token
+
+    user_id = f"resumable-{random.randint(1000, 9999)}"
+    app.db.patients.insert_one({'unique_id': user_id, 'mobile': get_unique_mobile(),
+                                'first_name': 'Resumable', 'last_name': 'Upload'})
+    video = os.urandom(10000)
+    try:
+        with app.app_context():
+            token = create_access_token(identity=user_id)
+        headers = {'Authorization': f'Bearer {token}'}
+
+        r = client.post('/patients/upload-sessions', headers=headers, json={'filename': 'cough.mp4', 'size': len(video)})
+        assert r.status_code == 201
+        upload_id = r.json['upload_id']
+
+        for start in (0, 4000, 8000):
+            chunk = video[start:start + 4000]
+            r = client.put(f'/patients/upload-sessions/{upload_id}', data=chunk, headers={
+                **headers, 'Content-Range': f'bytes {start}-{start + len(chunk) - 1}/{len(video)}',
+                'X-Content-SHA256': hashlib.sha256(chunk).hexdigest()})
+            assert r.status_code == 200
+            if start == 0:
+                r = client.put(f'/patients/upload-sessions/{upload_id}', data=chunk,
+                               headers={**headers, 'Content-Range': f'bytes 0-3999/{len(video)}'})
+                assert r.status_code == 409 and r.json['received'] == 4000
+
+        r = client.post(f'/patients/upload-sessions/{upload_id}/complete', headers=headers)
+        assert r.status_code == 200
+        filename = r.json['filename']
+
+        r = client.post('/patients/issue', headers=headers, json={'text': 'Cough video', 'video_upload_id': upload_id})
+        assert r.status_code == 201
+        assert app.db.issues.find_one({'user_id': user_id})['video_filename'] == filename
+        assert client.get(f'/uploads/{filename}').data == video
+    finally:
+        for issue in app.db.issues.find({'user_id': user_id}):
+            app.blob_store.release(issue.get('video_filename'))
+        app.db.issues.delete_many({'user_id': user_id})
+        app.db.patients.delete_one({'unique_id': user_id})
+
+
+def test_failed_submit_gives_resumable_uploads_back(app, client, monkeypatch):
+    """If saving the issue/report fails, the upload session survives and the same upload_id can be retried."""
+    from flask_jwt_extended import create_access_token
+    from blueprints import patients as patients_module
+
+    user_id = f"giveback-{random.randint(1000, 9999)}"
+    app.db.patients.insert_one({'unique_id': user_id, 'mobile': get_unique_mobile(),
+                                'first_name': 'Give', 'last_name': 'Back'})
+    try:
+        with app.app_context():
+            token = create_access_token(identity=user_id)
+        headers = {'Authorization': f'Bearer {token}'}
+
+        def completed_upload(name, body):
+            upload_id = client.post('/patients/upload-sessions', headers=headers,
+                                    json={'filename': name, 'size': len(body)}).json['upload_id']
+            client.put(f'/patients/upload-sessions/{upload_id}', data=body,
+                       headers={**headers, 'Content-Range': f'bytes 0-{len(body) - 1}/{len(body)}'})
+            assert client.post(f'/patients/upload-sessions/{upload_id}/complete', headers=headers).status_code == 200
+            return upload_id
+
+        def broken(*args, **kwargs):
+            raise RuntimeError('translation service down')
+
+        video_id = completed_upload('cough.mp4', os.urandom(2000))
+        with monkeypatch.context() as m:
+            m.setattr(patients_module, 'free_translate', broken)
+            with pytest.raises(RuntimeError):
+                client.post('/patients/issue', headers=headers, json={'text': 'Khansi', 'video_upload_id': video_id})
+        assert app.db.upload_sessions.find_one({'_id': video_id})['status'] == 'complete'
+        r = client.post('/patients/issue', headers=headers, json={'text': 'Khansi', 'video_upload_id': video_id})
+        assert r.status_code == 201
+
+        report_id = completed_upload('xray.pdf', os.urandom(2000))
+        with monkeypatch.context() as m:
+            m.setattr(patients_module, 'reports_collection', broken)
+            with pytest.raises(RuntimeError):
+                client.post('/patients/report/upload', headers=headers, json={'upload_id': report_id})
+        assert app.db.upload_sessions.find_one({'_id': report_id})['status'] == 'complete'
+        assert client.post('/patients/report/upload', headers=headers, json={'upload_id': report_id}).status_code == 201
+
+        # Plain multipart uploads have no session to give back - their blob references are released instead
+        def refs(body):
+            doc = app.db.blobs.find_one({'_id': hashlib.sha256(body).hexdigest()})
+            return doc['refs'] if doc else 0
+        audio, video, report = os.urandom(1500), os.urandom(1500), os.urandom(1500)
+        with monkeypatch.context() as m:
+            m.setattr(patients_module, 'issues_collection', broken)
+            with pytest.raises(RuntimeError):
+                client.post('/patients/issue', headers=headers, content_type='multipart/form-data',
+                            data={'audio': (BytesIO(audio), 'a.wav'), 'video': (BytesIO(video), 'v.mp4')})
+        assert refs(audio) == 0 and refs(video) == 0
+        with monkeypatch.context() as m:
+            m.setattr(patients_module, 'reports_collection', broken)
+            with pytest.raises(RuntimeError):
+                client.post('/patients/report/upload', headers=headers, content_type='multipart/form-data',
+                            data={'file': (BytesIO(report), 'r.pdf')})
+        assert refs(report) == 0
+    finally:
+        for issue in app.db.issues.find({'user_id': user_id}):
+            app.blob_store.release(issue.get('video_filename'))
+        for report in app.db.reports.find({'user_id': user_id}):
+            app.blob_store.release(report['filename'])
+        app.db.issues.delete_many({'user_id': user_id})
+        app.db.reports.delete_many({'user_id': user_id})
+        app.db.patients.delete_one({'unique_id': user_id})
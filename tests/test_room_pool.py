@@ -0,0 +1,75 @@
+import datetime
+import mongomock
+import pytest
+from utils import hms
+from utils.room_pool import RoomPool
+from tests.fake_servers import FakeHMSServer
+
+@pytest.fixture(scope="module")
+def fake_hms():
+    server = FakeHMSServer().start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def hms_env(fake_hms, monkeypatch):
+    monkeypatch.setenv('HMS_ACCESS_KEY', 'test-access-key')
+    monkeypatch.setenv('HMS_SECRET', 'test-secret-that-is-long-enough-for-hs256')
+    monkeypatch.setenv('HMS_TEMPLATE_ID', 'template-1')
+    monkeypatch.setenv('HMS_API_BASE_URL', fake_hms.api_url)
+    monkeypatch.setenv('HMS_RETRY_BACKOFF', '0')
+    fake_hms.reset()
+    hms.reset_hms_client()
+    yield fake_hms
+    hms.reset_hms_client()
+
+@pytest.fixture
+def rooms():
+    return mongomock.MongoClient()['test_db']['video_rooms']
+
+def test_refill_tops_up_every_template(hms_env, rooms):
+    pool = RoomPool(rooms, size=3, template_ids=['template-1', 'template-2'])
+    assert pool.refill() == 6
+    assert pool.available_count('template-1') == 3
+    assert pool.available_count('template-2') == 3
+    # Pool already full: no more 100ms calls
+    calls = len(hms_env.requests)
+    assert pool.refill() == 0
+    assert len(hms_env.requests) == calls
+
+def test_claim_is_local_and_never_hands_out_a_room_twice(hms_env, rooms):
+    pool = RoomPool(rooms, size=2)
+    pool.refill()
+    calls = len(hms_env.requests)
+
+    first = pool.claim(doctor_id='D-1', patient_id='P-1')
+    second = pool.claim(doctor_id='D-2', patient_id='P-2')
+    assert first and second and first != second
+    assert pool.claim(doctor_id='D-3', patient_id='P-3') is None
+    assert len(hms_env.requests) == calls
+
+    room = rooms.find_one({'_id': first})
+    assert room['status'] == 'claimed'
+    assert room['claimed_by'] == {'doctor_id': 'D-1', 'patient_id': 'P-1'}
+
+def test_empty_pool_falls_back_to_on_demand_room(hms_env, rooms):
+    pool = RoomPool(rooms, size=1)
+    room_id = pool.claim_or_create('Call with Asha', doctor_id='D-1', patient_id='P-1')
+    assert room_id
+    assert rooms.find_one({'_id': room_id})['status'] == 'claimed'
+
+def test_expired_rooms_are_disabled_on_100ms(hms_env, rooms):
+    pool = RoomPool(rooms, size=2, room_ttl=3600)
+    pool.refill()
+    claimed = pool.claim(doctor_id='D-1', patient_id='P-1')
+    past = datetime.datetime.now(datetime.UTC) - datetime.timedelta(seconds=1)
+    rooms.update_many({}, {'$set': {'expires_at': past}})
+
+    assert pool.expire() == 2
+    assert {room_id for room_id, _ in hms_env.room_updates} == {doc['_id'] for doc in rooms.find()}
+    assert all(body == {'enabled': False} for _, body in hms_env.room_updates)
+    assert rooms.find_one({'_id': claimed})['status'] == 'expired'
+    # Expired rooms are never claimed; the next refill replaces them
+    assert pool.claim(doctor_id='D-2', patient_id='P-2') is None
+    assert pool.refill() == 2
+    assert pool.expire() == 0
@@ -0,0 +1,20 @@
+import random
+from utils.rules import EMERGENCY_RESPONSE, EMERGENCY_SYMPTOMS, FEATURE_TERMS, PROMPT_RULES
+
+TERMS = [(term.casefold(), ('emergency', concept)) for concept, terms in EMERGENCY_SYMPTOMS.items() for term in terms] + \
+        [(term.casefold(), ('feature', concept)) for concept, terms in FEATURE_TERMS.items() for term in terms]
+
+def test_overlapping_feature_term_does_not_hide_emergency():
+    # 'upload' ka 'd' hi 'dikhai nahi' ka pehla akshar hai
+    assert ('emergency', 'vision loss') in PROMPT_RULES.concepts('uploadikhai nahi de raha')
+    assert PROMPT_RULES.match('uploadikhai nahi de raha') == EMERGENCY_RESPONSE
+
+def test_concepts_match_substring_semantics():
+    """Same result as checking `term in text` for every term, on overlapping/concatenated terms."""
+    rng = random.Random(7)
+    words = [term for term, _ in TERMS]
+    for _ in range(5000):
+        text = ''.join(rng.choice(words)[rng.randint(0, 3):] + rng.choice(['', ' ', 'x'])
+                       for _ in range(rng.randint(1, 4)))
+        expected = {concept for term, concept in TERMS if term in text.casefold()}
+        assert PROMPT_RULES.concepts(text) == expected, text
@@ -0,0 +1,257 @@
+import io
+import os
+import mongomock
+import pytest
+import requests
+from utils.storage import BlobStore, stored_filenames
+
+class Upload:
+    """Minimal stand-in for werkzeug's FileStorage (filename + stream)."""
+    def __init__(self, data: bytes, filename: str):
+        self.stream = io.BytesIO(data)
+        self.filename = filename
+
+def make_store(tmp_path, chunk_size=4):
+    return BlobStore(str(tmp_path), mongomock.MongoClient().db.blobs, chunk_size=chunk_size)
+
+def test_duplicate_uploads_share_one_sharded_blob(tmp_path):
+    store = make_store(tmp_path)
+    first = store.save(Upload(b'same lab report', 'Report.PDF'))
+    second = store.save(Upload(b'same lab report', 'copy.pdf'))
+
+    assert first == second
+    assert first.endswith('.pdf')
+    digest = first[:64]
+    path = store.path_for(first)
+    assert path == os.path.join(str(tmp_path), digest[:2], digest[2:4], digest)
+    with open(path, 'rb') as f:
+        assert f.read() == b'same lab report'
+    assert store.collection.find_one({'_id': digest})['refs'] == 2
+    # Sirf ek blob file, koi leftover temp file nahi
+    blobs = [name for _, _, files in os.walk(tmp_path) for name in files]
+    assert blobs == [digest]
+
+def test_release_and_gc_remove_only_unreferenced_blobs(tmp_path):
+    store = make_store(tmp_path)
+    kept = store.save(Upload(b'kept', 'a.png'))
+    dropped = store.save(Upload(b'dropped', 'b.png'))
+    store.release(dropped)
+
+    assert store.gc(grace_seconds=3600) == 0   # grace period abhi khatam nahi hua
+    assert store.gc(grace_seconds=0) == 1
+    assert not os.path.exists(store.path_for(dropped))
+    assert os.path.exists(store.path_for(kept))
+
+def test_gc_during_reupload_does_not_lose_the_file(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    filename = store.save(Upload(b'lab report', 'a.pdf'))
+    store.release(filename)
+    path = store.path_for(filename)
+
+    # gc pass exactly between the re-upload's reference and its exists check
+    exists = store.backend.exists
+    def exists_during_gc(key):
+        assert store.gc(grace_seconds=0) == 0   # reference pehle hi lag chuka hai
+        return exists(key)
+    monkeypatch.setattr(store.backend, 'exists', exists_during_gc)
+    assert store.save(Upload(b'lab report', 'b.pdf')) == filename
+    assert os.path.exists(path) and store.collection.find_one({'_id': filename[:64]})['refs'] == 1
+
+def test_reupload_rewrites_file_when_refs_document_was_just_collected(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    filename = store.save(Upload(b'x-ray', 'a.png'))
+    # gc ne refs doc hata diya, file delete abhi baaki hai
+    store.collection.delete_one({'_id': filename[:64]})
+    writes = []
+    put_file = store.backend.put_file
+    monkeypatch.setattr(store.backend, 'put_file', lambda key, local: (writes.append(key), put_file(key, local)))
+    store.save(Upload(b'x-ray', 'b.png'))
+    assert writes == [store.key_for(filename)]
+    store.save(Upload(b'x-ray', 'c.png'))
+    assert len(writes) == 1   # doc ab hai aur file bhi - dobara nahi likhi
+
+def test_failed_blob_write_drops_its_reference(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    def broken(key, local):
+        raise OSError('disk full')
+    monkeypatch.setattr(store.backend, 'put_file', broken)
+    with pytest.raises(OSError):
+        store.save(Upload(b'lost', 'a.png'))
+    assert [doc['refs'] for doc in store.collection.find()] == [0]
+
+def test_path_for_rejects_traversal_and_keeps_legacy_names(tmp_path):
+    store = make_store(tmp_path)
+    assert store.path_for('../config.py') is None
+    assert store.path_for('.tmp') is None
+    assert store.path_for('9b376a4315f643db8b1c3dd80d4322e6.webm') == os.path.join(
+        str(tmp_path), '9b376a4315f643db8b1c3dd80d4322e6.webm')
+
+def test_stored_filenames_of_issue():
+    issue = {'audio_filename': 'a.webm', 'video_filename': None, 'prescription': {'image_filename': 'p.png'}}
+    assert stored_filenames(issue) == ['a.webm', 'p.png']
+
+def make_serving_app(tmp_path, **config):
+    from flask import Flask
+    from utils.storage import send_upload
+    app = Flask(__name__)
+    app.config.update(config)
+    store = make_store(tmp_path / 'uploads', chunk_size=1024)
+    filename = store.save(Upload(bytes(range(256)) * 8, 'clip.mp4'))
+
+    @app.route('/uploads/<path:name>')
+    def serve(name):
+        return send_upload(store, name)
+    return app.test_client(), filename
+
+def test_serving_etag_304_range_and_cache_headers(tmp_path):
+    client, filename = make_serving_app(tmp_path)
+    r = client.get(f'/uploads/{filename}')
+    assert r.status_code == 200
+    assert r.headers['ETag'] == f'"{filename[:64]}"'
+    assert r.headers['Cache-Control'] == 'private, max-age=31536000, immutable'
+    assert r.headers['Accept-Ranges'] == 'bytes'
+    r.close()
+
+    r = client.get(f'/uploads/{filename}', headers={'If-None-Match': f'"{filename[:64]}"'})
+    assert r.status_code == 304
+    assert r.data == b''
+
+    r = client.get(f'/uploads/{filename}', headers={'Range': 'bytes=256-511'})
+    assert r.status_code == 206
+    assert r.headers['Content-Range'] == 'bytes 256-511/2048'
+    assert r.data == bytes(range(256))
+    r.close()
+
+def test_serving_offloaded_to_front_proxy(tmp_path):
+    client, filename = make_serving_app(tmp_path, FILE_SERVE_MODE='x-accel-redirect', FILE_ACCEL_PREFIX='/internal/')
+    digest = filename[:64]
+    r = client.get(f'/uploads/{filename}')
+    assert r.status_code == 200
+    assert r.headers['X-Accel-Redirect'] == f'/internal/{digest[:2]}/{digest[2:4]}/{digest}'
+    assert r.headers['Content-Type'] == 'video/mp4'
+    assert r.data == b''
+
+    r = client.get(f'/uploads/{filename}', headers={'If-None-Match': f'"{digest}"'})
+    assert r.status_code == 304
+    assert 'X-Accel-Redirect' not in r.headers
+
+    client, filename = make_serving_app(tmp_path / 'sendfile', FILE_SERVE_MODE='x-sendfile')
+    r = client.get(f'/uploads/{filename}')
+    assert r.headers['X-Sendfile'].endswith(filename[:64])
+
+# --- Backends ---
+
+def make_gridfs_store(tmp_path, chunk_size=4):
+    import mongomock.gridfs
+    from utils.storage_backends import GridFSBackend
+    mongomock.gridfs.enable_gridfs_integration()
+    db = mongomock.MongoClient().db
+    return BlobStore(str(tmp_path), db.blobs, chunk_size=chunk_size, backend=GridFSBackend(db, chunk_size=chunk_size))
+
+def test_gridfs_backend_dedups_streams_and_collects(tmp_path):
+    store = make_gridfs_store(tmp_path)
+    first = store.save(Upload(b'same lab report', 'a.pdf'))
+    assert store.save(Upload(b'same lab report', 'b.pdf')) == first
+    assert store.path_for(first) is None
+    assert len(list(store.backend.fs.find({'filename': store.key_for(first)}))) == 1
+    stream, size = store.open(first)
+    assert size == 15 and stream.read() == b'same lab report'
+    # Spool directory khaali rehta hai
+    assert os.listdir(os.path.join(str(tmp_path), '.tmp')) == []
+
+    with store.local_copy(first) as path:
+        with open(path, 'rb') as f:
+            assert f.read() == b'same lab report'
+    assert not os.path.exists(path)
+
+    store.release(first)
+    store.release(first)
+    assert store.gc(grace_seconds=0) == 1
+    assert store.open(first) is None
+
+def test_gridfs_serving_streams_with_etag_and_ranges(tmp_path):
+    from flask import Flask
+    from utils.storage import send_upload
+    app = Flask(__name__)
+    store = make_gridfs_store(tmp_path, chunk_size=1024)
+    filename = store.save(Upload(bytes(range(256)) * 8, 'clip.mp4'))
+
+    @app.route('/uploads/<path:name>')
+    def serve(name):
+        return send_upload(store, name)
+    client = app.test_client()
+
+    r = client.get(f'/uploads/{filename}')
+    assert r.status_code == 200
+    assert r.data == bytes(range(256)) * 8
+    assert r.headers['ETag'] == f'"{filename[:64]}"'
+    assert r.headers['Content-Type'] == 'video/mp4'
+    assert client.get(f'/uploads/{filename}', headers={'If-None-Match': f'"{filename[:64]}"'}).status_code == 304
+    r = client.get(f'/uploads/{filename}', headers={'Range': 'bytes=256-511'})
+    assert r.status_code == 206 and r.data == bytes(range(256))
+    assert client.get('/uploads/' + '0' * 64 + '.mp4').status_code == 404
+
+def test_remote_backend_serves_legacy_files_and_migrates_local_blobs(tmp_path):
+    from flask import Flask
+    from utils.storage import send_upload
+    # STORAGE_BACKEND switch se pehle: ek legacy uuid file aur ek local content-addressed blob
+    legacy = '9b376a4315f643db8b1c3dd80d4322e6.webm'
+    (tmp_path / legacy).write_bytes(b'old voice note')
+    local_store = make_store(tmp_path)
+    blob = local_store.save(Upload(b'old lab report', 'r.pdf'))
+
+    store = make_gridfs_store(tmp_path)
+    store.collection = local_store.collection
+    assert store.open(legacy)[0].read() == b'old voice note'
+    assert store.open(blob) is None
+
+    app = Flask(__name__)
+
+    @app.route('/uploads/<path:name>')
+    def serve(name):
+        return send_upload(store, name)
+    client = app.test_client()
+    assert client.get(f'/uploads/{legacy}').data == b'old voice note'
+    assert client.get('/uploads/0' + legacy[1:]).status_code == 404
+
+    assert store.migrate_local_blobs() == 1
+    assert store.migrate_local_blobs() == 0   # dobara chalana safe
+    assert client.get(f'/uploads/{blob}').data == b'old lab report'
+
+def test_s3_backend_against_local_stand_in(tmp_path):
+    pytest.importorskip('boto3')
+    from flask import Flask
+    from tests.fake_servers import FakeS3Server
+    from utils.storage import send_upload
+    from utils.storage_backends import S3Backend
+    server = FakeS3Server().start()
+    try:
+        backend = S3Backend('uploads', endpoint_url=server.url, region='us-east-1', access_key_id='minio',
+                            secret_access_key='minio-secret', prefix='codecure', chunk_size=5 * 1024 * 1024)
+        store = BlobStore(str(tmp_path), mongomock.MongoClient().db.blobs, backend=backend)
+        filename = store.save(Upload(b'x-ray', 'scan.png'))
+        assert server.objects[('uploads', f"codecure/{store.key_for(filename)}")] == b'x-ray'
+        # Duplicate: sirf HEAD, koi naya PUT nahi
+        puts = sum(1 for method, _, _ in server.requests if method == 'PUT')
+        store.save(Upload(b'x-ray', 'again.png'))
+        assert sum(1 for method, _, _ in server.requests if method == 'PUT') == puts
+
+        app = Flask(__name__)
+        app.config['FILE_PRESIGN_TTL'] = 60
+
+        @app.route('/uploads/<path:name>')
+        def serve(name):
+            return send_upload(store, name)
+        r = app.test_client().get(f'/uploads/{filename}')
+        assert r.status_code == 302
+        assert r.headers['Location'].startswith(f"{server.url}/uploads/codecure/")
+        assert 'X-Amz-Signature=' in r.headers['Location']
+        assert r.headers['Cache-Control'] == 'private, max-age=30'
+        assert requests.get(r.headers['Location']).content == b'x-ray'
+
+        store.release(filename)
+        store.release(filename)
+        assert store.gc(grace_seconds=0) == 1
+        assert server.objects == {}
+    finally:
+        server.stop()
@@ -0,0 +1,79 @@
+import mongomock
+import pytest
+from utils import helpers
+from utils.indexes import ensure_indexes
+
+class FakeTranslator:
+    """Stands in for deep_translator.GoogleTranslator; records every network call."""
+    calls = []
+
+    def __init__(self, source, target):
+        self.target = target
+
+    def translate(self, text):
+        FakeTranslator.calls.append((text, self.target))
+        return f"[{self.target}] {text}"
+
+@pytest.fixture
+def translation_db(monkeypatch):
+    db = mongomock.MongoClient()['test_db']
+    ensure_indexes(db)
+    FakeTranslator.calls = []
+    monkeypatch.setattr(helpers, 'GoogleTranslator', FakeTranslator)
+    # monkeypatch teardown par app ke cache tiers wapas aa jaate hain
+    monkeypatch.setattr(helpers, '_translation_memory', helpers._translation_memory)
+    monkeypatch.setattr(helpers, '_translation_store', helpers._translation_store)
+    helpers.init_translation_cache(db['translation_cache'])
+    return db
+
+def test_memory_tier_then_shared_mongo_tier(translation_db):
+    assert helpers.free_translate('mujhe bukhar hai') == '[en] mujhe bukhar hai'
+    assert len(FakeTranslator.calls) == 1
+    doc = translation_db.translation_cache.find_one()
+    assert doc['translated'] == '[en] mujhe bukhar hai' and doc['target'] == 'en' and doc['created_at']
+
+    # Same process: memory tier, Mongo bhi nahi poocha jaata
+    shared_hits = helpers.translation_cache_stats()['shared_hits']
+    assert helpers.free_translate('  Mujhe   BUKHAR hai ') == '[en] mujhe bukhar hai'
+    assert len(FakeTranslator.calls) == 1
+    assert helpers.translation_cache_stats()['shared_hits'] == shared_hits
+
+    # Doosra worker (khaali memory tier): shared Mongo cache se milta hai, network nahi
+    helpers.init_translation_cache(translation_db['translation_cache'])
+    assert helpers.free_translate('mujhe bukhar hai') == '[en] mujhe bukhar hai'
+    assert len(FakeTranslator.calls) == 1
+    assert helpers.translation_cache_stats()['shared_hits'] == shared_hits + 1
+
+    # Alag target language ki alag entry
+    assert helpers.free_translate('mujhe bukhar hai', target_lang='pa') == '[pa] mujhe bukhar hai'
+    assert len(FakeTranslator.calls) == 2
+
+def test_translation_cache_has_ttl_index(translation_db):
+    indexes = translation_db.translation_cache.index_information()
+    assert indexes['created_at_ttl']['key'] == [('created_at', 1)]
+    assert indexes['created_at_ttl']['expireAfterSeconds'] == 30 * 24 * 3600
+
+@pytest.mark.parametrize('text', ['I have a fever since two days', 'Cough, cold & headache!'])
+def test_plain_english_skips_the_network(translation_db, text):
+    assert helpers.free_translate(text) == text
+    assert FakeTranslator.calls == []
+    assert translation_db.translation_cache.count_documents({}) == 0
+
+@pytest.mark.parametrize('text', ['pet mein dard hai', 'Mainu bukhar hai', 'sir dard ho raha', 'सिर दर्द'])
+def test_hinglish_and_non_ascii_text_is_translated(translation_db, text):
+    assert helpers.free_translate(text) == f"[en] {text}"
+    assert FakeTranslator.calls == [(text, 'en')]
+
+def test_english_is_translated_for_other_targets(translation_db):
+    assert helpers.free_translate('I have a fever', target_lang='hi') == '[hi] I have a fever'
+
+def test_failed_translation_returns_original_and_is_not_cached(translation_db, monkeypatch):
+    class DownTranslator(FakeTranslator):
+        def translate(self, text):
+            raise ConnectionError('translate.google.com unreachable')
+
+    monkeypatch.setattr(helpers, 'GoogleTranslator', DownTranslator)
+    assert helpers.free_translate('khansi hai') == 'khansi hai'
+    assert translation_db.translation_cache.count_documents({}) == 0
+    monkeypatch.setattr(helpers, 'GoogleTranslator', FakeTranslator)
+    assert helpers.free_translate('khansi hai') == '[en] khansi hai'
@@ -0,0 +1,102 @@
+import datetime
+import hashlib
+import io
+import mongomock
+import pytest
+from utils.storage import BlobStore
+from utils.uploads import (ResumableUploads, UploadError, UploadNotFound, UploadOffsetMismatch,
+                           ChunkChecksumMismatch, parse_content_range)
+
+VIDEO = bytes(range(256)) * 40   # 10240 bytes
+
+@pytest.fixture
+def uploads(tmp_path):
+    db = mongomock.MongoClient().db
+    store = BlobStore(str(tmp_path), db.blobs, chunk_size=1000)
+    return ResumableUploads(store, db.upload_sessions, chunk_size=4096, max_size=1024 * 1024)
+
+def send(uploads, upload_id, start, end, data=None, user='P-1', sha256=None):
+    body = VIDEO[start:end + 1] if data is None else data
+    return uploads.append(upload_id, user, f'bytes {start}-{end}/{len(VIDEO)}', io.BytesIO(body), sha256=sha256)
+
+def test_chunks_resume_and_assemble_into_one_blob(uploads):
+    session = uploads.create('P-1', 'Cough.MP4', len(VIDEO))
+    upload_id = session['_id']
+    assert send(uploads, upload_id, 0, 4095) == 4096
+    # Connection toota, client same chunk dobara bhejta hai -> current offset milta hai
+    with pytest.raises(UploadOffsetMismatch) as err:
+        send(uploads, upload_id, 0, 4095)
+    assert err.value.details['received'] == 4096
+    assert uploads.get(upload_id, 'P-1')['received'] == 4096
+
+    chunk = VIDEO[4096:8192]
+    assert send(uploads, upload_id, 4096, 8191, sha256=hashlib.sha256(chunk).hexdigest()) == 8192
+    with pytest.raises(UploadError):
+        uploads.complete(upload_id, 'P-1')   # abhi adhoora
+    assert send(uploads, upload_id, 8192, len(VIDEO) - 1) == len(VIDEO)
+
+    filename = uploads.complete(upload_id, 'P-1')
+    assert filename == hashlib.sha256(VIDEO).hexdigest() + '.mp4'
+    assert uploads.complete(upload_id, 'P-1') == filename   # retry safe
+    stream, size = uploads.store.open(filename)
+    assert size == len(VIDEO) and stream.read() == VIDEO
+    stream.close()
+    # Parts hat gaye, sirf blob bacha
+    assert list(uploads.store.collection.find({}, {'refs': 1})) == [{'_id': filename[:64], 'refs': 1}]
+
+    session = uploads.take(upload_id, 'P-1')
+    assert session['filename'] == filename and session['original_name'] == 'Cough.MP4'
+    with pytest.raises(UploadNotFound):
+        uploads.take(upload_id, 'P-1')
+
+def test_stale_assembly_is_taken_over(uploads):
+    upload_id = uploads.create('P-1', 'a.mp4', len(VIDEO))['_id']
+    send(uploads, upload_id, 0, len(VIDEO) - 1)
+    # Pichla complete assembly ke beech mar gaya: session 'assembling' mein atka hai
+    now = datetime.datetime.now(datetime.UTC)
+    uploads.collection.update_one({'_id': upload_id}, {'$set': {
+        'status': 'assembling', 'assembling_at': now, 'assembly_id': 'dead-worker'}})
+    with pytest.raises(UploadOffsetMismatch):
+        uploads.complete(upload_id, 'P-1')   # abhi timeout nahi hua
+
+    uploads.collection.update_one({'_id': upload_id}, {'$set': {
+        'assembling_at': now - datetime.timedelta(seconds=uploads.assembly_timeout + 1)}})
+    filename = uploads.complete(upload_id, 'P-1')
+    assert filename == hashlib.sha256(VIDEO).hexdigest() + '.mp4'
+    session = uploads.collection.find_one({'_id': upload_id})
+    assert session['status'] == 'complete' and 'assembly_id' not in session
+    assert uploads.store.collection.find_one({'_id': filename[:64]})['refs'] == 1
+
+def test_bad_chunks_are_rejected_and_discarded(uploads, tmp_path):
+    upload_id = uploads.create('P-1', 'a.webm', len(VIDEO))['_id']
+    with pytest.raises(ChunkChecksumMismatch):
+        send(uploads, upload_id, 0, 999, sha256='0' * 64)
+    with pytest.raises(UploadError):
+        send(uploads, upload_id, 0, 999, data=VIDEO[:10])   # body Content-Range se chhota
+    with pytest.raises(UploadOffsetMismatch):
+        send(uploads, upload_id, 1000, 1999)
+    with pytest.raises(UploadNotFound):
+        send(uploads, upload_id, 0, 999, user='P-2')
+    assert uploads.get(upload_id, 'P-1')['received'] == 0
+    assert not any(path.is_file() for path in tmp_path.rglob('*'))
+
+def test_content_range_and_size_validation(uploads):
+    assert parse_content_range('bytes 0-9/10') == (0, 9, 10)
+    for header in (None, 'bytes 5-4/10', 'bytes 0-10/10', 'items 0-1/2'):
+        with pytest.raises(UploadError):
+            parse_content_range(header)
+    with pytest.raises(UploadError):
+        uploads.create('P-1', 'huge.mp4', 10 * 1024 * 1024)
+
+def test_gc_removes_expired_sessions_and_unattached_blobs(uploads):
+    complete_id = uploads.create('P-1', 'a.mp4', len(VIDEO))['_id']
+    send(uploads, complete_id, 0, len(VIDEO) - 1)
+    filename = uploads.complete(complete_id, 'P-1')
+    open_id = uploads.create('P-1', 'b.mp4', len(VIDEO))['_id']
+    send(uploads, open_id, 0, 4095)
+
+    past = datetime.datetime.now(datetime.UTC) - datetime.timedelta(seconds=1)
+    uploads.collection.update_many({}, {'$set': {'expires_at': past}})
+    assert uploads.gc() == 2
+    assert uploads.collection.count_documents({}) == 0
+    assert uploads.store.collection.find_one({'_id': filename[:64]})['refs'] == 0
@@ -98,3 +98,16 @@ def test_patient_cannot_create_room(registered_patient_details):
     r = requests.post(f'{BASE}/video/create-room', headers=headers, json=payload)
     assert r.status_code == 403 # Forbidden
     assert r.json()['error'] == "Access forbidden: Doctor access required"
+
+def test_reconnect_reuses_room_and_patient_token_requires_session(registered_patient_details, approved_doctor_token):
+    """A second call start for the same pair returns the same room; unknown rooms are rejected for patients."""
+    doc_headers = {'Authorization': f'Bearer {approved_doctor_token}', 'Content-Type': 'application/json'}
+    doc_payload = {'patient_id': registered_patient_details['unique_id']}
+    first = requests.post(f'{BASE}/video/create-room', headers=doc_headers, json=doc_payload)
+    second = requests.post(f'{BASE}/video/create-room', headers=doc_headers, json=doc_payload)
+    assert first.status_code == 200 and second.status_code == 200
+    assert first.json()['room_id'] == second.json()['room_id']
+
+    patient_headers = {'Authorization': f'Bearer {registered_patient_details["token"]}', 'Content-Type': 'application/json'}
+    r = requests.post(f'{BASE}/video/patient/auth-token', headers=patient_headers, json={'room_id': 'not-a-real-room'})
+    assert r.status_code == 404
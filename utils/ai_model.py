@@ -1,45 +1,173 @@
 import os
-from openai import OpenAI
+import hashlib
+import threading
+from openai import OpenAI, Timeout
+from utils.cache import TTLCache, normalize_text
+from utils.metrics import stage, timed
+
+AI_MODEL = "gpt-4o-mini"  # Ek fast aur powerful model
+
+# ==============================================================================
+#  SHARED OPENAI CLIENT
+# ==============================================================================
+# Ek hi client poore process mein reuse hota hai, taaki HTTP connection pool aur
+# TLS session har call par dobara na bane. Timeouts aur retries .env se aate hain.
+_client = None
+_client_lock = threading.Lock()
+_response_cache = None
+
+def _settings() -> dict:
+    return {
+        'connect_timeout': float(os.getenv('OPENAI_CONNECT_TIMEOUT', '5')),
+        'read_timeout': float(os.getenv('OPENAI_READ_TIMEOUT', '30')),
+        'max_retries': int(os.getenv('OPENAI_MAX_RETRIES', '2')),
+        'cache_size': int(os.getenv('AI_RESPONSE_CACHE_SIZE', '512')),
+        'cache_ttl': float(os.getenv('AI_RESPONSE_CACHE_TTL', '3600')),
+    }
+
+def get_ai_client():
+    """Returns the process-wide OpenAI client, creating it on first use. None if no API key is set."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # 1. API key ko .env file se load karta hai
+                api_key = os.getenv('OPENAI_API_KEY')
+                if not api_key:
+                    return None
+                settings = _settings()
+                # OPENAI_BASE_URL set ho toh SDK usi server ko call karta hai (local fake server ke liye)
+                _client = OpenAI(
+                    api_key=api_key,
+                    timeout=Timeout(settings['read_timeout'], connect=settings['connect_timeout']),
+                    max_retries=settings['max_retries'],
+                )
+    return _client
+
+def get_response_cache():
+    """Returns the response cache, or None when AI_RESPONSE_CACHE_SIZE is 0."""
+    global _response_cache
+    if _response_cache is None:
+        # Client jaisa hi lock - do threads alag cache na bana dein (ek ki entries kho jaati)
+        with _client_lock:
+            if _response_cache is None:
+                settings = _settings()
+                if settings['cache_size'] <= 0:
+                    return None
+                _response_cache = TTLCache(maxsize=settings['cache_size'], ttl=settings['cache_ttl'])
+    return _response_cache
+
+def reset_ai_client():
+    """Drops the shared client and response cache so they are rebuilt from the current environment."""
+    global _client, _response_cache
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _response_cache = None
+
+def ai_cache_stats() -> dict:
+    cache = get_response_cache()
+    return cache.stats() if cache is not None else {'enabled': False}
+
+def _cache_key(prompt_text: str, system_instruction: str) -> str:
+    return hashlib.sha256(f"{system_instruction}\x00{normalize_text(prompt_text)}".encode('utf-8')).hexdigest()
 
 # ==============================================================================
 #  AI RESPONSE FUNCTION (USING OPENAI - CHATGPT)
 # ==============================================================================
+@timed('ai_response')
 def get_ai_response(prompt_text: str, system_instruction: str) -> dict:
     """
     Sends a prompt and a system instruction to the OpenAI API (ChatGPT).
     Returns a dictionary with the response or an error.
+    Identical (system_instruction, normalized prompt) pairs are served from a TTL cache.
     """
-    # 1. API key ko .env file se load karta hai
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
+    client = get_ai_client()
+    if client is None:
         return {"error": "OPENAI_API_KEY is not set in the .env file."}
 
-    try:
-        # 2. OpenAI client ko API key ke saath initialize karta hai
-        client = OpenAI(api_key=api_key)
+    cache = get_response_cache()
+    key = _cache_key(prompt_text, system_instruction) if cache is not None else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return {"response": cached}
 
-        # 3. OpenAI API ko call karta hai
+    try:
+        # OpenAI API ko call karta hai
         #    - `system_instruction` -> role: "system" (AI ke liye rules)
         #    - `prompt_text` -> role: "user" (User ka sawaal)
-        chat_completion = client.chat.completions.create(
-            model="gpt-4o-mini",  # Ek fast aur powerful model
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_instruction,
-                },
-                {
-                    "role": "user",
-                    "content": prompt_text,
-                },
-            ],
-        )
-        
-        # 4. AI se mila saaf-suthra jawab waapis bhejta hai
-        response_text = chat_completion.choices[0].message.content
-        return {"response": response_text}
+        with stage('ai_completion'):
+            chat_completion = client.chat.completions.create(
+                model=AI_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": system_instruction,
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt_text,
+                    },
+                ],
+            )
 
+        # AI se mila saaf-suthra jawab waapis bhejta hai
+        response_text = chat_completion.choices[0].message.content
     except Exception as e:
         # Agar koi error aaye, toh error message bhejta hai
         print(f"OpenAI API call failed: {e}")
-        return {"error": f"Failed to get AI response: {e}"}
\ No newline at end of file
+        return {"error": f"Failed to get AI response: {e}"}
+
+    if cache is not None and response_text:
+        cache.set(key, response_text)
+    return {"response": response_text}
+
+class AIResponseError(Exception):
+    """Raised by stream_ai_response when the model call cannot be made or fails mid-stream."""
+
+def stream_ai_response(prompt_text: str, system_instruction: str):
+    """
+    Streaming variant of get_ai_response: yields text deltas as they arrive from the
+    chat completions stream. A cached answer is yielded as one delta.
+    The full answer is cached once the stream completes. Raises AIResponseError on failure.
+    """
+    client = get_ai_client()
+    if client is None:
+        raise AIResponseError("OPENAI_API_KEY is not set in the .env file.")
+
+    cache = get_response_cache()
+    key = _cache_key(prompt_text, system_instruction) if cache is not None else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
+    try:
+        # Stream khulne tak (response headers) ka time ~ upstream time-to-first-byte
+        with stage('ai_stream_open'):
+            stream = client.chat.completions.create(
+                model=AI_MODEL,
+                messages=[
+                    {"role": "system", "content": system_instruction},
+                    {"role": "user", "content": prompt_text},
+                ],
+                stream=True,
+            )
+        with stream:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+    except Exception as e:
+        print(f"OpenAI API streaming call failed: {e}")
+        raise AIResponseError(f"Failed to get AI response: {e}")
+
+    if cache is not None and parts:
+        cache.set(key, ''.join(parts))
@@ -1,7 +1,66 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from werkzeug.security import generate_password_hash, check_password_hash
 
+# ==============================================================================
+#  PASSWORD HASHING (PROCESS POOL)
+# ==============================================================================
+# scrypt/pbkdf2 jaan-boojh kar CPU-heavy hain. Request thread par chalane se login burst
+# GIL par serialize ho jaata hai aur baaki endpoints ruk jaate hain. Isliye hashing ek
+# bounded process pool mein hoti hai; request thread sirf future ka wait karta hai (GIL free).
+# PASSWORD_HASH_WORKERS=0 -> pool nahi, hashing inline (tests / scripts).
+
+DEFAULT_HASH_METHOD = 'scrypt'
+
+_method = DEFAULT_HASH_METHOD
+_method_prefix = None   # e.g. 'scrypt:32768:8:1' - stored hash ka parameter part
+_workers = 0
+_pool = None
+_lock = threading.Lock()
+
+def init_password_hashing(method: str = DEFAULT_HASH_METHOD, workers: int = 0):
+    """Sets the hash method/cost (werkzeug format, e.g. 'scrypt:32768:8:1', 'pbkdf2:sha256:600000') and pool size."""
+    global _method, _method_prefix, _workers, _pool
+    with _lock:
+        old_pool, _pool = _pool, None
+        _method, _method_prefix, _workers = method, None, max(0, int(workers))
+    if old_pool is not None:
+        old_pool.shutdown(wait=False)
+
+def _get_pool():
+    global _pool
+    if _workers <= 0:
+        return None
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                # 'spawn': MongoClient/threads wale process ko fork karna safe nahi hai
+                _pool = ProcessPoolExecutor(max_workers=_workers, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+def _run(func, *args):
+    pool = _get_pool()
+    if pool is None:
+        return func(*args)
+    return pool.submit(func, *args).result()
+
 def hash_password(password: str) -> str:
-    return generate_password_hash(password)
+    return _run(generate_password_hash, password, _method)
 
 def verify_password(stored_hash: str, password: str) -> bool:
-    return check_password_hash(stored_hash, password)
+    if not stored_hash:
+        return False
+    return _run(check_password_hash, stored_hash, password)
+
+def current_hash_prefix() -> str:
+    """Parameter part ('scrypt:32768:8:1') that hashes made with the configured method start with."""
+    global _method_prefix
+    if _method_prefix is None:
+        # 'scrypt' jaise short names ko werkzeug full parameters mein expand karta hai
+        _method_prefix = _run(generate_password_hash, '', _method).split('$', 1)[0]
+    return _method_prefix
+
+def needs_rehash(stored_hash: str) -> bool:
+    """True if the stored hash was made with a different method/cost than the configured one."""
+    return stored_hash.split('$', 1)[0] != current_hash_prefix()
@@ -0,0 +1,92 @@
+import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from utils.metrics import REGISTRY, Counter
+
+# ==============================================================================
+#  CALL SESSIONS (ROOM REUSE PER DOCTOR-PATIENT PAIR)
+# ==============================================================================
+# Har /video/create-room ek `call_sessions` doc se record hota hai. Kharab network par
+# doctor baar baar "call start" dabaye (reconnect storm) to naya room nahi banta - usi
+# pair ka active session REUSE_WINDOW ke andar use hua ho to wahi room lauta diya jaata hai.
+# Patient ka auth-token request bhi isi collection se validate hota hai: room_id + patient_id
+# par ek indexed lookup, jo session ka last_used_at bhi aage badhata hai.
+#
+# Ek pair ka sirf ek active session: (doctor_id, patient_id, active) par unique partial index
+# (active: true). Do concurrent requests dono naya room banayein to doosra insert
+# DuplicateKeyError deta hai aur pehle wala session lauta diya jaata hai. Index na ho to
+# create_app startup par hi fail hota hai (utils/indexes.py `missing_unique_indexes`).
+
+CALL_SESSION_STARTS = REGISTRY.register(Counter(
+    'codecure_call_sessions_total', 'Doctor call starts, by outcome (new session or reused room).', ('outcome',)))
+
+class CallSessions:
+    def __init__(self, collection, reuse_window: float = 30 * 60, call_ttl: float = 3 * 3600):
+        self.collection = collection
+        self.reuse_window = reuse_window
+        self.call_ttl = call_ttl
+
+    def _reusable(self, doctor_id, patient_id, now) -> dict:
+        return {'doctor_id': doctor_id, 'patient_id': patient_id, 'active': True,
+                'last_used_at': {'$gt': now - datetime.timedelta(seconds=self.reuse_window)},
+                'ends_at': {'$gt': now}}
+
+    def start(self, doctor_id: str, patient_id: str, create_room):
+        """
+        Room id for a doctor-patient call: the active session's room if it was used within
+        the reuse window, otherwise `create_room()` (pool claim / 100ms) in a new session.
+        Returns (room_id, reused); room_id is None if no room could be created.
+        """
+        now = _now()
+        session = self.collection.find_one_and_update(
+            self._reusable(doctor_id, patient_id, now), {'$set': {'last_used_at': now}},
+            projection={'room_id': 1}, return_document=ReturnDocument.AFTER
+        )
+        if session:
+            CALL_SESSION_STARTS.inc('reused')
+            return session['room_id'], True
+
+        # Is pair ke stale sessions band karo (fresh wale ko concurrent request ne abhi banaya ho sakta hai)
+        self.collection.update_many(
+            {'doctor_id': doctor_id, 'patient_id': patient_id, 'active': True,
+             '$or': [{'last_used_at': {'$lte': now - datetime.timedelta(seconds=self.reuse_window)}},
+                     {'ends_at': {'$lte': now}}]},
+            {'$set': {'active': False, 'ended_at': now}}
+        )
+        room_id = create_room()
+        if not room_id:
+            return None, False
+        try:
+            self.collection.insert_one({
+                'doctor_id': doctor_id, 'patient_id': patient_id, 'room_id': room_id, 'active': True,
+                'created_at': now, 'last_used_at': now, 'ends_at': now + datetime.timedelta(seconds=self.call_ttl),
+            })
+        except DuplicateKeyError:
+            # Concurrent request jeet gayi - uska room use karo (hamara pool room apne TTL par expire hoga)
+            session = self.collection.find_one(
+                {'doctor_id': doctor_id, 'patient_id': patient_id, 'active': True}, {'room_id': 1})
+            if session:
+                CALL_SESSION_STARTS.inc('reused')
+                return session['room_id'], True
+            raise
+        CALL_SESSION_STARTS.inc('new')
+        return room_id, False
+
+    def touch_for_patient(self, room_id: str, patient_id: str) -> bool:
+        """True if `room_id` belongs to an active, unexpired session of `patient_id` (one indexed lookup)."""
+        now = _now()
+        session = self.collection.find_one_and_update(
+            {'room_id': room_id, 'patient_id': patient_id, 'active': True, 'ends_at': {'$gt': now}},
+            {'$set': {'last_used_at': now}}, projection={'_id': 1}
+        )
+        return session is not None
+
+    def close_expired(self) -> int:
+        """Deactivates sessions past their call TTL. Returns the number closed."""
+        now = _now()
+        result = self.collection.update_many({'active': True, 'ends_at': {'$lte': now}},
+                                             {'$set': {'active': False, 'ended_at': now}})
+        return result.modified_count
+
+def _now():
+    return datetime.datetime.now(datetime.UTC)
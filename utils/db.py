@@ -0,0 +1,11 @@
+from pymongo import MongoClient
+import certifi
+
+def create_mongo_client(uri: str, **kwargs) -> MongoClient:
+    """
+    Builds a MongoClient for `uri`. Atlas (mongodb+srv://) connections use certifi's
+    CA bundle (SSL fix); local/throwaway mongod URIs connect as-is.
+    """
+    if uri.startswith('mongodb+srv://'):
+        kwargs.setdefault('tlsCAFile', certifi.where())
+    return MongoClient(uri, **kwargs)
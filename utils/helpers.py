@@ -1,14 +1,19 @@
 import os
-import uuid
+import tempfile
 import time
 import random
 import hmac
 import hashlib
 import json
+import re
+import threading
+import datetime
 from base64 import b64encode
 from deep_translator import GoogleTranslator
 import speech_recognition as sr
 from pydub import AudioSegment
+from utils.cache import TTLCache, normalize_text
+from utils.metrics import stage, timed
 
 # --- Important Setup Note ---
 # These functions use free libraries. Install them using pip:
@@ -16,21 +21,109 @@ from pydub import AudioSegment
 #
 # For audio conversion, you also need ffmpeg installed on your system.
 
+# --- Translation cache ---
+# Tier 1: in-process LRU + TTL. Tier 2: shared Mongo collection (init_translation_cache se set hota hai).
+_translation_memory = TTLCache(maxsize=4096, ttl=6 * 3600)
+_translation_store = None
+_translation_counters = {'shared_hits': 0, 'shared_misses': 0, 'skipped_english': 0, 'network_calls': 0}
+_translation_counters_lock = threading.Lock()
+
+# Romanized Hindi/Punjabi words - inke hone par ASCII text ko bhi English nahi maana jaata
+_HINGLISH_MARKERS = {
+    'hai', 'hain', 'mujhe', 'mera', 'meri', 'mere', 'nahi', 'nahin', 'kya', 'kaise', 'kyun', 'raha', 'rahi',
+    'bahut', 'dard', 'bukhar', 'khansi', 'mein', 'aur', 'tha', 'thi', 'ho', 'gaya', 'gayi', 'karna', 'karo',
+    'chahiye', 'haan', 'ji', 'sir', 'pet', 'se', 'ka', 'ki', 'ke', 'ko', 'hoon', 'hun', 'mainu', 'menu', 'ne',
+}
+_WORD_RE = re.compile(r"[a-z']+")
+
+def init_translation_cache(collection, memory_size: int = 4096, memory_ttl: float = 6 * 3600):
+    """Configures the translation cache tiers. `collection` is the shared Mongo cache (or None)."""
+    global _translation_memory, _translation_store
+    _translation_memory = TTLCache(maxsize=memory_size, ttl=memory_ttl)
+    _translation_store = collection
+
+def translation_cache_stats() -> dict:
+    """Hit/miss counters for both translation cache tiers."""
+    with _translation_counters_lock:
+        counters = dict(_translation_counters)
+    return {'memory': _translation_memory.stats(), **counters}
+
+def _count(name: str):
+    with _translation_counters_lock:
+        _translation_counters[name] += 1
+
+def _looks_like_english(text: str) -> bool:
+    """Plain ASCII text with no common romanized Hindi/Punjabi words."""
+    if not text.isascii():
+        return False
+    return not any(word in _HINGLISH_MARKERS for word in _WORD_RE.findall(text.lower()))
+
+def _translation_key(normalized: str, target_lang: str) -> str:
+    return hashlib.sha256(f"{target_lang}\x00{normalized}".encode('utf-8')).hexdigest()
+
+@timed('translate')
 def free_translate(text: str, target_lang: str = 'en') -> str:
     """
     Translates text using the more reliable deep-translator library.
     It automatically detects the source language.
+    Results are cached (in-process LRU, then the shared Mongo cache); English text skips the network.
     """
+    if not text or not text.strip():
+        return text
+    if target_lang == 'en' and _looks_like_english(text):
+        _count('skipped_english')
+        return text
+
+    key = _translation_key(normalize_text(text), target_lang)
+    cached = _translation_memory.get(key)
+    if cached is not None:
+        return cached
+
+    if _translation_store is not None:
+        try:
+            doc = _translation_store.find_one({'_id': key}, {'translated': 1})
+        except Exception as e:
+            print(f"Translation cache lookup failed: {e}")
+            doc = None
+        if doc:
+            _count('shared_hits')
+            _translation_memory.set(key, doc['translated'])
+            return doc['translated']
+        _count('shared_misses')
+
     try:
         # Automatically detects the source language ('auto')
-        translated_text = GoogleTranslator(source='auto', target=target_lang).translate(text)
-        # Return the translated text, or the original if translation returns None
-        return translated_text if translated_text else text
+        _count('network_calls')
+        with stage('translate_network'):
+            translated_text = GoogleTranslator(source='auto', target=target_lang).translate(text)
     except Exception as e:
         print(f"Translation failed with deep-translator: {e}")
-        # Fallback to returning the original text if any error occurs
+        # Fallback to returning the original text if any error occurs (not cached)
         return text
+    if not translated_text:
+        # Return the original if translation returns None
+        return text
+
+    _translation_memory.set(key, translated_text)
+    if _translation_store is not None:
+        try:
+            _translation_store.update_one(
+                {'_id': key},
+                {'$set': {'target': target_lang, 'translated': translated_text,
+                          'created_at': datetime.datetime.now(datetime.UTC)}},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"Translation cache write failed: {e}")
+    return translated_text
 
+# free_audio_to_text inhe transcript ki jagah lautata hai; background job inhe 'failed' maanta hai
+TRANSCRIPTION_UNCLEAR = "[Could not understand audio]"
+TRANSCRIPTION_SERVICE_ERROR = "[Speech service error]"
+TRANSCRIPTION_PROCESSING_FAILED = "[Audio processing failed]"
+TRANSCRIPTION_FAILURES = (TRANSCRIPTION_UNCLEAR, TRANSCRIPTION_SERVICE_ERROR, TRANSCRIPTION_PROCESSING_FAILED)
+
+@timed('audio_to_text')
 def free_audio_to_text(audio_path: str, language_code: str) -> str:
     """
     Transcribes an audio file using the free SpeechRecognition library.
@@ -41,26 +134,30 @@ def free_audio_to_text(audio_path: str, language_code: str) -> str:
 
     try:
         # Convert the original audio to a compatible WAV format
-        sound = AudioSegment.from_file(audio_path)
-        wav_path = audio_path + ".wav"
-        sound.export(wav_path, format="wav")
+        with stage('audio_decode'):
+            sound = AudioSegment.from_file(audio_path)
+            # Alag temp file: dedup ke baad ek hi blob do jobs mein transcribe ho sakta hai
+            fd, wav_path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            sound.export(wav_path, format="wav")
 
         # Open and process the temporary WAV file
         with sr.AudioFile(wav_path) as source:
             audio_data = recognizer.record(source)
         
         # Now that the file is closed, recognize the speech
-        text = recognizer.recognize_google(audio_data, language=language_code)
+        with stage('speech_recognition'):
+            text = recognizer.recognize_google(audio_data, language=language_code)
         return text
 
     except sr.UnknownValueError:
-        return "[Could not understand audio]"
+        return TRANSCRIPTION_UNCLEAR
     except sr.RequestError as e:
         print(f"Speech recognition service request failed; {e}")
-        return "[Speech service error]"
+        return TRANSCRIPTION_SERVICE_ERROR
     except Exception as e:
         print(f"An error occurred during audio processing: {e}")
-        return "[Audio processing failed]"
+        return TRANSCRIPTION_PROCESSING_FAILED
     finally:
         # Clean up the temporary WAV file if it exists
         if wav_path and os.path.exists(wav_path):
@@ -69,16 +166,6 @@ def free_audio_to_text(audio_path: str, language_code: str) -> str:
             except OSError as e:
                 print(f"Error removing temporary file {wav_path}: {e}")
 
-def save_file_and_get_name(upload_folder: str, file_storage) -> str:
-    """
-    Saves an uploaded file with a unique name and returns the filename.
-    """
-    ext = os.path.splitext(file_storage.filename)[1]
-    filename = f"{uuid.uuid4().hex}{ext.lower()}"
-    path = os.path.join(upload_folder, filename)
-    file_storage.save(path)
-    return filename
-
 def generate_zego_token(app_id: int, server_secret: str, user_id: str, effective_time_in_seconds: int = 3600):
     """Generates a secure token for ZegoCloud."""
     if not isinstance(app_id, int):
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+import uuid
+import jwt
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.metrics import timed, stage
+
+# ==============================================================================
+#  100MS CLIENT (SHARED SESSION + CACHED MANAGEMENT TOKEN)
+# ==============================================================================
+# Ek hi requests.Session poore process mein reuse hota hai (keep-alive, connection pool),
+# har request par connect/read timeout lagta hai aur 429/5xx/connection errors par
+# backoff ke saath limited retry hota hai. Management token ek baar sign hokar cache
+# hota hai aur expiry se thoda pehle refresh hota hai. Settings .env se aati hain;
+# HMS_API_BASE_URL badal kar tests/benchmarks local fake server use karte hain.
+
+_session = None
+_session_lock = threading.Lock()
+_management_token = None          # (token, expires_at)
+_token_lock = threading.Lock()
+
+def _settings() -> dict:
+    return {
+        'access_key': os.getenv('HMS_ACCESS_KEY'),
+        'secret': os.getenv('HMS_SECRET'),
+        'template_id': os.getenv('HMS_TEMPLATE_ID'),
+        'base_url': os.getenv('HMS_API_BASE_URL', 'https://api.100ms.live/v2').rstrip('/'),
+        'connect_timeout': float(os.getenv('HMS_CONNECT_TIMEOUT', '3')),
+        'read_timeout': float(os.getenv('HMS_READ_TIMEOUT', '10')),
+        'max_retries': int(os.getenv('HMS_MAX_RETRIES', '2')),
+        'retry_backoff': float(os.getenv('HMS_RETRY_BACKOFF', '0.3')),
+        'pool_size': int(os.getenv('HMS_POOL_SIZE', '10')),
+        'token_ttl': int(os.getenv('HMS_MANAGEMENT_TOKEN_TTL', str(24 * 3600))),
+        'token_refresh_margin': int(os.getenv('HMS_MANAGEMENT_TOKEN_REFRESH', '300')),
+    }
+
+def is_configured() -> bool:
+    settings = _settings()
+    return bool(settings['access_key'] and settings['secret'] and settings['template_id'])
+
+def default_template_id():
+    return _settings()['template_id']
+
+def get_hms_session() -> requests.Session:
+    """Returns the process-wide pooled session for the 100ms API, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                settings = _settings()
+                # POST /rooms bhi retry hota hai: 100ms same naam wale room ke liye existing room lauta deta hai
+                retry = Retry(
+                    total=settings['max_retries'], connect=settings['max_retries'], read=settings['max_retries'],
+                    status=settings['max_retries'], backoff_factor=settings['retry_backoff'],
+                    status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset({'GET', 'POST'}),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings['pool_size'], max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+def reset_hms_client():
+    """Drops the shared session and cached management token (rebuilt from the current environment)."""
+    global _session, _management_token
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+    with _token_lock:
+        _management_token = None
+
+def _sign(payload: dict, settings: dict) -> str:
+    now = int(time.time())
+    payload.update({'access_key': settings['access_key'], 'version': 2, 'jti': str(uuid.uuid4()),
+                    'iat': now, 'nbf': now})
+    return jwt.encode(payload, settings['secret'], algorithm='HS256')
+
+@timed('hms_management_token')
+def get_management_token():
+    """Cached JWT for the 100ms Management API; re-signed shortly before it expires."""
+    global _management_token
+    settings = _settings()
+    if not settings['access_key'] or not settings['secret']:
+        print("DEBUG: HMS_ACCESS_KEY or HMS_SECRET is missing in .env file.")
+        return None
+    with _token_lock:
+        now = time.time()
+        if _management_token is None or _management_token[1] - settings['token_refresh_margin'] <= now:
+            expires_at = int(now) + settings['token_ttl']
+            token = _sign({'type': 'management', 'exp': expires_at}, settings)
+            _management_token = (token, expires_at)
+        return _management_token[0]
+
+@timed('hms_create_room')
+def create_room(name: str, description: str = 'One-on-one telemedicine call', template_id: str = None):
+    """Creates a room on the 100ms server and returns its id (None on failure)."""
+    settings = _settings()
+    management_token = get_management_token()
+    if not management_token:
+        return None
+    template_id = template_id or settings['template_id']
+    if not template_id:
+        print("DEBUG: HMS_TEMPLATE_ID is missing in .env file.")
+        return None
+
+    headers = {'Authorization': f'Bearer {management_token}', 'Content-Type': 'application/json'}
+    payload = {'name': name, 'description': description, 'template_id': template_id}
+    try:
+        with stage('hms_create_room_http'):
+            res = get_hms_session().post(f"{settings['base_url']}/rooms", json=payload, headers=headers,
+                                         timeout=(settings['connect_timeout'], settings['read_timeout']))
+        if res.status_code != 200:
+            print(f"--- 100ms ERROR (Room Creation) ---\nSTATUS: {res.status_code}\nBODY: {res.text}\n-------------------")
+        res.raise_for_status()
+        return res.json().get('id')
+    except requests.exceptions.RequestException as e:
+        print(f"Error creating 100ms room: {e}")
+        return None
+
+@timed('hms_disable_room')
+def disable_room(room_id: str) -> bool:
+    """Disables a room on the 100ms server so nobody can join it any more."""
+    settings = _settings()
+    management_token = get_management_token()
+    if not management_token:
+        return False
+    headers = {'Authorization': f'Bearer {management_token}', 'Content-Type': 'application/json'}
+    try:
+        res = get_hms_session().post(f"{settings['base_url']}/rooms/{room_id}", json={'enabled': False},
+                                     headers=headers, timeout=(settings['connect_timeout'], settings['read_timeout']))
+        res.raise_for_status()
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"Error disabling 100ms room {room_id}: {e}")
+        return False
+
+@timed('hms_auth_token')
+def get_auth_token(user_id, room_id, role):
+    """
+    Generates a short-lived Auth Token JWT for a user to join a room directly.
+    This does NOT make an API call, it creates the token locally as per 100ms docs.
+    """
+    settings = _settings()
+    if not settings['access_key'] or not settings['secret']:
+        print("DEBUG: HMS_ACCESS_KEY or HMS_SECRET is missing in .env file.")
+        return None
+    try:
+        return _sign({'room_id': room_id, 'user_id': user_id, 'role': role, 'type': 'app',
+                      'exp': int(time.time()) + (24 * 3600)}, settings)   # 24 hours validity
+    except Exception as e:
+        print(f"Error generating 100ms auth token: {e}")
+        return None
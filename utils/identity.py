@@ -0,0 +1,55 @@
+import threading
+from utils.cache import TTLCache
+
+# ==============================================================================
+#  PATIENT IDENTITY
+# ==============================================================================
+# Login par JWT mein role/name claims daale jaate hain, aur active patient IDs ka ek
+# chhota TTL cache rakha jaata hai. Authenticated routes ko "user exists?" check ke liye
+# poora patient document (password_hash, profile) fetch nahi karna padta - common case
+# mein koi Mongo round trip nahi hota. Profile update hone par entry invalidate hoti hai.
+
+_active_patients = TTLCache(maxsize=10000, ttl=300)
+_lookups = {'db_lookups': 0, 'rejected_by_claims': 0}
+_lookups_lock = threading.Lock()
+
+def init_patient_cache(size: int = 10000, ttl: float = 300):
+    global _active_patients
+    _active_patients = TTLCache(maxsize=size, ttl=ttl)
+    with _lookups_lock:
+        _lookups.update(db_lookups=0, rejected_by_claims=0)
+
+def patient_claims(patient: dict) -> dict:
+    """Additional JWT claims issued at patient login."""
+    name = f"{patient.get('first_name', '')} {patient.get('last_name', '')}".strip()
+    return {'role': 'patient', 'name': name}
+
+def remember_patient(unique_id: str):
+    _active_patients.set(unique_id, True)
+
+def forget_patient(unique_id: str):
+    _active_patients.invalidate(unique_id)
+
+def is_active_patient(collection, unique_id: str, claims: dict = None) -> bool:
+    """
+    True if `unique_id` belongs to an existing patient. Tokens carrying another role
+    (e.g. doctor) are rejected from their claims alone; otherwise the TTL cache is
+    consulted before a minimal `_id`-only lookup in `collection`.
+    """
+    if claims and claims.get('role', 'patient') != 'patient':
+        with _lookups_lock:
+            _lookups['rejected_by_claims'] += 1
+        return False
+    if _active_patients.get(unique_id):
+        return True
+    with _lookups_lock:
+        _lookups['db_lookups'] += 1
+    if collection.find_one({'unique_id': unique_id}, {'_id': 1}) is None:
+        return False
+    remember_patient(unique_id)
+    return True
+
+def patient_cache_stats() -> dict:
+    with _lookups_lock:
+        counters = dict(_lookups)
+    return {'memory': _active_patients.stats(), **counters}
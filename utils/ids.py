@@ -0,0 +1,72 @@
+import math
+import string
+import threading
+from pymongo import ReturnDocument
+
+# ==============================================================================
+#  BLOCK-ALLOCATED IDS
+# ==============================================================================
+# Random ID + find_one probe loop ID space bharne ke saath mehenga hota jaata hai aur
+# concurrent registrations collide kar sakti hain. Yahan ek `counters` collection se
+# har process ek block of sequence numbers reserve karta hai ($inc, ek write per block).
+# Sequence number ko ek bijective permutation se ID space mein map kiya jaata hai, isliye
+# IDs random dikhte hain lekin kabhi repeat nahi hote.
+
+ID_ALPHABET = string.ascii_uppercase + string.digits
+
+class IdSpaceExhausted(Exception):
+    pass
+
+class BlockIdAllocator:
+    """
+    Hands out `prefix` + `length` characters from `alphabet`, e.g. 'D-7QK2M'.
+    Each process reserves `block_size` sequence numbers at a time from `counters`.
+    """
+
+    def __init__(self, counters, name: str, prefix: str = '', length: int = 5,
+                 alphabet: str = ID_ALPHABET, block_size: int = 20, multiplier: int = 39916801, offset: int = 12345):
+        self.counters = counters
+        self.name = name
+        self.prefix = prefix
+        self.length = length
+        self.alphabet = alphabet
+        self.block_size = block_size
+        self.space = len(alphabet) ** length
+        # index -> (index * multiplier + offset) mod space bijective hai jab multiplier aur space coprime hon
+        multiplier %= self.space
+        while math.gcd(multiplier, self.space) != 1:
+            multiplier += 1
+        self.multiplier = multiplier
+        self.offset = offset % self.space
+        self._next = self._end = 0
+        self._lock = threading.Lock()
+
+    def _reserve_block(self):
+        counter = self.counters.find_one_and_update(
+            {'_id': self.name}, {'$inc': {'next': self.block_size}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        self._end = counter['next']
+        self._next = self._end - self.block_size
+
+    def next_index(self) -> int:
+        with self._lock:
+            if self._next >= self._end:
+                self._reserve_block()
+            index = self._next
+            self._next += 1
+        if index >= self.space:
+            raise IdSpaceExhausted(f"All {self.space} '{self.name}' IDs are allocated")
+        return index
+
+    def format(self, index: int) -> str:
+        value = (index * self.multiplier + self.offset) % self.space
+        base = len(self.alphabet)
+        chars = []
+        for _ in range(self.length):
+            value, r = divmod(value, base)
+            chars.append(self.alphabet[r])
+        return self.prefix + ''.join(reversed(chars))
+
+    def next_id(self) -> str:
+        return self.format(self.next_index())
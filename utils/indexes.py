@@ -0,0 +1,159 @@
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure, PyMongoError
+
+# ==============================================================================
+#  INDEX DECLARATIONS
+# ==============================================================================
+# Har collection ke indexes yahan declare hote hain. create_index idempotent hai,
+# isliye yeh list har startup par safely dobara apply ki ja sakti hai. Kisi index ke
+# options badlein (jaise mobile_1 ka partial hona) to purana index drop karke naya banta hai.
+_INDEX_CONFLICT_CODES = (85, 86)   # IndexOptionsConflict, IndexKeySpecsConflict
+INDEXES = {
+    'patients': [
+        {'keys': [('unique_id', ASCENDING)], 'name': 'unique_id_1', 'unique': True},
+        # Partial: bina mobile wale docs (null) index mein nahi aate, isliye aapas mein collide nahi karte
+        {'keys': [('mobile', ASCENDING)], 'name': 'mobile_1', 'unique': True,
+         'partialFilterExpression': {'mobile': {'$type': 'string'}}},
+    ],
+    'doctors': [
+        {'keys': [('doctor_id', ASCENDING)], 'name': 'doctor_id_1', 'unique': True},
+    ],
+    'issues': [
+        {'keys': [('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+         'name': 'user_id_1_created_at_-1__id_-1'},
+        {'keys': [('status', ASCENDING), ('created_at', DESCENDING)], 'name': 'status_1_created_at_-1'},
+        {'keys': [('created_at', DESCENDING), ('_id', DESCENDING)], 'name': 'created_at_-1__id_-1'},
+        # Startup transcription sweep: sirf pending issues index mein
+        {'keys': [('transcript_queued_at', ASCENDING)], 'name': 'transcript_queued_at_pending',
+         'partialFilterExpression': {'transcript_status': 'pending'}},
+    ],
+    'translation_cache': [
+        # TTL index: shared translations 30 din baad apne aap expire ho jaati hain
+        {'keys': [('created_at', ASCENDING)], 'name': 'created_at_ttl', 'expireAfterSeconds': 30 * 24 * 3600},
+    ],
+    'blobs': [
+        # Upload blob GC (utils/storage.py): unreferenced blobs ko updated_at ke hisaab se dhoondhta hai
+        {'keys': [('refs', ASCENDING), ('updated_at', ASCENDING)], 'name': 'refs_1_updated_at_1'},
+    ],
+    'reports': [
+        {'keys': [('user_id', ASCENDING), ('uploaded_at', DESCENDING), ('_id', DESCENDING)],
+         'name': 'user_id_1_uploaded_at_-1__id_-1'},
+    ],
+    'video_rooms': [
+        # Room pool claim (utils/room_pool.py): sabse purana available room per template
+        {'keys': [('status', ASCENDING), ('template_id', ASCENDING), ('created_at', ASCENDING)],
+         'name': 'status_1_template_id_1_created_at_1'},
+        # Expiry sweep + TTL: expired room docs ek din baad apne aap hat jaate hain
+        {'keys': [('expires_at', ASCENDING)], 'name': 'expires_at_ttl', 'expireAfterSeconds': 24 * 3600},
+    ],
+    'upload_sessions': [
+        # Expired resumable uploads ka sweep (utils/uploads.py)
+        {'keys': [('expires_at', ASCENDING)], 'name': 'expires_at_1'},
+    ],
+    'call_sessions': [
+        # Room reuse per doctor-patient pair (utils/call_sessions.py); ek pair ka sirf ek active session
+        {'keys': [('doctor_id', ASCENDING), ('patient_id', ASCENDING), ('active', ASCENDING)],
+         'name': 'doctor_id_1_patient_id_1_active_1', 'unique': True, 'partialFilterExpression': {'active': True}},
+        # Patient auth-token validation
+        {'keys': [('room_id', ASCENDING), ('patient_id', ASCENDING), ('active', ASCENDING)],
+         'name': 'room_id_1_patient_id_1_active_1'},
+        # Expired session sweep
+        {'keys': [('active', ASCENDING), ('ends_at', ASCENDING)], 'name': 'active_1_ends_at_1'},
+    ],
+}
+
+# Blueprints ki hot queries (collection, filter, sort). `verify_indexes` inke
+# explain plans check karta hai aur jo abhi bhi COLLSCAN karti hain unhe report karta hai.
+HOT_QUERIES = [
+    ('patients', {'unique_id': ''}, None),
+    ('patients', {'mobile': ''}, None),
+    ('doctors', {'doctor_id': ''}, None),
+    ('issues', {'user_id': ''}, [('created_at', DESCENDING), ('_id', DESCENDING)]),
+    ('issues', {'status': ''}, [('created_at', DESCENDING)]),
+    ('issues', {}, [('created_at', DESCENDING), ('_id', DESCENDING)]),
+    ('reports', {'user_id': ''}, [('uploaded_at', DESCENDING), ('_id', DESCENDING)]),
+    ('video_rooms', {'status': '', 'template_id': ''}, [('created_at', ASCENDING)]),
+    ('call_sessions', {'doctor_id': '', 'patient_id': '', 'active': True}, None),
+    ('call_sessions', {'room_id': '', 'patient_id': '', 'active': True}, None),
+]
+
+
+def ensure_indexes(db) -> dict:
+    """
+    Creates every declared index. Safe to run repeatedly.
+    Returns a dict of collection -> list of created index names (or error strings).
+    """
+    report = {}
+    for collection_name, specs in INDEXES.items():
+        created = []
+        for spec in specs:
+            options = {k: v for k, v in spec.items() if k != 'keys'}
+            collection = db[collection_name]
+            try:
+                try:
+                    created.append(collection.create_index(spec['keys'], **options))
+                except OperationFailure as e:
+                    if e.code not in _INDEX_CONFLICT_CODES:
+                        raise
+                    print(f"Recreating index {collection_name}.{spec['name']} with new options")
+                    collection.drop_index(spec['name'])
+                    created.append(collection.create_index(spec['keys'], **options))
+            except PyMongoError as e:
+                # Duplicate data ya conflicting index ki wajah se fail ho sakta hai;
+                # app startup ko rokna nahi chahiye.
+                print(f"Index creation failed for {collection_name}.{spec['name']}: {e}")
+                created.append(f"error: {e}")
+        report[collection_name] = created
+    return report
+
+
+def missing_unique_indexes(db) -> list:
+    """
+    Declared unique indexes that don't exist in `db`, as 'collection.index_name' strings.
+    Registration (mobile / doctor_id) aur call sessions duplicate rokne ke liye sirf inhi
+    indexes ke DuplicateKeyError par nirbhar hain - koi find_one fallback nahi hai.
+    """
+    missing = []
+    for collection_name, specs in INDEXES.items():
+        unique_specs = [spec for spec in specs if spec.get('unique')]
+        if not unique_specs:
+            continue
+        existing = db[collection_name].index_information()
+        for spec in unique_specs:
+            if not existing.get(spec['name'], {}).get('unique'):
+                missing.append(f"{collection_name}.{spec['name']}")
+    return missing
+
+
+def _plan_stages(plan):
+    """Yields every stage name in an explain plan tree."""
+    if not isinstance(plan, dict):
+        return
+    if 'stage' in plan:
+        yield plan['stage']
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get('inputStages', []):
+        yield from _plan_stages(child)
+
+
+def verify_indexes(db) -> list:
+    """
+    Runs explain on each hot query and returns the ones whose winning plan is a COLLSCAN.
+    Each entry is a dict with collection, filter and sort.
+    """
+    collscans = []
+    for collection_name, query_filter, sort in HOT_QUERIES:
+        find_cmd = {'find': collection_name, 'filter': query_filter}
+        if sort:
+            find_cmd['sort'] = dict(sort)
+        try:
+            explain = db.command({'explain': find_cmd, 'verbosity': 'queryPlanner'})
+        except (PyMongoError, NotImplementedError) as e:
+            print(f"Explain failed for {collection_name} {query_filter}: {e}")
+            continue
+        winning_plan = explain.get('queryPlanner', {}).get('winningPlan', {})
+        if 'COLLSCAN' in _plan_stages(winning_plan):
+            collscans.append({'collection': collection_name, 'filter': query_filter, 'sort': sort})
+    return collscans
@@ -0,0 +1,48 @@
+import queue
+import threading
+
+# ==============================================================================
+#  BACKGROUND JOB QUEUE
+# ==============================================================================
+# Slow kaam (jaise audio transcription) request thread se hatakar yahan chalte hain.
+# `local` backend ek in-process queue + worker threads hai, jise kisi external
+# broker ki zaroorat nahi - dev aur tests ke liye kaafi hai.
+
+class LocalJobQueue:
+    """An in-process job queue served by a fixed pool of daemon worker threads."""
+
+    def __init__(self, workers: int = 2, name: str = 'jobs'):
+        self._queue = queue.Queue()
+        self._threads = []
+        for i in range(max(1, workers)):
+            t = threading.Thread(target=self._work, name=f"{name}-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, func, *args, **kwargs):
+        """Schedules func(*args, **kwargs) to run on a worker thread."""
+        self._queue.put((func, args, kwargs))
+
+    def join(self):
+        """Blocks until every submitted job has finished (useful in tests)."""
+        self._queue.join()
+
+    def _work(self):
+        while True:
+            func, args, kwargs = self._queue.get()
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"Background job {getattr(func, '__name__', func)} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+JOB_QUEUE_BACKENDS = {
+    'local': LocalJobQueue,
+}
+
+def create_job_queue(backend: str = 'local', workers: int = 2, name: str = 'jobs'):
+    """Builds the configured job queue backend."""
+    if backend not in JOB_QUEUE_BACKENDS:
+        raise ValueError(f"Unknown job queue backend: {backend}")
+    return JOB_QUEUE_BACKENDS[backend](workers=workers, name=name)
@@ -0,0 +1,174 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from flask import Response, g, request
+
+# ==============================================================================
+#  LIGHTWEIGHT METRICS (PROMETHEUS TEXT FORMAT)
+# ==============================================================================
+# Request middleware aur helper functions ke around timers yahan record hote hain.
+# `/metrics` inhe Prometheus text format mein expose karta hai. METRICS_ENABLED=0
+# hone par timers sirf ek boolean check karke seedha function call karte hain.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_enabled = True
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = bool(enabled)
+
+def is_enabled() -> bool:
+    return _enabled
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _label_str(names, values) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            yield f"{self.name}{_label_str(self.labelnames, labelvalues)} {value}"
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # labelvalues -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, *labelvalues) -> int:
+        series = self._series.get(labelvalues)
+        return series[-1] if series else 0
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        names = self.labelnames + ('le',)
+        for labelvalues, series in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_label_str(names, labelvalues + (bound,))} {cumulative}"
+            yield f"{self.name}_bucket{_label_str(names, labelvalues + ('+Inf',))} {series[-1]}"
+            yield f"{self.name}_sum{_label_str(self.labelnames, labelvalues)} {series[-2]}"
+            yield f"{self.name}_count{_label_str(self.labelnames, labelvalues)} {series[-1]}"
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+REQUESTS_TOTAL = REGISTRY.register(Counter(
+    'codecure_requests_total', 'HTTP requests handled.', ('endpoint', 'method', 'status')))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    'codecure_request_duration_seconds', 'HTTP request handler latency.', ('endpoint', 'method')))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    'codecure_stage_duration_seconds', 'Latency of instrumented stages (translate, audio, AI, 100ms, ...).', ('stage',)))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    'codecure_stage_errors_total', 'Exceptions raised inside instrumented stages.', ('stage',)))
+
+# --- Stage timers ---
+
+@contextmanager
+def stage(name: str):
+    """Times a block as one stage: `with stage('audio_decode'): ...`"""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(name)
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, name)
+
+def timed(name: str):
+    """Decorator version of `stage` for whole functions."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                STAGE_ERRORS.inc(name)
+                raise
+            finally:
+                STAGE_DURATION.observe(time.perf_counter() - start, name)
+        return wrapper
+    return decorator
+
+# --- Flask integration ---
+
+def init_metrics(app):
+    """Registers the request timing middleware and the /metrics endpoint."""
+    set_enabled(app.config.get('METRICS_ENABLED', True))
+
+    @app.before_request
+    def _start_request_timer():
+        if _enabled:
+            g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            endpoint = request.endpoint or 'unmatched'
+            REQUEST_DURATION.observe(time.perf_counter() - start, endpoint, request.method)
+            REQUESTS_TOTAL.inc(endpoint, request.method, str(response.status_code))
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,137 @@
+import threading
+from collections import Counter as ShapeCounter
+from flask import g, has_request_context, request
+from pymongo import monitoring
+from utils.metrics import REGISTRY, Histogram, Counter
+
+# ==============================================================================
+#  MONGO COMMAND MONITORING
+# ==============================================================================
+# Ek pymongo CommandListener har command ka duration, collection aur filter shape
+# record karta hai aur use us Flask request se jodta hai jisne command bheji.
+# Isse milte hain: slow-query log, per-request query count header, aur N+1 warning.
+
+MONGO_COMMAND_DURATION = REGISTRY.register(Histogram(
+    'codecure_mongo_command_duration_seconds', 'MongoDB command latency.', ('command', 'collection')))
+MONGO_SLOW_COMMANDS = REGISTRY.register(Counter(
+    'codecure_mongo_slow_commands_total', 'MongoDB commands slower than MONGO_SLOW_QUERY_MS.', ('command', 'collection')))
+MONGO_N_PLUS_ONE = REGISTRY.register(Counter(
+    'codecure_mongo_n_plus_one_total', 'Requests that repeated the same single-document query shape.', ('endpoint',)))
+
+# Handshake/auth commands query count mein nahi gine jaate
+_IGNORED_COMMANDS = {'hello', 'ismaster', 'isMaster', 'saslStart', 'saslContinue', 'ping', 'endSessions', 'buildInfo'}
+
+# Command ke andar filter kis key mein hota hai
+_FILTER_KEYS = {'find': 'filter', 'count': 'query', 'distinct': 'query', 'findAndModify': 'query'}
+
+def query_shape(value):
+    """
+    Replaces literal values with '?', keeping field names and operators:
+    {'unique_id': 'abc', 'age': {'$gt': 3}} -> {'age': {'$gt': '?'}, 'unique_id': '?'}
+    """
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shape = query_shape(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return '?'
+
+def command_filter(command_name: str, command: dict):
+    """Extracts the query filter of a command document (None if it has none)."""
+    if command_name in _FILTER_KEYS:
+        return command.get(_FILTER_KEYS[command_name])
+    if command_name in ('update', 'delete'):
+        ops = command.get('updates') or command.get('deletes') or []
+        return ops[0].get('q') if ops else None
+    if command_name == 'aggregate':
+        pipeline = command.get('pipeline') or []
+        return pipeline[0].get('$match') if pipeline else None
+    return None
+
+class RequestMongoStats:
+    """Per-request accounting: command count, total time and repeated single-document query shapes."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.single_doc_shapes = ShapeCounter()
+
+    def record(self, command_name: str, collection: str, shape, single_doc: bool, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        if single_doc:
+            self.single_doc_shapes[(command_name, collection, repr(shape))] += 1
+
+    def repeated_shapes(self, threshold: int) -> list:
+        """(command, collection, shape, times) for single-document queries repeated >= threshold times."""
+        return [(cmd, coll, shape, n) for (cmd, coll, shape), n in self.single_doc_shapes.items() if n >= threshold]
+
+class MongoCommandMonitor(monitoring.CommandListener):
+    """CommandListener registered on the app's MongoClient (see create_app)."""
+
+    def __init__(self, slow_query_ms: float = 100):
+        self.slow_query_ms = slow_query_ms
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in _IGNORED_COMMANDS:
+            return
+        command = event.command
+        collection = command.get(event.command_name)
+        collection = collection if isinstance(collection, str) else None
+        shape = query_shape(command_filter(event.command_name, command) or {})
+        # find_one() -> find with limit 1; aise repeated queries N+1 ka signal hain
+        single_doc = event.command_name == 'find' and command.get('limit') == 1
+        stats = None
+        if has_request_context():
+            stats = g.get('_mongo_stats')
+            if stats is None:
+                stats = g._mongo_stats = RequestMongoStats()
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (collection, shape, single_doc, stats)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        collection, shape, single_doc, stats = pending
+        duration_ms = event.duration_micros / 1000.0
+        MONGO_COMMAND_DURATION.observe(duration_ms / 1000.0, event.command_name, collection or '')
+        if stats is not None:
+            stats.record(event.command_name, collection, shape, single_doc, duration_ms)
+        if duration_ms >= self.slow_query_ms:
+            MONGO_SLOW_COMMANDS.inc(event.command_name, collection or '')
+            print(f"SLOW MONGO QUERY ({duration_ms:.1f} ms): {event.command_name} {collection} filter={shape}")
+
+def init_mongo_monitoring(app):
+    """
+    Adds the per-request side of monitoring: the N+1 warning and, in debug mode
+    (or with MONGO_QUERY_COUNT_HEADER=1), X-Mongo-Query-Count / X-Mongo-Time-Ms headers.
+    """
+    @app.after_request
+    def _report_mongo_usage(response):
+        stats = g.get('_mongo_stats')
+        if stats is None:
+            return response
+        threshold = app.config.get('MONGO_N_PLUS_ONE_THRESHOLD', 5)
+        header_setting = app.config.get('MONGO_QUERY_COUNT_HEADER')
+        for command_name, collection, shape, times in stats.repeated_shapes(threshold):
+            MONGO_N_PLUS_ONE.inc(request.endpoint or 'unmatched')
+            print(f"WARNING: possible N+1 in {request.endpoint}: {command_name} on {collection} "
+                  f"with shape {shape} ran {times} times in one request")
+        if header_setting or (header_setting is None and app.debug):
+            response.headers['X-Mongo-Query-Count'] = str(stats.count)
+            response.headers['X-Mongo-Time-Ms'] = f"{stats.total_ms:.1f}"
+        return response
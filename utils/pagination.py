@@ -0,0 +1,82 @@
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from bson import json_util
+from pymongo import DESCENDING
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# ==============================================================================
+#  KEYSET (CURSOR) PAGINATION
+# ==============================================================================
+# Results newest-first order mein aate hain: (sort_field DESC, _id DESC).
+# `after` cursor pichle page ke aakhri document ka (sort_field, _id) hota hai,
+# isliye har page ek indexed range scan hai - skip() ki tarah slow nahi hota.
+
+def encode_cursor(doc: dict, sort_field: str = None) -> str:
+    """Builds an opaque cursor string from the last document of a page."""
+    key = {'id': doc['_id']}
+    if sort_field:
+        key['v'] = doc.get(sort_field)
+    return urlsafe_b64encode(json_util.dumps(key).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str) -> dict:
+    """Parses a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        key = json_util.loads(urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, dict) or 'id' not in key:
+        raise ValueError("Invalid cursor")
+    return key
+
+def parse_limit(limit) -> int:
+    """Validates a page size, falling back to DEFAULT_PAGE_SIZE and capping at MAX_PAGE_SIZE."""
+    if limit in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+def keyset_filter(query: dict, sort_field: str = None, after: str = None) -> dict:
+    """Combines a base query with the range condition for the page after `after`."""
+    if not after:
+        return query
+    key = decode_cursor(after)
+    if not sort_field:
+        return {'$and': [query, {'_id': {'$lt': key['id']}}]}
+
+    value = key.get('v')
+    if value is None:
+        # Missing/null values sort last in DESC order; only the _id tiebreak is left.
+        range_cond = {sort_field: None, '_id': {'$lt': key['id']}}
+    else:
+        range_cond = {'$or': [
+            {sort_field: {'$lt': value}},
+            {sort_field: value, '_id': {'$lt': key['id']}},
+            {sort_field: None},
+        ]}
+    return {'$and': [query, range_cond]}
+
+def sort_spec(sort_field: str = None) -> list:
+    spec = [(sort_field, DESCENDING)] if sort_field else []
+    return spec + [('_id', DESCENDING)]
+
+def paginate(collection, query: dict, sort_field: str = None, projection: dict = None,
+             limit=None, after: str = None):
+    """
+    Returns (documents, next_cursor) for one page of `collection.find(query)`.
+    next_cursor is None on the last page. Raises ValueError for a bad limit/cursor.
+    """
+    limit = parse_limit(limit)
+    cursor = collection.find(keyset_filter(query, sort_field, after), projection)
+    # Ek extra document fetch karke pata chalta hai ki agla page hai ya nahi
+    docs = list(cursor.sort(sort_spec(sort_field)).limit(limit + 1))
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort_field)
+    return docs, next_cursor
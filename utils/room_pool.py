@@ -0,0 +1,150 @@
+import datetime
+import threading
+import uuid
+from pymongo import ASCENDING, ReturnDocument
+from utils import hms
+from utils.metrics import REGISTRY, Counter
+
+# ==============================================================================
+#  PRE-PROVISIONED 100MS ROOM POOL
+# ==============================================================================
+# 100ms room banana ek external API call hai jo doctor ke "call start" par critical
+# path mein tha. Ab har template ke liye N rooms pehle se `video_rooms` collection
+# mein 'available' rakhe jaate hain. /video/create-room ek find_one_and_update se
+# room claim karta hai (local DB operation) aur background thread pool ko refill karta hai.
+#
+# Lifecycle: available -> claimed -> expired. Available rooms ROOM_TTL ke baad aur claimed
+# rooms CALL_TTL ke baad 'expired' hote hain aur 100ms par disable kiye jaate hain (ek
+# patient ka room kabhi doosre ko nahi milta). Expired docs TTL index se baad mein hat jaate hain.
+# Kai worker processes ek saath refill karein to pool thoda overfill ho sakta hai; extra
+# rooms bas ROOM_TTL par expire ho jaate hain.
+
+ROOM_POOL_CLAIMS = REGISTRY.register(Counter(
+    'codecure_video_room_claims_total', 'Video rooms handed out, by source (pool or on-demand creation).', ('source',)))
+
+class RoomPool:
+    def __init__(self, collection, size: int = 5, template_ids=None, room_ttl: float = 12 * 3600,
+                 call_ttl: float = 3 * 3600, refill_interval: float = 30):
+        self.collection = collection
+        self.size = size
+        self._template_ids = [t for t in (template_ids or []) if t]
+        self.room_ttl = room_ttl
+        self.call_ttl = call_ttl
+        self.refill_interval = refill_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def template_ids(self) -> list:
+        # Config mein templates na hon to HMS_TEMPLATE_ID (runtime par env se)
+        if self._template_ids:
+            return self._template_ids
+        default = hms.default_template_id()
+        return [default] if default else []
+
+    # --- Claiming ---
+
+    def claim(self, template_id: str = None, **claimed_by):
+        """
+        Atomically takes the oldest unexpired available room of `template_id` and marks it
+        claimed (by e.g. doctor_id/patient_id). Returns the room id, or None if the pool is empty.
+        """
+        template_id = template_id or (self.template_ids[0] if self.template_ids else None)
+        now = _now()
+        room = self.collection.find_one_and_update(
+            {'status': 'available', 'template_id': template_id, 'expires_at': {'$gt': now}},
+            {'$set': {'status': 'claimed', 'claimed_at': now, 'claimed_by': claimed_by,
+                      'expires_at': now + datetime.timedelta(seconds=self.call_ttl)}},
+            sort=[('created_at', ASCENDING)], projection={'_id': 1}, return_document=ReturnDocument.AFTER
+        )
+        # Pool se ek kam hua - refill thread ko jagao (request wait nahi karti)
+        self._wake.set()
+        if room is None:
+            return None
+        ROOM_POOL_CLAIMS.inc('pool')
+        return room['_id']
+
+    def claim_or_create(self, room_name: str, template_id: str = None, **claimed_by):
+        """Pool room if one is available, otherwise a synchronously created (and recorded) room."""
+        room_id = self.claim(template_id, **claimed_by)
+        if room_id:
+            return room_id
+        room_id = hms.create_room(room_name, template_id=template_id)
+        if room_id:
+            ROOM_POOL_CLAIMS.inc('on_demand')
+            now = _now()
+            self.collection.update_one({'_id': room_id}, {'$set': {
+                'template_id': template_id or hms.default_template_id(), 'status': 'claimed', 'created_at': now,
+                'claimed_at': now, 'claimed_by': claimed_by,
+                'expires_at': now + datetime.timedelta(seconds=self.call_ttl)}}, upsert=True)
+        return room_id
+
+    # --- Maintenance (background thread) ---
+
+    def available_count(self, template_id: str) -> int:
+        return self.collection.count_documents(
+            {'status': 'available', 'template_id': template_id, 'expires_at': {'$gt': _now()}})
+
+    def refill(self) -> int:
+        """Creates rooms until every template has `size` available ones. Returns rooms created."""
+        created = 0
+        for template_id in self.template_ids:
+            for _ in range(max(0, self.size - self.available_count(template_id))):
+                room_id = hms.create_room(f"CodeCure pool room {uuid.uuid4().hex[:12]}",
+                                          description='Pre-provisioned telemedicine room', template_id=template_id)
+                if not room_id:
+                    break   # 100ms down hai - agle round mein dobara
+                now = _now()
+                self.collection.update_one({'_id': room_id}, {'$setOnInsert': {
+                    'template_id': template_id, 'status': 'available', 'created_at': now,
+                    'expires_at': now + datetime.timedelta(seconds=self.room_ttl)}}, upsert=True)
+                created += 1
+        return created
+
+    def expire(self) -> int:
+        """Marks rooms past their expiry as expired and disables them on 100ms. Returns rooms disabled."""
+        now = _now()
+        self.collection.update_many(
+            {'status': {'$in': ['available', 'claimed']}, 'expires_at': {'$lte': now}},
+            {'$set': {'status': 'expired', 'disabled': False}}
+        )
+        disabled = 0
+        for room in self.collection.find({'status': 'expired', 'disabled': False}, {'_id': 1}):
+            if hms.disable_room(room['_id']):
+                self.collection.update_one({'_id': room['_id']}, {'$set': {'disabled': True}})
+                disabled += 1
+        return disabled
+
+    def run_once(self):
+        self.expire()
+        self.refill()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='video-room-pool', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Video room pool maintenance failed: {e}")
+            self._wake.wait(self.refill_interval)
+            self._wake.clear()
+
+    def stats(self) -> dict:
+        counts = {}
+        for row in self.collection.aggregate([{'$group': {'_id': {'template_id': '$template_id', 'status': '$status'},
+                                                          'count': {'$sum': 1}}}]):
+            counts.setdefault(row['_id'].get('template_id') or '', {})[row['_id'].get('status')] = row['count']
+        return {'target_size': self.size, 'templates': counts}
+
+def _now():
+    return datetime.datetime.now(datetime.UTC)
@@ -0,0 +1,135 @@
+import re
+
+# ==============================================================================
+#  RULE-BASED LOGIC FOR THE HYBRID CHATBOT
+# ==============================================================================
+# Keyword tables English, Hindi, Punjabi aur romanized Hinglish mein hain.
+# Saare terms import ke time ek hi compiled regex mein jod diye jaate hain, isliye
+# raw prompt par ek pass mein match ho jaata hai - translation ki zaroorat nahi.
+
+EMERGENCY_RESPONSE = "⚠ These symptoms may be serious. Please consult a doctor immediately or seek emergency care."
+
+# concept -> terms (kisi bhi term ka match = concept match)
+EMERGENCY_SYMPTOMS = {
+    "chest pain": ["chest pain", "seene mein dard", "seene me dard", "chhati mein dard", "chati me dard",
+                   "सीने में दर्द", "छाती में दर्द", "ਛਾਤੀ ਵਿੱਚ ਦਰਦ", "ਛਾਤੀ ਦਰਦ", "ਸੀਨੇ ਵਿੱਚ ਦਰਦ"],
+    "difficulty breathing": ["difficulty breathing", "shortness of breath", "saans lene mein takleef",
+                             "saans lene me takleef", "saans nahi aa", "sans nahi aa", "saans phool",
+                             "सांस लेने में तकलीफ", "साँस लेने में तकलीफ", "सांस नहीं आ", "सांस फूल",
+                             "ਸਾਹ ਲੈਣ ਵਿੱਚ ਤਕਲੀਫ", "ਸਾਹ ਨਹੀਂ ਆ", "ਸਾਹ ਚੜ੍ਹ"],
+    "unconscious": ["unconscious", "behosh", "बेहोश", "ਬੇਹੋਸ਼"],
+    "bleeding": ["bleeding", "khoon beh", "khoon nikal", "खून बह", "खून निकल", "ਖੂਨ ਵਗ", "ਖੂਨ ਨਿਕਲ"],
+    "seizure": ["seizure", "mirgi", "daura pad", "मिर्गी", "दौरा पड़", "दौरा पड", "ਮਿਰਗੀ", "ਦੌਰਾ ਪ"],
+    "heart attack": ["heart attack", "dil ka daura", "दिल का दौरा", "ਦਿਲ ਦਾ ਦੌਰਾ"],
+    "stroke": ["stroke", "lakwa", "laqwa", "लकवा", "ਲਕਵਾ", "ਅਧਰੰਗ"],
+    "severe headache": ["severe headache", "tez sir dard", "tez sar dard", "तेज़ सिर दर्द", "तेज सिर दर्द",
+                        "तेज सिरदर्द", "ਤੇਜ਼ ਸਿਰ ਦਰਦ", "ਤੇਜ ਸਿਰ ਦਰਦ"],
+    "vision loss": ["vision loss", "dikhna band", "dikhai nahi", "दिखना बंद", "दिखाई नहीं", "ਦਿਸਣਾ ਬੰਦ",
+                    "ਦਿਖਾਈ ਨਹੀਂ"],
+    "suicide": ["suicide", "khudkushi", "aatmahatya", "आत्महत्या", "खुदकुशी", "ਖੁਦਕੁਸ਼ੀ", "ਆਤਮਹੱਤਿਆ"],
+}
+
+FEATURE_TERMS = {
+    "book": ["book", "बुक", "ਬੁੱਕ", "ਬੁਕ"],
+    "appointment": ["appointment", "अपॉइंटमेंट", "अपोइंटमेंट", "मुलाकात", "ਅਪਾਇੰਟਮੈਂਟ", "ਮੁਲਾਕਾਤ"],
+    "upload": ["upload", "अपलोड", "ਅਪਲੋਡ"],
+    "report": ["report", "रिपोर्ट", "ਰਿਪੋਰਟ"],
+    "pharmacy": ["pharmacy", "chemist", "फार्मेसी", "केमिस्ट", "ਫਾਰਮੇਸੀ", "ਕੈਮਿਸਟ"],
+    "medicine": ["medicine", "dawai", "dawa", "दवाई", "दवा", "ਦਵਾਈ", "ਦਵਾ"],
+    "emergency": ["emergency", "इमरजेंसी", "आपातकाल", "ਐਮਰਜੈਂਸੀ"],
+    "blockchain": ["blockchain", "ब्लॉकचेन", "ਬਲਾਕਚੇਨ"],
+    "security": ["security", "सुरक्षा", "ਸੁਰੱਖਿਆ"],
+    "opd": ["opd", "ओपीडी", "ਓਪੀਡੀ"],
+}
+
+# (required concepts, response) - pehla rule jiske saare concepts match hon, wahi jawab deta hai
+FEATURE_RULES = [
+    (("book", "appointment"), "📅 I can help you book a doctor’s appointment. Please share your preferred date and specialty."),
+    (("upload", "report"), "📑 You can upload your medical report. I will securely attach it to your health record."),
+    (("pharmacy", "medicine"), "💊 I can check nearby pharmacies for medicine availability."),
+    (("emergency",), "🚑 For any medical emergency, please contact your nearest hospital immediately."),
+    (("blockchain", "security"), "🔐 Your medical records are secured with advanced technology for privacy and transparency."),
+    (("opd",), "🏥 I can help manage OPD bookings and doctor schedules."),
+]
+
+def _trie_regex(terms) -> str:
+    """
+    Builds one regex from a trie of the terms, e.g. ["chest pain", "chemist"] -> "che(?:st\\ pain|mist)".
+    Common prefixes are shared, so the regex engine does roughly one comparison per input character
+    instead of trying every term at every position.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node):
+        is_end = '' in node
+        children = sorted((ch, sub) for ch, sub in node.items() if ch != '')
+        if not children:
+            return ''
+        branches, single_chars = [], []
+        for ch, sub in children:
+            rest = build(sub)
+            if rest:
+                branches.append(re.escape(ch) + rest)
+            else:
+                single_chars.append(re.escape(ch))
+        if single_chars:
+            branches.append(single_chars[0] if len(single_chars) == 1 else '[' + ''.join(single_chars) + ']')
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional: jahan term yahin khatam ho sakta hai wahan bhi lamba match pehle try hota hai
+        return f"(?:{pattern})?" if is_end else pattern
+
+    return build(trie)
+
+class RuleMatcher:
+    """
+    Matches a prompt against the emergency and feature tables with one precompiled regex.
+    Matching is case-insensitive substring matching, exactly like the original `in` checks:
+    the regex runs as a lookahead, so every position is tried (overlapping terms are all
+    found), and shorter terms that are a prefix of the longest match are counted too.
+    """
+
+    def __init__(self, emergency_symptoms: dict, feature_terms: dict, feature_rules: list):
+        term_concepts = {}
+        for kind, table in (('emergency', emergency_symptoms), ('feature', feature_terms)):
+            for concept, terms in table.items():
+                for term in terms:
+                    term_concepts.setdefault(term.casefold(), set()).add((kind, concept))
+        # Longest term at a position -> concepts of every term that is its prefix (including itself)
+        self._term_to_concepts = {
+            term: frozenset().union(*(term_concepts[term[:end]] for end in range(1, len(term) + 1)
+                                      if term[:end] in term_concepts))
+            for term in term_concepts
+        }
+        self._feature_rules = [(frozenset(concepts), response) for concepts, response in feature_rules]
+
+        # Zero-width lookahead: findall har position par match try karta hai, koi term
+        # doosre (overlapping) term ke peeche nahi chhupta - jaise 'uploadikhai nahi' mein 'dikhai nahi'
+        self._pattern = re.compile(f"(?=({_trie_regex(term_concepts)}))")
+
+    def concepts(self, text: str) -> set:
+        """Returns the set of (kind, concept) pairs found in the text."""
+        found = set()
+        for term in set(self._pattern.findall(text.casefold())):
+            found |= self._term_to_concepts[term]
+        return found
+
+    def match(self, text: str):
+        """Returns the canned response for the first matching rule, or None."""
+        found = self.concepts(text)
+        if not found:
+            return None
+        if any(kind == 'emergency' for kind, _ in found):
+            return EMERGENCY_RESPONSE
+        features = {concept for kind, concept in found if kind == 'feature'}
+        for required, response in self._feature_rules:
+            if required <= features:
+                return response
+        return None
+
+# Import ke time ek baar compile hota hai
+PROMPT_RULES = RuleMatcher(EMERGENCY_SYMPTOMS, FEATURE_TERMS, FEATURE_RULES)
@@ -0,0 +1,321 @@
+import contextlib
+import datetime
+import hashlib
+import mimetypes
+import os
+import re
+import uuid
+from flask import abort, current_app, redirect, request, send_file
+from werkzeug.wsgi import wrap_file
+from utils.metrics import timed
+from utils.storage_backends import LocalBackend
+
+# ==============================================================================
+#  CONTENT-ADDRESSED UPLOAD STORAGE
+# ==============================================================================
+# Har upload ko chunks mein likhte waqt hi sha256 hash kiya jaata hai aur blob
+# `ab/cd/<sha256>` key par rakha jaata hai. Wahi file dobara upload ho (jaise patient aur
+# doctor dono ek hi lab report daalein) to storage mein kuch naya nahi likha jaata - sirf
+# `blobs` collection mein reference count badhta hai. Sharded keys ki wajah se kisi ek
+# directory mein lakhon entries nahi hoti.
+#
+# Bytes kahan rehte hain yeh backend (utils/storage_backends.py) decide karta hai: local
+# disk, GridFS ya S3-compatible bucket. Upload pehle `root/.tmp` mein spool hota hai (hash
+# ke liye), phir backend ko stream hota hai.
+#
+# DB mein filename `<sha256><ext>` hi rehta hai (extension mimetype ke liye), isliye
+# /uploads/<filename> URLs pehle jaise hi kaam karte hain. Purani flat uuid files
+# (`<uuid><ext>` seedha UPLOAD_FOLDER mein) hamesha local disk se resolve hoti hain, backend
+# gridfs/s3 ho tab bhi. Backend badalne se pehle ke content-addressed blobs
+# `flask --app app uploads-migrate` se naye backend mein copy hote hain.
+
+CHUNK_SIZE = 1024 * 1024
+_BLOB_NAME_RE = re.compile(r'^([0-9a-f]{64})(\.[A-Za-z0-9]{1,10})?$')
+
+class BlobStore:
+    """Content-addressed store with reference counts in a Mongo collection, on a pluggable backend."""
+
+    def __init__(self, root: str, collection, chunk_size: int = CHUNK_SIZE, backend=None):
+        self.root = os.path.abspath(root)
+        self.collection = collection
+        self.chunk_size = chunk_size
+        self.backend = backend or LocalBackend(self.root)
+        # Legacy uuid files kabhi backend mein nahi likhi gayin - woh UPLOAD_FOLDER mein hi hain
+        self.legacy_backend = self.backend if self.backend.name == 'local' else LocalBackend(self.root)
+        self._tmp_dir = os.path.join(self.root, '.tmp')
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+    @staticmethod
+    def digest_of(filename: str):
+        """sha256 part of a stored filename, or None for legacy (uuid) names."""
+        match = _BLOB_NAME_RE.match(filename or '')
+        return match.group(1) if match else None
+
+    @staticmethod
+    def blob_key(digest: str) -> str:
+        return f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+    def key_for(self, filename: str):
+        """Backend key of a stored file, or None if the name is not safe to resolve."""
+        digest = self.digest_of(filename)
+        if digest:
+            return self.blob_key(digest)
+        # Legacy flat files: sirf seedha naam, koi directory traversal nahi
+        if not filename or os.path.basename(filename) != filename or filename.startswith('.'):
+            return None
+        return filename
+
+    def backend_for(self, filename: str):
+        """The backend holding `filename`: the configured one, or local disk for legacy uuid names."""
+        return self.backend if self.digest_of(filename) else self.legacy_backend
+
+    def path_for(self, filename: str):
+        """Absolute local path of a stored file (local backend or legacy name), or None."""
+        key = self.key_for(filename)
+        return self.backend_for(filename).path(key) if key else None
+
+    def open(self, filename: str):
+        """(readable stream, size) of a stored file, or None if it doesn't exist."""
+        key = self.key_for(filename)
+        return self.backend_for(filename).open(key) if key else None
+
+    @contextlib.contextmanager
+    def local_copy(self, filename: str):
+        """
+        Yields a local file path for a stored file: the file itself on the local backend,
+        otherwise a temporary download (streamed in chunks) that is removed afterwards.
+        """
+        path = self.path_for(filename)
+        if path is not None:
+            yield path
+            return
+        opened = self.open(filename)
+        if opened is None:
+            raise FileNotFoundError(filename)
+        stream, _ = opened
+        tmp_path = os.path.join(self._tmp_dir, uuid.uuid4().hex + os.path.splitext(filename)[1])
+        try:
+            with contextlib.closing(stream), open(tmp_path, 'wb') as out:
+                for chunk in iter_chunks(stream, self.chunk_size):
+                    out.write(chunk)
+            yield tmp_path
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @timed('file_save')
+    def save(self, file_storage) -> str:
+        """
+        Streams an uploaded file (werkzeug FileStorage) to disk while hashing it, moves it
+        to its content address (unless that blob already exists) and adds one reference.
+        Returns the stored filename '<sha256><ext>'.
+        """
+        return self.save_chunks(iter_chunks(file_storage.stream, self.chunk_size), file_storage.filename)
+
+    def save_chunks(self, chunks, original_filename: str = '') -> str:
+        """Like `save`, for an iterable of byte chunks (e.g. an assembled resumable upload)."""
+        ext = os.path.splitext(original_filename or '')[1].lower()
+        if not re.fullmatch(r'\.[a-z0-9]{1,10}', ext):
+            ext = ''
+        digest, size = self._write_blob(chunks)
+        return f"{digest}{ext}"
+
+    @contextlib.contextmanager
+    def _spooled(self, chunks):
+        """Writes chunks to a temp file under root/.tmp while hashing; yields (path, sha256, size)."""
+        hasher = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self._tmp_dir, uuid.uuid4().hex)
+        try:
+            with open(tmp_path, 'wb') as out:
+                for chunk in chunks:
+                    hasher.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            yield tmp_path, hasher.hexdigest(), size
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _write_blob(self, chunks):
+        """Stores the content (unless it is already there) and adds one reference. Returns (sha256, size)."""
+        with self._spooled(chunks) as (tmp_path, digest, size):
+            key = self.blob_key(digest)
+            # Reference pehle: updated_at bump hone ke baad gc is blob ko delete nahi karta. Naya refs doc
+            # bana ho to gc ne purana doc (aur shayad file) abhi hataya hai - tab file hamesha likho.
+            created = self.add_ref(digest, size)
+            try:
+                # Duplicate content - storage mein dobara nahi rakhna
+                if created or not self.backend.exists(key):
+                    self.backend.put_file(key, tmp_path)
+            except BaseException:
+                self.release(digest)
+                raise
+        return digest, size
+
+    def put_object(self, key: str, chunks):
+        """Stores chunks under an explicit (non content-addressed) backend key. Returns (sha256, size)."""
+        with self._spooled(chunks) as (tmp_path, digest, size):
+            self.backend.put_file(key, tmp_path)
+        return digest, size
+
+    def add_ref(self, digest: str, size: int = None) -> bool:
+        """Adds one reference (bumping updated_at). True if this created the blob's refs document."""
+        update = {'$inc': {'refs': 1}, '$set': {'updated_at': datetime.datetime.now(datetime.UTC)}}
+        if size is not None:
+            update['$setOnInsert'] = {'size': size}
+        return self.collection.update_one({'_id': digest}, update, upsert=True).upserted_id is not None
+
+    def release(self, filename: str):
+        """Drops one reference. Blobs reaching zero are removed later by `gc` (not inline, see below)."""
+        digest = self.digest_of(filename)
+        if digest is None:
+            return
+        self.collection.update_one(
+            {'_id': digest},
+            {'$inc': {'refs': -1}, '$set': {'updated_at': datetime.datetime.now(datetime.UTC)}}
+        )
+
+    def gc(self, grace_seconds: float = 3600) -> int:
+        """
+        Deletes blobs that have had no references for `grace_seconds`. Deletion is deferred
+        (instead of happening in `release`), and a re-upload adds its reference before checking
+        whether the file exists, so an upload that starts after gc removed the refs document
+        writes the file again. A narrow race remains only if that upload's write lands before
+        gc's own file delete for the same blob. Returns the number of blobs removed.
+        """
+        cutoff = datetime.datetime.now(datetime.UTC) - datetime.timedelta(seconds=grace_seconds)
+        removed = 0
+        for doc in self.collection.find({'refs': {'$lte': 0}, 'updated_at': {'$lte': cutoff}}, {'_id': 1}):
+            # Conditional delete: beech mein kisi ne reference add kiya ho to blob rehne do
+            result = self.collection.delete_one({'_id': doc['_id'], 'refs': {'$lte': 0}, 'updated_at': {'$lte': cutoff}})
+            if result.deleted_count:
+                self.backend.delete(self.blob_key(doc['_id']))
+                removed += 1
+        return removed
+
+    def migrate_local_blobs(self) -> int:
+        """
+        Copies content-addressed blobs still on local disk (written before STORAGE_BACKEND was
+        switched) into the configured backend. Local files are kept. Returns blobs copied.
+        """
+        if self.legacy_backend is self.backend:
+            return 0
+        copied = 0
+        for doc in self.collection.find({}, {'_id': 1}):
+            key = self.blob_key(doc['_id'])
+            local_path = self.legacy_backend.path(key)
+            if os.path.isfile(local_path) and not self.backend.exists(key):
+                self.backend.put_file(key, local_path)
+                copied += 1
+        return copied
+
+def iter_chunks(stream, chunk_size: int = CHUNK_SIZE):
+    """Yields a readable stream's bytes in chunks of at most `chunk_size`."""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+def stored_filenames(doc: dict) -> list:
+    """Upload filenames referenced by a report/issue document (prescription image included)."""
+    names = [doc.get(key) for key in ('filename', 'audio_filename', 'video_filename')]
+    prescription = doc.get('prescription') or {}
+    names.append(prescription.get('image_filename'))
+    return [name for name in names if name]
+
+# --- Serving ---
+# Stored files kabhi badalte nahi (naam = content hash ya uuid), isliye lambi caching safe hai.
+# 'private': medical files shared proxies/CDN par cache nahi honi chahiye.
+FILE_SERVE_MODES = ('direct', 'x-accel-redirect', 'x-sendfile')
+
+def _offload_response(store: BlobStore, path: str, filename: str, mimetype: str, as_attachment: bool, etag: str):
+    """Empty response that tells the front proxy which file to stream (nginx X-Accel-Redirect / X-Sendfile)."""
+    config = current_app.config
+    response = current_app.response_class(mimetype=mimetype)
+    if config.get('FILE_SERVE_MODE') == 'x-accel-redirect':
+        relative = os.path.relpath(path, store.root).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = config.get('FILE_ACCEL_PREFIX', '/_protected_uploads/').rstrip('/') + '/' + relative
+    else:
+        response.headers['X-Sendfile'] = path
+    if as_attachment:
+        response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    response.set_etag(etag)
+    # 304 yahin se; Range requests proxy khud handle karta hai
+    response = response.make_conditional(request, accept_ranges=False)
+    if response.status_code == 304:
+        response.headers.pop('X-Accel-Redirect', None)
+        response.headers.pop('X-Sendfile', None)
+    return response
+
+def _stream_response(store: BlobStore, filename: str, mimetype: str, as_attachment: bool, etag: str):
+    """Streams a file from a non-local backend (GridFS) in chunks, with ETag and byte-range support."""
+    opened = store.open(filename)
+    if opened is None:
+        abort(404)
+    stream, size = opened
+    response = current_app.response_class(wrap_file(request.environ, stream, store.chunk_size),
+                                          mimetype=mimetype, direct_passthrough=True)
+    response.content_length = size
+    if as_attachment:
+        response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    response.set_etag(etag)
+    return response.make_conditional(request, accept_ranges=True, complete_length=size)
+
+def _presigned_response(url: str, etag: str, max_age: int):
+    """302 to a pre-signed object-store URL; a matching If-None-Match still gets a 304 here."""
+    response = redirect(url, code=302)
+    response.set_etag(etag)
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        response.headers.pop('Location', None)
+    # Redirect signature se pehle expire hona chahiye
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    return response
+
+def send_upload(store: BlobStore, filename: str, as_attachment: bool = False):
+    """
+    Serves a stored upload by its filename (404 if unknown) with a strong ETag (the sha256
+    for content-addressed blobs), If-None-Match -> 304, byte ranges and long-lived private
+    caching. With FILE_SERVE_MODE 'x-accel-redirect' / 'x-sendfile' the bytes are streamed
+    by the front proxy instead of a Python worker. Object-store backends answer with a
+    redirect to a short-lived pre-signed URL; GridFS is streamed in chunks.
+    """
+    key = store.key_for(filename)
+    if key is None:
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    digest = store.digest_of(filename)
+    path = store.path_for(filename)
+
+    if path is None:
+        # Remote backend (legacy uuid names local disk se upar wali branch mein aate hain)
+        etag = digest
+        ttl = current_app.config.get('FILE_PRESIGN_TTL', 300)
+        url = store.backend.presigned_url(key, mimetype=mimetype, expires_in=ttl,
+                                          download_name=filename if as_attachment else None)
+        if url:
+            return _presigned_response(url, etag, max(0, ttl // 2))
+        response = _stream_response(store, filename, mimetype, as_attachment, etag)
+    else:
+        if not os.path.isfile(path):
+            abort(404)
+        if digest is None:
+            # Legacy uuid files bhi immutable hain; ETag size + mtime se
+            stat = os.stat(path)
+            digest = hashlib.sha256(f"{filename}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+        if current_app.config.get('FILE_SERVE_MODE', 'direct') != 'direct':
+            response = _offload_response(store, path, filename, mimetype, as_attachment, digest)
+        else:
+            response = send_file(path, mimetype=mimetype, as_attachment=as_attachment, download_name=filename,
+                                 etag=digest, conditional=True)
+
+    max_age = current_app.config.get('FILE_CACHE_MAX_AGE', 365 * 24 * 3600)
+    response.cache_control.no_cache = None
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,161 @@
+import os
+import gridfs
+
+# ==============================================================================
+#  UPLOAD STORAGE BACKENDS
+# ==============================================================================
+# BlobStore (utils/storage.py) hashing, dedup aur ref counts sambhalta hai; bytes kahan
+# rakhe jaayein yeh backend decide karta hai. Key hamesha 'ab/cd/<sha256>' (ya legacy flat
+# naam) hoti hai. Teeno backends chunks mein padhte/likhte hain, poori file memory mein
+# kabhi nahi aati.
+#
+#   local  - UPLOAD_FOLDER par files (single node; nginx X-Accel-Redirect ke saath)
+#   gridfs - Mongo GridFS bucket; app nodes stateless, bytes app se stream hote hain
+#   s3     - S3-compatible object store (AWS, MinIO, ...); serving pre-signed URL redirect se
+#
+# s3 backend ke liye `boto3` chahiye (optional dependency, sirf tabhi import hota hai).
+
+class LocalBackend:
+    """Files under `root`, laid out by key."""
+    name = 'local'
+
+    def __init__(self, root: str, **_):
+        self.root = os.path.abspath(root)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def put_file(self, key: str, local_path: str):
+        # Same filesystem par rename - koi copy nahi
+        final_path = self.path(key)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(local_path, final_path)
+
+    def open(self, key: str):
+        """(readable file, size) or None if the key doesn't exist."""
+        try:
+            f = open(self.path(key), 'rb')
+        except FileNotFoundError:
+            return None
+        return f, os.fstat(f.fileno()).st_size
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def presigned_url(self, key: str, **_):
+        return None
+
+class GridFSBackend:
+    """Files in a Mongo GridFS bucket (`<bucket>.files` / `<bucket>.chunks`), filename = key."""
+    name = 'gridfs'
+
+    def __init__(self, db, bucket_name: str = 'uploads', chunk_size: int = 255 * 1024, **_):
+        self.fs = gridfs.GridFS(db, collection=bucket_name)
+        self.chunk_size = chunk_size
+
+    def path(self, key: str):
+        return None
+
+    def exists(self, key: str) -> bool:
+        return self.fs.exists(filename=key)
+
+    def put_file(self, key: str, local_path: str):
+        with open(local_path, 'rb') as f:
+            self.fs.put(f, filename=key, chunk_size=self.chunk_size)
+
+    def open(self, key: str):
+        try:
+            grid_out = self.fs.get_last_version(key)
+        except gridfs.errors.NoFile:
+            return None
+        return grid_out, grid_out.length
+
+    def delete(self, key: str):
+        for grid_out in self.fs.find({'filename': key}):
+            self.fs.delete(grid_out._id)
+
+    def presigned_url(self, key: str, **_):
+        return None
+
+class S3Backend:
+    """Objects in an S3-compatible bucket under `prefix`; served through pre-signed GET URLs."""
+    name = 's3'
+
+    def __init__(self, bucket: str, endpoint_url: str = None, region: str = None, access_key_id: str = None,
+                 secret_access_key: str = None, prefix: str = '', chunk_size: int = 8 * 1024 * 1024, **_):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.client import Config as BotoConfig
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND 's3' needs boto3: pip install boto3")
+        if not bucket:
+            raise ValueError("STORAGE_BACKEND 's3' needs S3_BUCKET")
+        self._client_error = ClientError
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        # MinIO jaise endpoints path-style addressing chahte hain
+        self.client = boto3.client(
+            's3', endpoint_url=endpoint_url, region_name=region, aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=BotoConfig(signature_version='s3v4', s3={'addressing_style': 'path' if endpoint_url else 'auto'}),
+        )
+        # Badi files multipart mein, chunk_size ke parts - memory mein ek part se zyada nahi
+        self.transfer_config = TransferConfig(multipart_threshold=chunk_size, multipart_chunksize=chunk_size)
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def path(self, key: str):
+        return None
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except self._client_error as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def put_file(self, key: str, local_path: str):
+        self.client.upload_file(local_path, self.bucket, self._key(key), Config=self.transfer_config)
+
+    def open(self, key: str):
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except self._client_error as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return obj['Body'], obj['ContentLength']
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def presigned_url(self, key: str, mimetype: str = None, download_name: str = None, expires_in: int = 300):
+        params = {'Bucket': self.bucket, 'Key': self._key(key)}
+        if mimetype:
+            params['ResponseContentType'] = mimetype
+        if download_name:
+            params['ResponseContentDisposition'] = f'attachment; filename="{download_name}"'
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires_in)
+
+STORAGE_BACKENDS = {
+    'local': LocalBackend,
+    'gridfs': GridFSBackend,
+    's3': S3Backend,
+}
+
+def create_storage_backend(backend: str = 'local', **options):
+    """Builds the configured upload storage backend."""
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return STORAGE_BACKENDS[backend](**options)
@@ -0,0 +1,100 @@
+import json
+from flask import Response, current_app, stream_with_context
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+
+# ==============================================================================
+#  STREAMING JSON RESPONSES
+# ==============================================================================
+# Poori list memory mein banane ki jagah documents seedhe pymongo cursor se
+# batch-by-batch encode hokar client ko bheje jaate hain. Peak memory sirf ek
+# batch jitni rehti hai, collection size se independent.
+
+def parse_batch_size(batch_size) -> int:
+    """Validates a batch size, falling back to DEFAULT_BATCH_SIZE and capping at MAX_BATCH_SIZE."""
+    if batch_size in (None, ''):
+        return DEFAULT_BATCH_SIZE
+    try:
+        batch_size = int(batch_size)
+    except (TypeError, ValueError):
+        raise ValueError("batch_size must be an integer")
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    return min(batch_size, MAX_BATCH_SIZE)
+
+def iter_batches(cursor, batch_size: int):
+    """Groups documents from a cursor into lists of at most batch_size."""
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class StreamedArray:
+    """
+    A JSON array whose items come from a pymongo cursor.
+    `transform` receives each batch (a list of documents) and returns the documents to emit,
+    so per-batch enrichment (e.g. one $in lookup per batch) stays bounded too.
+    """
+    def __init__(self, cursor, batch_size: int = DEFAULT_BATCH_SIZE, transform=None):
+        self.cursor = cursor.batch_size(batch_size)
+        self.batch_size = batch_size
+        self.transform = transform
+
+    def chunks(self, dumps):
+        yield '['
+        first = True
+        for batch in iter_batches(self.cursor, self.batch_size):
+            if self.transform:
+                batch = self.transform(batch)
+            if not batch:
+                continue
+            yield ('' if first else ',') + ','.join(dumps(doc) for doc in batch)
+            first = False
+        yield ']'
+
+def streaming_json_response(fields, status: int = 200) -> Response:
+    """
+    Streams a JSON object. Values that are StreamedArray instances are encoded
+    incrementally from their cursor; every other value is encoded in one go.
+    `fields` can also be a StreamedArray itself, streamed as a bare JSON array.
+    """
+    # Wahi JSON provider jo jsonify use karta hai, taaki dates etc. same format mein aayein
+    dumps = current_app.json.dumps
+
+    def generate():
+        if isinstance(fields, StreamedArray):
+            yield from fields.chunks(dumps)
+            return
+        yield '{'
+        for i, (key, value) in enumerate(fields.items()):
+            yield ('' if i == 0 else ',') + dumps(key) + ':'
+            if isinstance(value, StreamedArray):
+                yield from value.chunks(dumps)
+            else:
+                yield dumps(value)
+        yield '}'
+
+    return Response(stream_with_context(generate()), status=status, mimetype='application/json')
+
+# ==============================================================================
+#  SERVER-SENT EVENTS
+# ==============================================================================
+
+def sse_event(data: dict, event: str = None) -> str:
+    """Formats one Server-Sent Event with a JSON payload."""
+    prefix = f"event: {event}\n" if event else ''
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_response(events) -> Response:
+    """Streams an iterable of formatted SSE events, flushing each as it is produced."""
+    headers = {
+        'Cache-Control': 'no-cache',
+        # nginx jaise proxies ko buffering band karne ko kehta hai, taaki tokens turant pahunchein
+        'X-Accel-Buffering': 'no',
+    }
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers=headers)
@@ -0,0 +1,245 @@
+import datetime
+import hashlib
+import re
+import uuid
+from utils.metrics import timed
+from utils.storage import iter_chunks
+
+# ==============================================================================
+#  RESUMABLE CHUNKED UPLOADS
+# ==============================================================================
+# Gaon ke 3G par 50 MB ka issue video ek multipart request mein bhejna aksar beech mein
+# toot jaata hai aur poori file dobara bhejni padti hai. Yahan upload teen steps mein hota hai:
+#
+#   POST   /patients/upload-sessions                 {filename, size}  -> upload_id
+#   PUT    /patients/upload-sessions/<id>            Content-Range: bytes start-end/size (+ X-Content-SHA256)
+#   POST   /patients/upload-sessions/<id>/complete   -> stored filename '<sha256><ext>'
+#
+# Har chunk seedha storage backend mein ek alag object (`partials/<id>/...`) ban jaata hai,
+# uska sha256 `upload_sessions` mein record hota hai. Connection toote to client
+# GET /patients/upload-sessions/<id> se `received` offset poochh kar wahin se aage bhejta hai.
+# Complete par parts stream karke (har part ka checksum dobara verify karke) ek normal
+# content-addressed blob banta hai; phir issue/report `*_upload_id` se use attach karte hain.
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+_CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+class UploadError(Exception):
+    """Client-facing upload error; `status` is the HTTP status, `details` extra JSON fields."""
+    status = 400
+
+    def __init__(self, message: str, **details):
+        super().__init__(message)
+        self.details = details
+
+class UploadNotFound(UploadError):
+    status = 404
+
+class UploadOffsetMismatch(UploadError):
+    status = 409
+
+class ChunkChecksumMismatch(UploadError):
+    status = 422
+
+def parse_content_range(header: str):
+    """'bytes 0-1023/5000' -> (0, 1023, 5000). Raises UploadError if malformed."""
+    match = _CONTENT_RANGE_RE.match((header or '').strip())
+    if not match:
+        raise UploadError("Content-Range header 'bytes <start>-<end>/<size>' is required")
+    start, end, total = (int(g) for g in match.groups())
+    if end < start or end >= total:
+        raise UploadError('Invalid Content-Range')
+    return start, end, total
+
+def _limited_chunks(stream, length: int, chunk_size: int):
+    """At most `length` bytes of `stream`, in chunks."""
+    remaining = length
+    while remaining > 0:
+        chunk = stream.read(min(chunk_size, remaining))
+        if not chunk:
+            return
+        remaining -= len(chunk)
+        yield chunk
+
+class ResumableUploads:
+    def __init__(self, store, collection, chunk_size: int = DEFAULT_CHUNK_SIZE, max_size: int = 512 * 1024 * 1024,
+                 ttl: float = 24 * 3600, assembly_timeout: float = 15 * 60):
+        self.store = store
+        self.collection = collection
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.ttl = ttl
+        self.assembly_timeout = assembly_timeout
+
+    def _expiry(self, now):
+        return now + datetime.timedelta(seconds=self.ttl)
+
+    def create(self, user_id: str, original_name: str, size: int) -> dict:
+        """Opens an upload session for `size` bytes and returns it."""
+        if not original_name:
+            raise UploadError('filename is required')
+        if not isinstance(size, int) or size <= 0:
+            raise UploadError('size must be a positive integer')
+        if size > self.max_size:
+            raise UploadError(f'Uploads are limited to {self.max_size} bytes', max_size=self.max_size)
+        now = datetime.datetime.now(datetime.UTC)
+        session = {
+            '_id': uuid.uuid4().hex, 'user_id': user_id, 'original_name': original_name, 'size': size,
+            'received': 0, 'chunks': [], 'status': 'open', 'created_at': now, 'updated_at': now,
+            'expires_at': self._expiry(now),
+        }
+        self.collection.insert_one(session)
+        return session
+
+    def get(self, upload_id: str, user_id: str) -> dict:
+        now = datetime.datetime.now(datetime.UTC)
+        session = self.collection.find_one({'_id': upload_id, 'user_id': user_id, 'expires_at': {'$gt': now}},
+                                           {'chunks': 0})
+        if session is None:
+            raise UploadNotFound('Upload not found or expired')
+        return session
+
+    @timed('upload_chunk')
+    def append(self, upload_id: str, user_id: str, content_range: str, stream, sha256: str = None) -> int:
+        """
+        Stores one chunk (the bytes named by `content_range`) as its own backend object and
+        advances the session. Chunks must arrive in order; a chunk that doesn't start at the
+        received offset gets UploadOffsetMismatch with the current `received`.
+        Returns the new received offset.
+        """
+        start, end, total = parse_content_range(content_range)
+        session = self.get(upload_id, user_id)
+        if session['status'] != 'open':
+            raise UploadOffsetMismatch('Upload is already finalized', received=session['received'])
+        if total != session['size']:
+            raise UploadError('Content-Range size does not match the upload size', size=session['size'])
+        if start != session['received']:
+            raise UploadOffsetMismatch('Chunk does not start at the received offset', received=session['received'])
+
+        # Har attempt ki alag key: do concurrent retries ek doosre ka part overwrite nahi karte
+        key = f"partials/{upload_id}/{start:015d}-{uuid.uuid4().hex[:8]}"
+        length = end - start + 1
+        digest, size = self.store.put_object(key, _limited_chunks(stream, length, self.store.chunk_size))
+        if size != length:
+            self.store.backend.delete(key)
+            raise UploadError('Chunk body is shorter than its Content-Range', received=start)
+        if sha256 and sha256.lower() != digest:
+            self.store.backend.delete(key)
+            raise ChunkChecksumMismatch('Chunk checksum mismatch', received=start)
+
+        now = datetime.datetime.now(datetime.UTC)
+        result = self.collection.update_one(
+            {'_id': upload_id, 'status': 'open', 'received': start},
+            {'$inc': {'received': size}, '$push': {'chunks': {'offset': start, 'size': size, 'sha256': digest, 'key': key}},
+             '$set': {'updated_at': now, 'expires_at': self._expiry(now)}}
+        )
+        if not result.modified_count:
+            # Isi offset ka chunk kisi aur request ne pehle likh diya
+            self.store.backend.delete(key)
+            raise UploadOffsetMismatch('Chunk does not start at the received offset',
+                                       received=self.get(upload_id, user_id)['received'])
+        return start + size
+
+    def _assembled(self, chunks):
+        """Streams the stored parts in order, re-verifying each part's size and checksum."""
+        for part in sorted(chunks, key=lambda c: c['offset']):
+            opened = self.store.backend.open(part['key'])
+            if opened is None:
+                raise UploadError(f"Chunk at offset {part['offset']} is missing")
+            stream, _ = opened
+            hasher = hashlib.sha256()
+            size = 0
+            try:
+                for data in iter_chunks(stream, self.store.chunk_size):
+                    hasher.update(data)
+                    size += len(data)
+                    yield data
+            finally:
+                stream.close()
+            if size != part['size'] or hasher.hexdigest() != part['sha256']:
+                raise UploadError(f"Chunk at offset {part['offset']} is corrupted")
+
+    @timed('upload_complete')
+    def complete(self, upload_id: str, user_id: str) -> str:
+        """
+        Joins all parts into one content-addressed blob (one reference, owned by the session
+        until attached) and removes the parts. Safe to retry: returns the same filename.
+        An assembly older than `assembly_timeout` (e.g. the process died midway) is taken over.
+        """
+        now = datetime.datetime.now(datetime.UTC)
+        session = self.collection.find_one({'_id': upload_id, 'user_id': user_id, 'expires_at': {'$gt': now}})
+        if session is None:
+            raise UploadNotFound('Upload not found or expired')
+        if session['status'] == 'complete':
+            return session['filename']
+        if session['received'] != session['size']:
+            raise UploadError('Upload is incomplete', received=session['received'])
+        # Har assembly ka apna token: stale assembly take over ho jaaye to purana worker
+        # baad mein session ko overwrite nahi karta
+        assembly_id = uuid.uuid4().hex
+        stale_before = now - datetime.timedelta(seconds=self.assembly_timeout)
+        claimed = self.collection.update_one(
+            {'_id': upload_id, 'received': session['size'],
+             '$or': [{'status': 'open'}, {'status': 'assembling', 'assembling_at': {'$lte': stale_before}}]},
+            {'$set': {'status': 'assembling', 'assembling_at': now, 'assembly_id': assembly_id}})
+        if not claimed.modified_count:
+            raise UploadOffsetMismatch('Upload is already being finalized', received=session['received'])
+        ours = {'_id': upload_id, 'status': 'assembling', 'assembly_id': assembly_id}
+        try:
+            filename = self.store.save_chunks(self._assembled(session['chunks']), session['original_name'])
+        except BaseException:
+            self.collection.update_one(ours, {'$set': {'status': 'open'},
+                                              '$unset': {'assembling_at': '', 'assembly_id': ''}})
+            raise
+        finished = self.collection.update_one(ours, {
+            '$set': {'status': 'complete', 'filename': filename, 'chunks': [],
+                     'updated_at': datetime.datetime.now(datetime.UTC)},
+            '$unset': {'assembling_at': '', 'assembly_id': ''}})
+        if not finished.modified_count:
+            # Kisi retry ne yeh assembly take over karke pehle hi complete kar di - hamara ref wapas
+            self.store.release(filename)
+            return self.complete(upload_id, user_id)
+        self._delete_parts(session['chunks'])
+        return filename
+
+    def take(self, upload_id: str, user_id: str) -> dict:
+        """
+        Hands a completed upload over to an issue/report: the session is removed and its blob
+        reference now belongs to the caller. Returns the session (filename, original_name).
+        """
+        session = self.collection.find_one_and_delete(
+            {'_id': upload_id, 'user_id': user_id, 'status': 'complete',
+             'expires_at': {'$gt': datetime.datetime.now(datetime.UTC)}})
+        if session is None:
+            raise UploadNotFound(f'Upload {upload_id} not found or not completed')
+        return session
+
+    def give_back(self, session: dict):
+        """Undoes `take` (e.g. when attaching a second upload of the same request failed)."""
+        self.collection.insert_one(session)
+
+    def abort(self, upload_id: str, user_id: str):
+        session = self.collection.find_one_and_delete({'_id': upload_id, 'user_id': user_id,
+                                                       'status': {'$in': ['open', 'complete']}})
+        if session is None:
+            raise UploadNotFound('Upload not found')
+        self._cleanup(session)
+
+    def gc(self) -> int:
+        """Removes expired sessions with their parts (and unattached blobs). Returns sessions removed."""
+        now = datetime.datetime.now(datetime.UTC)
+        removed = 0
+        for session in self.collection.find({'expires_at': {'$lte': now}}):
+            if self.collection.delete_one({'_id': session['_id'], 'expires_at': {'$lte': now}}).deleted_count:
+                self._cleanup(session)
+                removed += 1
+        return removed
+
+    def _cleanup(self, session: dict):
+        self._delete_parts(session.get('chunks') or [])
+        if session.get('status') == 'complete':
+            self.store.release(session['filename'])
+
+    def _delete_parts(self, chunks):
+        for part in chunks:
+            self.store.backend.delete(part['key'])